@@ -1,50 +1,37 @@
-from flask import Flask, render_template, request, redirect, session, send_file, flash, url_for, g, send_from_directory, abort, jsonify, Blueprint
+from flask import Flask, render_template, request, redirect, session, flash, url_for, send_from_directory, abort, jsonify, Blueprint, stream_with_context, g
 import os
 from config import *
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from resume_parser.parser import extract_text, extract_resume_data, _INST_RE as _INST_RE_APP
-from reportlab.pdfgen import canvas
-from io import BytesIO
-from apscheduler.schedulers.background import BackgroundScheduler
-import smtplib
-from email.mime.text import MIMEText
 import json
 import re
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import io
-from flask import send_file
 from functools import wraps
 from collections import defaultdict
 import secrets
+import threading
 from datetime import datetime, timedelta
-import requests
 import uuid
 
 app = Flask(__name__, template_folder='career_guidance_ai/templates')
 app.secret_key = SECRET_KEY
 app.config['APPLICATION_ROOT'] = '/Career_Guidance_SubProject'
-UPLOAD_FOLDER = 'uploads'
+UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-import psycopg2
-import psycopg2.extras
+from career_guidance_ai.db import get_db
+from career_guidance_ai import scoring, salary, job_search, job_facets, autocomplete, recommendations as recs
+from career_guidance_ai import job_alerts as alert_matcher, dashboard as dashboard_panels, career_plans
+from career_guidance_ai import notifications as notification_service, scheduler as job_scheduler, storage
+from career_guidance_ai import reports as pdf_reports, report_export, leaderboard as rankings, gamification
+from career_guidance_ai import peer_groups as groups_service
 
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 def allowed_image(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
 
-def get_db():
-    return psycopg2.connect(
-        DATABASE_URL,
-        sslmode='require',
-        cursor_factory=psycopg2.extras.RealDictCursor,
-        options='-c client_encoding=UTF8'
-    )
-
 def _fix_utf8(s):
     """
     Repair text corrupted by Windows-1252 (CP1252) mis-decoding of UTF-8 bytes.
@@ -60,98 +47,27 @@ def _fix_utf8(s):
         return s
 
 def add_notification(user_id, message):
-    conn = get_db()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute('INSERT INTO notifications (user_id, message) VALUES (%s, %s)', (user_id, message))
-        conn.commit()
-    finally:
-        conn.close()
+    notification_service.add(user_id, message)
 
-@app.before_request
-def load_unread_notifications():
-    g.unread_notifications = 0
-    if 'user_id' in session:
-        conn = get_db()
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute('SELECT COUNT(*) as count FROM notifications WHERE user_id = %s AND is_read = FALSE', (session['user_id'],))
-                row = cursor.fetchone()
-                g.unread_notifications = row['count'] if row else 0
-        finally:
-            conn.close()
-
-def get_course_links_for_skills(skills):
-    # skills: list of skill names (strings)
-    links = []
-    for skill in skills:
-        q = skill.replace(' ', '+')
-        links.append({
-            'skill': skill.title(),
-            'google': f'https://www.google.com/search?q={q}+course',
-            'coursera': f'https://www.coursera.org/search?query={q}',
-            'udemy': f'https://www.udemy.com/courses/search/?q={q}',
-            'edx': f'https://www.edx.org/search?q={q}',
-            'linkedin': f'https://www.linkedin.com/learning/search?keywords={q}',
-            'khan': f'https://www.khanacademy.org/search?page_search_query={q}'
-        })
-    return links
-
-# ── Career domain keyword mapping for project-based matching ─────────────────
-CAREER_PROJECT_KEYWORDS = {
-    'Software Developer': [
-        'app', 'application', 'software', 'web app', 'system', 'api',
-        'backend', 'frontend', 'full stack', 'react', 'django', 'flask',
-        'spring', 'node', 'website', 'platform', 'portal', 'developed',
-        'built', 'created', 'implemented', 'deployed', 'rest api',
-    ],
-    'Data Analyst': [
-        'data analysis', 'analytics', 'dashboard', 'visualization', 'report',
-        'excel', 'tableau', 'power bi', 'sql', 'dataset', 'statistics',
-        'insight', 'trend', 'business intelligence', 'kpi', 'metric',
-    ],
-    'Data Scientist': [
-        'machine learning', 'ml', 'model', 'prediction', 'classification',
-        'regression', 'neural network', 'deep learning', 'nlp', 'ai',
-        'training', 'scikit', 'tensorflow', 'pytorch', 'xgboost', 'bert',
-        'lstm', 'computer vision', 'feature engineering',
-    ],
-    'UI/UX Designer': [
-        'design', 'ui', 'ux', 'figma', 'prototype', 'wireframe',
-        'user interface', 'user experience', 'mockup', 'redesign',
-        'creative', 'visual', 'branding', 'graphic', 'adobe xd',
-    ],
-    'Cloud Engineer': [
-        'cloud', 'aws', 'azure', 'gcp', 'deploy', 'docker', 'kubernetes',
-        'devops', 'ci/cd', 'infrastructure', 'server', 'microservice',
-        'container', 'jenkins', 'terraform', 'heroku', 'vercel',
-    ],
-    'Project Manager': [
-        'manage', 'team', 'project management', 'agile', 'scrum',
-        'sprint', 'planning', 'coordination', 'stakeholder', 'milestone',
-        'budget', 'timeline', 'delivery', 'leadership', 'led team',
-    ],
-    'Support Engineer': [
-        'support', 'helpdesk', 'troubleshoot', 'maintenance', 'documentation',
-        'ticket', 'technical support', 'client', 'customer support',
-    ],
-    'Business Analyst': [
-        'business', 'requirement', 'process', 'strategy', 'stakeholder',
-        'workflow', 'analysis', 'report', 'business intelligence', 'erp',
-    ],
-}
+def show_unread_count(user):
+    # For routes that already loaded the user's row: the badge reads it instead of querying
+    if user:
+        g.unread_notifications = user['unread_notifications']
 
-CAREER_EDU_KEYWORDS = {
-    'Software Developer': ['computer', 'software', 'bca', 'mca', 'b.tech', 'btech', 'cse', 'it ', 'information technology'],
-    'Data Analyst': ['statistics', 'mathematics', 'data', 'analytics', 'msc', 'computer', 'it '],
-    'Data Scientist': ['statistics', 'mathematics', 'data science', 'machine learning', 'computer', 'msc', 'phd'],
-    'UI/UX Designer': ['design', 'computer', 'art', 'media', 'hci', 'it '],
-    'Cloud Engineer': ['computer', 'networking', 'it ', 'software', 'b.tech', 'btech', 'information technology'],
-    'Project Manager': ['management', 'mba', 'computer', 'business', 'b.tech', 'btech'],
-    'Support Engineer': ['computer', 'networking', 'it ', 'information technology'],
-    'Business Analyst': ['business', 'mba', 'management', 'commerce', 'economics', 'bba'],
-}
+@app.context_processor
+def unread_notifications_badge():
+    # Called from base.html only, so redirects and JSON responses never pay for the count
+    def unread_notifications():
+        if 'user_id' not in session:
+            return 0
+        if 'unread_notifications' in g:
+            return g.unread_notifications
+        return notification_service.unread_count(session['user_id'])
+    return {'unread_notifications': unread_notifications}
 
+@app.context_processor
+def image_helpers():
+    return {'thumbnail_url': storage.thumbnail_url}
 
 def detect_resume_profile(resume):
     """Detect domain clusters present in the resume for quiz personalisation."""
@@ -417,52 +333,6 @@ def generate_resume_quiz(resume):
     return questions[:10]
 
 
-def calculate_comprehensive_score(career, user_skills, user_education, user_experience, quiz_interest_area):
-    """
-    Calculate a comprehensive match score (0–100) for a career recommendation.
-    Weights: Projects/Experience 40% | Skills 35% | Education 15% | Quiz 10%
-    """
-    career_title    = career.get('title', '')
-    career_category = career.get('category', '')
-    required_skills = [s.strip().lower() for s in (career.get('required_skills', '') or '').split(',') if s.strip()]
-
-    score = 0
-
-    # 1. Project / experience match  (max 40 pts) ─────────────────────────────
-    project_keywords = CAREER_PROJECT_KEYWORDS.get(career_title, [])
-    if project_keywords and user_experience:
-        exp_lower = user_experience.lower()
-        matched   = sum(1 for kw in project_keywords if kw in exp_lower)
-        # Scale: ≥5 keyword matches → full 40 pts
-        score += min(40, int(matched / max(len(project_keywords), 1) * 160))
-    elif user_experience:
-        title_words = [w.lower() for w in career_title.split() if len(w) > 3]
-        if any(w in user_experience.lower() for w in title_words):
-            score += 15
-
-    # 2. Skill match  (max 35 pts) ────────────────────────────────────────────
-    if required_skills and user_skills:
-        available    = [s for s in required_skills if s in user_skills]
-        skill_ratio  = len(available) / len(required_skills)
-        score       += int(skill_ratio * 35)
-
-    # 3. Education match  (max 15 pts) ────────────────────────────────────────
-    edu_keywords = CAREER_EDU_KEYWORDS.get(career_title, [])
-    if edu_keywords and user_education:
-        if any(kw in user_education.lower() for kw in edu_keywords):
-            score += 15
-
-    # 4. Quiz interest area alignment  (max 10 pts) ───────────────────────────
-    if quiz_interest_area and career_category:
-        if career_category.lower() == quiz_interest_area.lower():
-            score += 10
-        elif (career_category.lower() in quiz_interest_area.lower()
-              or quiz_interest_area.lower() in career_category.lower()):
-            score += 5
-
-    return min(score, 100)
-
-
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -517,59 +387,21 @@ def logout():
 def dashboard():
     if 'user_id' in session:
         user_id = session['user_id']
-        conn = get_db()
-        try:
-            with conn.cursor() as cursor:
-                # User info
-                cursor.execute('SELECT name, profile_pic FROM users WHERE id = %s', (user_id,))
-                user = cursor.fetchone()
-                # Notifications
-                cursor.execute('SELECT * FROM notifications WHERE user_id = %s AND is_read = FALSE', (user_id,))
-                notifications = cursor.fetchall()
-                # Feedback count
-                cursor.execute('SELECT COUNT(*) as count FROM feedback WHERE user_id = %s', (user_id,))
-                feedback_row = cursor.fetchone()
-                feedback_count = feedback_row['count'] if feedback_row and 'count' in feedback_row else 0
-                # Last completed milestone
-                cursor.execute("SELECT cp.milestone, c.title, cp.status, cp.id FROM career_progress cp JOIN careers c ON cp.career_id = c.id WHERE cp.user_id = %s AND cp.status = 'Completed' ORDER BY cp.id DESC LIMIT 1", (user_id,))
-                last_milestone = cursor.fetchone()
-                # Last resume upload
-                cursor.execute('SELECT id, skills, education, experience FROM resumes WHERE user_id = %s ORDER BY id DESC LIMIT 1', (user_id,))
-                last_resume = cursor.fetchone()
-                # Progress summary for each active career plan
-                cursor.execute('SELECT DISTINCT cp.career_id, c.title FROM career_progress cp JOIN careers c ON cp.career_id = c.id WHERE cp.user_id = %s', (user_id,))
-                plans = cursor.fetchall()
-                progress_summaries = []
-                for plan in plans:
-                    cursor.execute('SELECT COUNT(*) as total FROM career_progress WHERE user_id = %s AND career_id = %s', (user_id, plan['career_id']))
-                    total_row = cursor.fetchone()
-                    total = total_row['total'] if total_row and 'total' in total_row else 0
-                    cursor.execute("SELECT COUNT(*) as completed FROM career_progress WHERE user_id = %s AND career_id = %s AND status = 'Completed'", (user_id, plan['career_id']))
-                    completed_row = cursor.fetchone()
-                    completed = completed_row['completed'] if completed_row and 'completed' in completed_row else 0
-                    percent = round((completed / total * 100), 1) if total > 0 else 0
-                    progress_summaries.append({
-                        'career_title': plan['title'],
-                        'percent': percent,
-                        'completed': completed,
-                        'total': total
-                    })
-        finally:
-            conn.close()
+        # All panels in one round trip, cached briefly per user
+        panels = dashboard_panels.get_dashboard(user_id)
+        user = panels['user']
+        show_unread_count(user)
         raw_pic = user['profile_pic'] if user else None
         print(f"[DEBUG dashboard] user={user}, raw_pic={raw_pic!r}")
-        if raw_pic:
-            profile_pic_url = f"{SUPABASE_URL}/storage/v1/object/public/{SUPABASE_BUCKET}/{raw_pic}"
-        else:
-            profile_pic_url = None
+        profile_pic_url = storage.thumbnail_url(raw_pic, 128)
         return render_template('dashboard.html',
             name=session['user_name'],
             profile_pic_url=profile_pic_url,
-            notifications=notifications,
-            feedback_count=feedback_count,
-            last_milestone=last_milestone,
-            last_resume=last_resume,
-            progress_summaries=progress_summaries
+            notifications=panels['notifications'],
+            feedback_count=panels['feedback_count'],
+            last_milestone=panels['last_milestone'],
+            last_resume=panels['last_resume'],
+            progress_summaries=panels['progress_summaries']
         )
     return redirect('/login')
 
@@ -805,13 +637,15 @@ def upload_resume():
                     cursor.execute('''
                         INSERT INTO resumes (user_id, skills, education, experience)
                         VALUES (%s, %s, %s, %s)
+                        RETURNING id
                     ''', (
                         user_id,
                         skills,
                         education,
                         experience
                     ))
-                    new_resume_id = cursor.lastrowid  # capture before cursor closes
+                    new_resume_id = cursor.fetchone()['id']  # capture before cursor closes
+                    gamification.emit(user_id, 'resume_uploaded', new_resume_id, cursor=cursor)
                     conn.commit()
             finally:
                 conn.close()
@@ -819,6 +653,9 @@ def upload_resume():
             # proceed with the previously selected (old) resume.
             if new_resume_id:
                 session['selected_resume_id'] = new_resume_id
+                recs.refresh_snapshot(user_id, new_resume_id)
+                pdf_reports.forget_user(user_id)
+                forget_job_recommendations()
             add_notification(user_id, "Your resume was uploaded and parsed successfully.")
             flash('Resume uploaded and parsed successfully!', 'success')
             # Fetch updated resumes list
@@ -858,9 +695,14 @@ def delete_resume(resume_id):
     try:
         with conn.cursor() as cursor:
             cursor.execute('DELETE FROM resumes WHERE id = %s AND user_id = %s', (resume_id, user_id))
+            if cursor.rowcount:
+                recs.delete_for_resume(cursor, resume_id)
         conn.commit()
     finally:
         conn.close()
+    dashboard_panels.invalidate(user_id)
+    pdf_reports.forget_user(user_id)
+    forget_job_recommendations()
     flash('Resume deleted successfully.', 'success')
     return redirect(url_for('upload_resume'))
 
@@ -925,19 +767,26 @@ def interest_quiz():
                 cursor.execute(
                     'INSERT INTO interests (user_id, resume_id, interest_area, quiz_answers) VALUES (%s, %s, %s, %s)',
                     (session['user_id'], selected_resume_id, interest_area, json.dumps(responses)))
+                # One quiz award per resume, however often it is retaken
+                gamification.emit(session['user_id'], 'quiz_completed', selected_resume_id, cursor=cursor)
             conn.commit()
         finally:
             conn.close()
+        # Build the recommendations now so /recommendations only has to read them
+        recs.refresh_snapshot(session['user_id'], selected_resume_id)
+        pdf_reports.forget_user(session['user_id'])
+        forget_job_recommendations()
         flash(f'Quiz submitted! Showing career recommendations based on your resume and answers.', 'success')
         return redirect(url_for('recommendations'))
 
     return render_template('interest_quiz.html', questions=questions, previous_answers=previous_answers)
 
-@app.route('/recommendations')
-def recommendations():
-    if 'user_id' not in session:
-        return redirect('/login')
-    user_id = session['user_id']
+def load_recommendation_snapshot(user_id):
+    """
+    Snapshot for the selected (or latest) resume and its latest quiz answers,
+    or None when either is missing.  Shared by recommendations, download_pdf
+    and saved_careers so all three show the same ranking.
+    """
     selected_resume_id = session.get('selected_resume_id')
     conn = get_db()
     try:
@@ -948,200 +797,30 @@ def recommendations():
             else:
                 cursor.execute('SELECT * FROM resumes WHERE user_id = %s ORDER BY id DESC LIMIT 1', (user_id,))
                 resume = cursor.fetchone()
-            cursor.execute('SELECT * FROM interests WHERE user_id = %s AND resume_id = %s ORDER BY id DESC LIMIT 1', (user_id, selected_resume_id))
-            interest = cursor.fetchone()
-            if not resume or not interest:
-                flash('Please upload your resume and complete the interest quiz first.', 'warning')
-                return redirect(url_for('dashboard'))
-            # Fetch ALL careers for comprehensive matching (not just by quiz category)
-            cursor.execute('SELECT * FROM careers')
-            careers = cursor.fetchall()
+            interest = None
+            if resume:
+                cursor.execute('SELECT * FROM interests WHERE user_id = %s AND resume_id = %s ORDER BY id DESC LIMIT 1', (user_id, resume['id']))
+                interest = cursor.fetchone()
     finally:
         conn.close()
-    user_skills    = [skill.strip().lower() for skill in resume['skills'].split(',')] if resume['skills'] else []
-    user_education = resume['education'].lower() if resume['education'] else ''
-    user_experience= resume['experience'].lower() if resume['experience'] else ''
-    interest_area  = interest['interest_area']
-
-    # Expanded project ideas with step-by-step guides
-    project_ideas_dict = {
-        'Software Developer': [
-            {'title': 'Build a Personal Portfolio Website', 'steps': [
-                'Choose a tech stack (HTML/CSS/JS, Flask, Django, etc.)',
-                'Design the layout and sections (About, Projects, Contact)',
-                'Implement navigation and responsive design',
-                'Deploy on GitHub Pages, Netlify, or Heroku'
-            ]},
-            {'title': 'Create a REST API with Flask', 'steps': [
-                'Set up a Flask project',
-                'Design API endpoints (CRUD)',
-                'Connect to a database (SQLite/MySQL)',
-                'Test with Postman and document the API'
-            ]},
-            {'title': 'Contribute to Open Source', 'steps': [
-                'Find a beginner-friendly project on GitHub',
-                'Read the contribution guidelines',
-                'Fix a bug or add a feature',
-                'Submit a pull request and get feedback'
-            ]},
-            {'title': 'Develop a To-Do List App', 'steps': [
-                'Design the UI and data model',
-                'Implement add/edit/delete functionality',
-                'Add user authentication (optional)',
-                'Deploy and share your app'
-            ]}
-        ],
-        'Data Analyst': [
-            {'title': 'Analyze a Public Dataset', 'steps': [
-                'Find a dataset on Kaggle or data.gov',
-                'Clean and preprocess the data',
-                'Visualize insights with matplotlib or Tableau',
-                'Write a summary report'
-            ]},
-            {'title': 'Build a Dashboard', 'steps': [
-                'Choose a tool (Power BI, Tableau, Dash)',
-                'Connect to a data source',
-                'Create interactive charts and filters',
-                'Publish or share your dashboard'
-            ]},
-            {'title': 'Predict Trends with Regression', 'steps': [
-                'Select a dataset with time series data',
-                'Apply linear regression in Python',
-                'Visualize predictions vs. actuals',
-                'Interpret and present your findings'
-            ]}
-        ],
-        'Data Scientist': [
-            {'title': 'Build a Sentiment Analysis Model', 'steps': [
-                'Collect or download a text dataset (e.g., IMDB reviews)',
-                'Preprocess and tokenize the text',
-                'Train an NLP model (LSTM or BERT)',
-                'Evaluate accuracy and deploy as an API'
-            ]},
-            {'title': 'Image Classification with CNN', 'steps': [
-                'Choose a dataset (e.g., CIFAR-10, Flowers)',
-                'Build a CNN model with TensorFlow/PyTorch',
-                'Train, validate, and tune hyperparameters',
-                'Deploy and test with new images'
-            ]},
-            {'title': 'Recommendation System', 'steps': [
-                'Use a public dataset (e.g., MovieLens)',
-                'Implement collaborative filtering',
-                'Evaluate with precision/recall metrics',
-                'Build a simple demo interface'
-            ]}
-        ],
-        'UI/UX Designer': [
-            {'title': 'Redesign a Popular App', 'steps': [
-                'Choose an app and analyze its UI/UX',
-                'Sketch wireframes for improvements',
-                'Create a Figma prototype',
-                'Present your redesign with rationale'
-            ]},
-            {'title': 'Design a Mobile App', 'steps': [
-                'Pick an app idea (e.g., habit tracker)',
-                'Design user flows and wireframes',
-                'Create high-fidelity mockups',
-                'Test with users and iterate'
-            ]}
-        ],
-        'Project Manager': [
-            {'title': 'Plan a Mock Project', 'steps': [
-                'Define project scope and goals',
-                'Create a timeline with milestones',
-                'Assign roles and responsibilities',
-                'Track progress using Trello or Jira'
-            ]},
-            {'title': 'Simulate a Risk Management Plan', 'steps': [
-                'Identify potential project risks',
-                'Assess likelihood and impact',
-                'Develop mitigation strategies',
-                'Document and review with team'
-            ]}
-        ],
-        'Support Engineer': [
-            {'title': 'Set Up a Virtual Helpdesk', 'steps': [
-                'Choose a helpdesk tool (e.g., Freshdesk, Zendesk)',
-                'Configure ticket categories and workflows',
-                'Create sample tickets and resolve them',
-                'Document common solutions in a knowledge base'
-            ]}
-        ],
-        'Cloud Engineer': [
-            {'title': 'Deploy a Web App to the Cloud', 'steps': [
-                'Choose a cloud provider (AWS, Azure, GCP)',
-                'Set up a virtual server or app service',
-                'Deploy your app and configure DNS',
-                'Set up monitoring and scaling'
-            ]},
-            {'title': 'Build a CI/CD Pipeline', 'steps': [
-                'Set up a GitHub Actions or Jenkins pipeline',
-                'Configure build, test, and deploy stages',
-                'Add notifications on success/failure',
-                'Document the pipeline architecture'
-            ]}
-        ],
-        'Business Analyst': [
-            {'title': 'Business Process Mapping', 'steps': [
-                'Identify a business process to analyse',
-                'Create an AS-IS process diagram',
-                'Identify inefficiencies and propose improvements',
-                'Present your TO-BE process diagram'
-            ]}
-        ],
-    }
+    if not resume or not interest:
+        return None
+    return recs.get_snapshot(resume, interest)
 
-    # ── Comprehensive scoring for ALL careers ────────────────────────────────
-    enhanced_careers = []
-    for career in careers:
-        required_skills  = [s.strip().lower() for s in career['required_skills'].split(',')] if career['required_skills'] else []
-        available_skills = [s for s in required_skills if s in user_skills]
-        missing_skills   = [s for s in required_skills if s not in user_skills]
-        course_links     = get_course_links_for_skills(missing_skills)
-        ideas            = project_ideas_dict.get(career['title'], [])
-
-        # Calculate comprehensive score (0–100)
-        raw_score = calculate_comprehensive_score(
-            dict(career), user_skills, user_education, user_experience, interest_area
-        )
-
-        # Build human-readable match explanation
-        explanation = []
-        # Project/experience signals
-        proj_kws = CAREER_PROJECT_KEYWORDS.get(career['title'], [])
-        if proj_kws and user_experience:
-            matched_proj = [kw for kw in proj_kws if kw in user_experience]
-            if matched_proj:
-                explanation.append(f"Project match: your experience mentions {', '.join(matched_proj[:3])}")
-        if available_skills:
-            explanation.append(f"Matched skills: {', '.join(s.title() for s in available_skills)}")
-        if missing_skills:
-            explanation.append(f"Skills to develop: {', '.join(s.title() for s in missing_skills[:4])}")
-        edu_kws = CAREER_EDU_KEYWORDS.get(career['title'], [])
-        if edu_kws and any(kw in user_education for kw in edu_kws):
-            explanation.append("Your education background aligns with this career.")
-        if career['category'].lower() == interest_area.lower():
-            explanation.append(f"Matches your quiz interest area: {interest_area}")
-
-        # Scale raw_score (0–100) to a display bar out of 10
-        display_score = round(raw_score / 10, 1)
-
-        avg_salary = get_average_salary(career['title'])
-        enhanced_careers.append({
-            **career,
-            'available_skills':  available_skills,
-            'missing_skills':    missing_skills,
-            'course_links':      course_links,
-            'project_ideas':     ideas,
-            'match_explanation': explanation,
-            'match_score':       display_score,   # 0.0 – 10.0
-            'raw_score':         raw_score,        # 0 – 100 (used for sorting)
-            'avg_salary':        avg_salary
-        })
-
-    # Sort by raw_score descending, show top 8 most relevant careers
-    result = sorted(enhanced_careers, key=lambda x: x['raw_score'], reverse=True)[:8]
-    return render_template('recommendations.html', careers=result)
+@app.route('/recommendations')
+def recommendations():
+    if 'user_id' not in session:
+        return redirect('/login')
+    snapshot = load_recommendation_snapshot(session['user_id'])
+    if snapshot is None:
+        flash('Please upload your resume and complete the interest quiz first.', 'warning')
+        return redirect(url_for('dashboard'))
+    # Salaries change with the jobs table, so they are looked up at serve time
+    enhanced_careers = [
+        dict(career, avg_salary=get_average_salary(career['title']))
+        for career in snapshot['careers']
+    ]
+    return render_template('recommendations.html', careers=enhanced_careers)
 
 @app.route('/career_path/<int:career_id>')
 def career_path(career_id):
@@ -1169,32 +848,15 @@ def download_pdf():
         with conn.cursor() as cursor:
             cursor.execute('SELECT * FROM users WHERE id = %s', (user_id,))
             user = cursor.fetchone()
-            cursor.execute('SELECT * FROM resumes WHERE user_id = %s ORDER BY id DESC LIMIT 1', (user_id,))
-            resume = cursor.fetchone()
-            cursor.execute('SELECT * FROM interests WHERE user_id = %s ORDER BY id DESC LIMIT 1', (user_id,))
-            interest = cursor.fetchone()
-            if not user or not resume or not interest:
-                flash('User, resume, or interest data missing. Please complete your profile, upload a resume, and take the quiz.', 'danger')
-                return redirect(url_for('dashboard'))
-            cursor.execute('SELECT * FROM careers WHERE category = %s', (interest['interest_area'],))
-            careers = cursor.fetchall()
     finally:
         conn.close()
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer)
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(100, 800, f"Career Recommendations for {user['name']}")
-    p.setFont("Helvetica", 12)
-    y = 770
-    for i, career in enumerate(careers[:5], 1):
-        p.drawString(80, y, f"{i}. {career['title']}")
-        p.drawString(100, y - 15, f"Category: {career['category']}")
-        p.drawString(100, y - 30, f"Skills: {career['required_skills']}")
-        p.drawString(100, y - 45, f"Desc: {career['description'][:80]}...")
-        y -= 70
-    p.save()
-    buffer.seek(0)
-    return send_file(buffer, as_attachment=True, download_name="career_recommendations.pdf", mimetype='application/pdf')
+    snapshot = load_recommendation_snapshot(user_id) if user else None
+    if not user or snapshot is None:
+        flash('User, resume, or interest data missing. Please complete your profile, upload a resume, and take the quiz.', 'danger')
+        return redirect(url_for('dashboard'))
+    # Rendered once per distinct content; repeat downloads are served from disk or answered with 304
+    source = pdf_reports.career_report_source(user, snapshot['careers'])
+    return pdf_reports.send_pdf('career_report', source, 'career_recommendations.pdf', user_id)
 
 @app.route('/saved_careers')
 def saved_careers():
@@ -1208,11 +870,16 @@ def saved_careers():
             raw = cursor.fetchall()
     finally:
         conn.close()
+    # Match scores come from the same snapshot as /recommendations (None until the quiz is taken)
+    snapshot = load_recommendation_snapshot(user_id) if raw else None
+    match_scores = snapshot['scores'] if snapshot else {}
     # Repair any path text that was stored with wrong Latin-1 decoding (e.g. â†' → →)
     careers = []
     for row in raw:
         r = dict(row)
         r['path'] = _fix_utf8(r.get('path', '') or '')
+        raw_score = match_scores.get(str(r['career_id']))
+        r['match_score'] = round(raw_score / 10, 1) if raw_score is not None else None
         careers.append(r)
     return render_template('saved_careers.html', careers=careers)
 
@@ -1288,45 +955,10 @@ def track_progress():
     conn = get_db()
     try:
         with conn.cursor() as cursor:
-            cursor.execute('''
-                SELECT cp.*, c.title FROM career_progress cp
-                JOIN careers c ON cp.career_id = c.id
-                WHERE cp.user_id = %s
-                ORDER BY c.title, cp.id
-            ''', (user_id,))
-            progress = cursor.fetchall()
-    finally:
-        conn.close()
-    # For each milestone, if it matches a missing skill for the user's career, add course_links
-    # First, build a map: (career_id) -> set of missing skills
-    career_missing_skills = {}
-    conn = get_db()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute('SELECT DISTINCT career_id FROM career_progress WHERE user_id = %s', (user_id,))
-            career_ids = [row['career_id'] for row in cursor.fetchall()]
-            for cid in career_ids:
-                cursor.execute('SELECT required_skills FROM careers WHERE id = %s', (cid,))
-                row = cursor.fetchone()
-                required_skills = [s.strip().lower() for s in row['required_skills'].split(',')] if row and row['required_skills'] else []
-                cursor.execute('SELECT skills FROM resumes WHERE user_id = %s ORDER BY id DESC LIMIT 1', (user_id,))
-                rrow = cursor.fetchone()
-                user_skills = [s.strip().lower() for s in rrow['skills'].split(',')] if rrow and rrow['skills'] else []
-                missing_skills = [s for s in required_skills if s not in user_skills]
-                career_missing_skills[cid] = set(missing_skills)
+            # Progress rows, required skills and latest resume skills in one query
+            progress = career_plans.plan_progress(cursor, user_id)
     finally:
         conn.close()
-    # Attach course_links to each milestone if it matches a missing skill
-    for item in progress:
-        skill_match = None
-        for skill in career_missing_skills.get(item['career_id'], []):
-            if skill in item['milestone'].lower():
-                skill_match = skill
-                break
-        if skill_match:
-            item['course_links'] = get_course_links_for_skills([skill_match])
-        else:
-            item['course_links'] = []
     return render_template('track_progress.html', progress=progress)
 
 @app.route('/update_progress', methods=['POST'])
@@ -1346,17 +978,30 @@ def update_progress():
         conn.commit()
     finally:
         conn.close()
+    dashboard_panels.invalidate(session['user_id'])
     if new_status == 'Completed':
-        # Get milestone and career title for the notification
+        # Get milestone and career title for the notification, and whether the whole plan is now done
         conn2 = get_db()
         try:
             with conn2.cursor() as cursor2:
-                cursor2.execute('SELECT cp.milestone, c.title FROM career_progress cp JOIN careers c ON cp.career_id = c.id WHERE cp.id = %s', (progress_id,))
+                cursor2.execute('''
+                    SELECT cp.user_id, cp.career_id, cp.resume_id, cp.milestone, c.title,
+                           (SELECT bool_and(p.status = 'Completed') FROM career_progress p
+                            WHERE p.user_id = cp.user_id AND p.career_id = cp.career_id
+                              AND p.resume_id IS NOT DISTINCT FROM cp.resume_id) AS plan_completed
+                    FROM career_progress cp JOIN careers c ON cp.career_id = c.id WHERE cp.id = %s
+                ''', (progress_id,))
                 row = cursor2.fetchone()
-                if row:
-                    add_notification(session['user_id'], f"Congratulations! You completed the milestone: {row['milestone']} in {row['title']}.")
+                if row and row['user_id'] == session['user_id']:
+                    gamification.emit(row['user_id'], 'milestone_completed', progress_id, cursor=cursor2)
+                    if row['plan_completed']:
+                        gamification.emit(row['user_id'], 'career_plan_completed',
+                                          f"{row['career_id']}:{row['resume_id']}", cursor=cursor2)
+            conn2.commit()
         finally:
             conn2.close()
+        if row:
+            add_notification(session['user_id'], f"Congratulations! You completed the milestone: {row['milestone']} in {row['title']}.")
     flash('Progress updated!', 'success')
     return redirect(url_for('track_progress'))
 
@@ -1377,57 +1022,11 @@ def start_plan(career_id):
             if not career:
                 flash('Career not found.', 'danger')
                 return redirect(url_for('recommendations'))
-            # Fetch milestones from career_milestones table
-            cursor.execute('SELECT milestone FROM career_milestones WHERE career_id = %s', (career_id,))
-            milestone_rows = cursor.fetchall()
-            if milestone_rows:
-                milestones = [row['milestone'] for row in milestone_rows]
-            else:
-                # Fallback to default logic if no milestones in table
-                title = career['title'].lower()
-                if 'developer' in title:
-                    milestones = [
-                        'Learn Programming Language',
-                        'Complete Git & GitHub Course',
-                        'Build Portfolio Website',
-                        'Contribute to Open Source',
-                        'Do Internship',
-                        'Apply for Developer Jobs'
-                    ]
-                elif 'data analyst' in title:
-                    milestones = [
-                        'Learn Excel & SQL',
-                        'Master Data Visualization Tools',
-                        'Do Case Study Projects',
-                        'Internship in Analytics',
-                        'Prepare Resume',
-                        'Apply for Analyst Roles'
-                    ]
-                else:
-                    milestones = [
-                        'Research the Career Path',
-                        'Take Online Courses',
-                        'Build Projects',
-                        'Get Mentorship',
-                        'Internship or Freelancing',
-                        'Apply for Jobs'
-                    ]
-            cursor.execute('SELECT milestone FROM career_progress WHERE user_id = %s AND career_id = %s AND resume_id = %s', (user_id, career_id, selected_resume_id))
-            existing = set(row['milestone'] for row in cursor.fetchall())
+            # Missing milestones are added in one INSERT ... ON CONFLICT DO NOTHING
+            career_plans.start_plan(cursor, user_id, career, selected_resume_id)
     finally:
         conn.close()
-    for m in milestones:
-        if m not in existing:
-            conn = get_db()
-            try:
-                with conn.cursor() as insert_cursor:
-                    insert_cursor.execute(
-                        'INSERT INTO career_progress (user_id, career_id, milestone, status, resume_id, note) VALUES (%s, %s, %s, %s, %s, %s)',
-                        (user_id, career_id, m, 'Not Started', selected_resume_id, None)
-                    )
-                conn.commit()
-            finally:
-                conn.close()
+    dashboard_panels.invalidate(user_id)
     add_notification(user_id, f"You started the {career['title']} career plan. Good luck!")
     flash('Career plan started! Track your progress below.', 'success')
     return redirect(url_for('career_plan_started', career_id=career_id))
@@ -1461,10 +1060,12 @@ def feedback():
         conn = get_db()
         try:
             with conn.cursor() as cursor:
-                cursor.execute('INSERT INTO feedback (user_id, message) VALUES (%s, %s)', (session['user_id'], message))
+                cursor.execute('INSERT INTO feedback (user_id, message) VALUES (%s, %s) RETURNING id', (session['user_id'], message))
+                gamification.emit(session['user_id'], 'feedback_submitted', cursor.fetchone()['id'], cursor=cursor)
             conn.commit()
         finally:
             conn.close()
+        dashboard_panels.invalidate(session['user_id'])
         flash('Thank you for your feedback!', 'success')
         return redirect(url_for('dashboard'))
     return render_template('feedback.html')
@@ -1478,40 +1079,21 @@ def notifications():
         with conn.cursor() as cursor:
             cursor.execute('SELECT * FROM notifications WHERE user_id = %s ORDER BY created_at DESC', (session['user_id'],))
             notes = cursor.fetchall()
-            cursor.execute('UPDATE notifications SET is_read = TRUE WHERE user_id = %s', (session['user_id'],))
+            notification_service.mark_all_read(cursor, session['user_id'])
         conn.commit()
     finally:
         conn.close()
+    dashboard_panels.invalidate(session['user_id'])
+    g.unread_notifications = 0
     return render_template('notifications.html', notifications=notes)
 
-def send_weekly_progress_emails():
-    conn = get_db()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute('SELECT id, email, name FROM users')
-            users = cursor.fetchall()
-            for user in users:
-                cursor.execute('SELECT * FROM career_progress WHERE user_id = %s', (user['id'],))
-                progress = cursor.fetchall()
-                # Compose email body
-                body = f"Hello {user['name']},\n\nHere is your career progress:\n"
-                for p in progress:
-                    body += f"- {p['milestone']}: {p['status']}\n"
-                # Send email
-                msg = MIMEText(body)
-                msg['Subject'] = 'Your Weekly Career Progress'
-                msg['From'] = 'your_email@example.com'
-                msg['To'] = user['email']
-                with smtplib.SMTP('smtp.example.com', 587) as server:
-                    server.starttls()
-                    server.login('your_email@example.com', 'your_password')
-                    server.send_message(msg)
-    finally:
-        conn.close()
-
-scheduler = BackgroundScheduler()
-scheduler.add_job(send_weekly_progress_emails, 'interval', weeks=1)
-scheduler.start()
+# Only the elected leader process runs scheduled jobs (see career_guidance_ai.scheduler)
+job_scheduler.start_embedded()
+# Build the autocomplete index in the background so the first keystroke is fast.
+# A preloading master builds it in run.warm_up() instead: a thread still running
+# at the fork could leave the index lock held in every worker.
+if SCHEDULER_START != 'post_fork':
+    threading.Thread(target=autocomplete.get_index, daemon=True).start()
 
 @app.route('/remove_progress/<int:progress_id>', methods=['POST'])
 def remove_progress(progress_id):
@@ -1524,6 +1106,7 @@ def remove_progress(progress_id):
         conn.commit()
     finally:
         conn.close()
+    dashboard_panels.invalidate(session['user_id'])
     flash('Milestone removed.', 'success')
     return redirect(url_for('track_progress'))
 
@@ -1540,6 +1123,7 @@ def delete_career_progress():
         conn.commit()
     finally:
         conn.close()
+    dashboard_panels.invalidate(user_id)
     flash('Career plan deleted.', 'success')
     return redirect(url_for('track_progress'))
 
@@ -1547,6 +1131,41 @@ def delete_career_progress():
 def uploaded_file(filename):
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
 
+@app.route('/media/<filename>')
+def media_file(filename):
+    # Objects of the local storage backend (STORAGE_BACKEND=local); names are content-hashed
+    response = send_from_directory(LOCAL_STORAGE_DIR, filename, max_age=storage.CACHE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/thumbnails/<int:size>/<filename>')
+def profile_thumbnail(size, filename):
+    if size not in storage.THUMBNAIL_SIZES or storage.is_thumbnail(filename):
+        abort(404)
+    thumb = storage.known_thumbnail(filename, size)
+    if thumb is None:
+        # Only pictures someone actually uses get derivatives made on demand
+        conn = get_db()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1 FROM users WHERE profile_pic = %s LIMIT 1', (filename,))
+                in_use = cursor.fetchone() is not None
+        finally:
+            conn.close()
+        if not in_use:
+            abort(404)
+        try:
+            thumb = storage.ensure_thumbnail(filename, size)
+        except storage.StorageError:
+            abort(404)
+    # The target never changes for this URL, so browsers cache the redirect too
+    response = redirect(storage.public_url(thumb), code=301)
+    response.cache_control.public = True
+    response.cache_control.max_age = storage.CACHE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
 @app.route('/profile', methods=['GET', 'POST'])
 def profile():
     if 'user_id' not in session:
@@ -1558,6 +1177,7 @@ def profile():
         linkedin = request.form.get('linkedin')
         file = request.files.get('profile_pic')
         profile_pic_filename = None
+        old_pic = None
         
         if file and file.filename and allowed_image(file.filename):
             # Get old profile pic to delete
@@ -1570,30 +1190,12 @@ def profile():
             finally:
                 conn.close()
             
-            ext = file.filename.rsplit('.', 1)[1].lower()
-            profile_pic_filename = f"{user_id}_{uuid.uuid4().hex}.{ext}"
-            
-            # Upload to Supabase Storage
+            # Downscaled to WebP and uploaded over the storage client's pooled session
             try:
-                file_data = file.read()
-                storage_url = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{profile_pic_filename}"
-                
-                headers = {
-                    'Authorization': f'Bearer {SUPABASE_SERVICE_ROLE_KEY}',
-                    'Content-Type': f'image/{ext}'
-                }
-                
-                response = requests.post(storage_url, data=file_data, headers=headers)
-                
-                if response.status_code not in [200, 201]:
-                    flash(f'Upload failed: {response.text}', 'danger')
-                    return redirect(url_for('profile', edit=1))
-                
-                # Delete old image from Supabase if exists
-                if old_pic:
-                    delete_url = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{old_pic}"
-                    requests.delete(delete_url, headers={'Authorization': f'Bearer {SUPABASE_SERVICE_ROLE_KEY}'})
-                    
+                profile_pic_filename = storage.upload_image(str(user_id), file.read())
+            except storage.StorageError as e:
+                flash(f'Upload failed: {str(e)}', 'danger')
+                return redirect(url_for('profile', edit=1))
             except Exception as e:
                 flash(f'Upload error: {str(e)}', 'danger')
                 return redirect(url_for('profile', edit=1))
@@ -1611,8 +1213,15 @@ def profile():
         finally:
             conn.close()
         
+        rankings.renamed(user_id, name)
+        # The replaced image is deleted in the background once the new one is saved
+        if profile_pic_filename and old_pic and old_pic != profile_pic_filename:
+            storage.delete_later(old_pic)
+        
         # Update session name
         session['user_name'] = name
+        dashboard_panels.invalidate(user_id)
+        pdf_reports.forget_user(user_id)
         
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('profile'))
@@ -1664,8 +1273,9 @@ def add_project():
     conn = get_db()
     try:
         with conn.cursor() as cursor:
-            cursor.execute('INSERT INTO projects (user_id, title, description, skills, link) VALUES (%s, %s, %s, %s, %s)',
+            cursor.execute('INSERT INTO projects (user_id, title, description, skills, link) VALUES (%s, %s, %s, %s, %s) RETURNING id',
                 (user_id, title, description, skills, link))
+            gamification.emit(user_id, 'project_added', cursor.fetchone()['id'], cursor=cursor)
         conn.commit()
     finally:
         conn.close()
@@ -1722,8 +1332,9 @@ def add_project_from_idea():
     conn = get_db()
     try:
         with conn.cursor() as cursor:
-            cursor.execute('INSERT INTO projects (user_id, title, description, skills, link) VALUES (%s, %s, %s, %s, %s)',
+            cursor.execute('INSERT INTO projects (user_id, title, description, skills, link) VALUES (%s, %s, %s, %s, %s) RETURNING id',
                 (user_id, title, description, skills, link))
+            gamification.emit(user_id, 'project_added', cursor.fetchone()['id'], cursor=cursor)
         conn.commit()
     finally:
         conn.close()
@@ -1827,6 +1438,24 @@ def admin_users():
     conn.close()
     return render_template('admin_users.html', users=users)
 
+@app.route('/admin_export_reports')
+def admin_export_reports():
+    if not session.get('admin_loggedin'):
+        return redirect(url_for('admin_login'))
+    semester = request.args.get('semester', type=int)
+    branch = request.args.get('branch', '').strip() or None
+    cohort = report_export.load_cohort(semester, branch)
+    if not any(inputs for _, inputs in cohort):
+        flash('No students in that cohort have a resume and quiz result yet.', 'warning')
+        return redirect(url_for('admin_users'))
+    filename = '_'.join(['career_reports'] + ([f'sem{semester}'] if semester else []) + ([branch] if branch else []))
+    filename = secure_filename(filename) + '.zip'
+    # Snapshots are built and PDFs rendered batch by batch inside the stream, on a few threads
+    # (never forked from this worker); manifest.csv ends with the export's duration and rate
+    stream = report_export.stream_cohort_zip(cohort, progress=report_export.log_progress)
+    return app.response_class(stream_with_context(stream), mimetype='application/zip',
+                              headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
 @app.route('/admin_delete_user/<int:user_id>', methods=['POST'])
 def admin_delete_user(user_id):
     if not session.get('admin_loggedin'):
@@ -1836,6 +1465,8 @@ def admin_delete_user(user_id):
         cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
     conn.commit()
     conn.close()
+    rankings.removed(user_id)
+    pdf_reports.forget_user(user_id)
     flash('User deleted.', 'info')
     return redirect(url_for('admin_users'))
 
@@ -1921,6 +1552,7 @@ def admin_add_career():
             (title, description, required_skills, category, salary_range, courses, path))
     conn.commit()
     conn.close()
+    scoring.invalidate()
     flash('Career added.', 'success')
     return redirect(url_for('admin_careers'))
 
@@ -1941,6 +1573,7 @@ def admin_edit_career(career_id):
             (title, description, required_skills, category, salary_range, courses, path, career_id))
     conn.commit()
     conn.close()
+    scoring.invalidate()
     flash('Career updated.', 'success')
     return redirect(url_for('admin_careers'))
 
@@ -1953,6 +1586,7 @@ def admin_delete_career(career_id):
         cursor.execute('DELETE FROM careers WHERE id = %s', (career_id,))
     conn.commit()
     conn.close()
+    scoring.invalidate()
     flash('Career deleted.', 'info')
     return redirect(url_for('admin_careers'))
 
@@ -2052,177 +1686,124 @@ def admin_delete_mentor(mentor_id):
     flash('Mentor deleted successfully!', 'success')
     return redirect(url_for('manage_mentors'))
 
-def award_badge(user_id, badge_name):
-    conn = get_db()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute('SELECT id FROM badges WHERE name = %s', (badge_name,))
-            badge = cursor.fetchone()
-            if not badge:
-                return
-            badge_id = badge['id']
-            cursor.execute('SELECT * FROM user_badges WHERE user_id = %s AND badge_id = %s', (user_id, badge_id))
-            if not cursor.fetchone():
-                cursor.execute('INSERT INTO user_badges (user_id, badge_id) VALUES (%s, %s)', (user_id, badge_id))
-        conn.commit()
-    finally:
-        conn.close()
-
-def add_points(user_id, points):
-    conn = get_db()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute('UPDATE users SET points = points + %s WHERE id = %s', (points, user_id))
-        conn.commit()
-    finally:
-        conn.close()
-
-# Award on resume upload
-# In upload_resume, after successful upload:
-# add_points(user_id, 10); award_badge(user_id, 'First Resume Upload')
-# Award on quiz completion
-# In interest_quiz, after POST:
-# add_points(session['user_id'], 5); award_badge(session['user_id'], 'Quiz Master')
-# Award on milestone completion
-# In update_progress, if new_status == 'Completed':
-# add_points(session['user_id'], 10); award_badge(session['user_id'], 'First Milestone') (if first completed)
-# Award on career plan completion (all milestones completed)
-# In update_progress, after marking last milestone as completed:
-# add_points(session['user_id'], 25); award_badge(session['user_id'], 'Career Plan Finisher')
-# Award on feedback
-# In feedback, after POST:
-# add_points(session['user_id'], 5); award_badge(session['user_id'], 'Feedback Giver')
-# Award on project add
-# In add_project, after successful add:
-# add_points(user_id, 10); award_badge(user_id, 'Project Builder')
-
 @app.route('/leaderboard')
 def leaderboard():
-    conn = get_db()
-    with conn.cursor() as cursor:
-        cursor.execute('SELECT id, name, points FROM users ORDER BY points DESC, id ASC LIMIT 20')
-        users = cursor.fetchall()
-    conn.close()
-    return render_template('leaderboard.html', users=users)
+    # ?semester=N or ?group=G narrow the board; the tabs offer the viewer's own semester and groups
+    user_id = session.get('user_id')
+    tabs = [('Everyone', rankings.EVERYONE)]
+    if user_id:
+        conn = get_db()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT semester, unread_notifications FROM users WHERE id = %s', (user_id,))
+                user = cursor.fetchone()
+                cursor.execute('SELECT g.id, g.name FROM group_members gm JOIN peer_groups g ON g.id = gm.group_id '
+                               'WHERE gm.user_id = %s ORDER BY g.name', (user_id,))
+                groups = cursor.fetchall()
+        finally:
+            conn.close()
+        show_unread_count(user)
+        if user and user['semester']:
+            tabs.append((f"Semester {user['semester']}", ('semester', user['semester'])))
+        tabs += [(group['name'], ('group', group['id'])) for group in groups]
+    semester = request.args.get('semester', type=int)
+    group_id = request.args.get('group', type=int)
+    scope = ('semester', semester) if semester else ('group', group_id) if group_id else rankings.EVERYONE
+    if not rankings.valid_scope(scope):
+        abort(404)
+    users = rankings.top(scope)
+    me = rankings.my_rank(user_id, scope) if user_id else None
+    return render_template('leaderboard.html', users=users, me=me, tabs=tabs, scope=scope,
+                           board_size=len(rankings.get_index(scope)))
+
+def session_job_recommendations(cursor):
+    # Cached in the session; forget_job_recommendations() drops it when the latest resume or quiz changes
+    job_recs = session.get('job_recommendations')
+    if job_recs is None:
+        interest_area, career_ids = recs.recommended_career_ids(cursor, session['user_id'])
+        job_recs = session['job_recommendations'] = {'interest_area': interest_area, 'career_ids': career_ids}
+    return job_recs
+
+def forget_job_recommendations():
+    session.pop('job_recommendations', None)
+
+def _job_listing(cursor, args, recommended_career_ids):
+    """One keyset page of /jobs for the request ``args`` plus the saved ids on that page."""
+    filters = dict(search=args.get('search', ''),
+                   company=args.get('company', '').strip(),
+                   location=args.get('location', '').strip(),
+                   job_type=args.get('job_type', '').strip(),
+                   salary_min=args.get('salary_min', '').strip(),
+                   salary_max=args.get('salary_max', '').strip(),
+                   posted=args.get('posted', '').strip(),
+                   sort=args.get('sort', '').strip())
+    # Recommended careers only, unless there are none (fallback) or show_all is set
+    career_ids = recommended_career_ids if not args.get('show_all') else None
+    jobs, next_cursor = job_search.search_jobs(cursor, career_ids=career_ids, after=args.get('after'), **filters)
+    saved = set()
+    if jobs:
+        # Only the jobs on this page need a saved flag
+        cursor.execute('SELECT job_id FROM saved_jobs WHERE user_id = %s AND job_id = ANY(%s)',
+                       (session['user_id'], [job['id'] for job in jobs]))
+        saved = {row['job_id'] for row in cursor.fetchall()}
+    # Planner estimate, only needed when the first page is rendered
+    total_estimate = None
+    if not args.get('after'):
+        total_estimate = job_search.estimate_count(cursor, career_ids=career_ids, **filters)
+    next_args = None
+    if next_cursor:
+        next_args = args.to_dict()
+        next_args['after'] = next_cursor
+    return {'jobs': jobs, 'saved': saved, 'next_args': next_args, 'total_estimate': total_estimate}
 
 @app.route('/jobs')
 def jobs():
     if 'user_id' not in session:
         return redirect('/login')
     search = request.args.get('search', '')
-    user_id = session['user_id']
-    # New filters
-    company = request.args.get('company', '').strip()
-    location = request.args.get('location', '').strip()
-    job_type = request.args.get('job_type', '').strip()
-    salary_min = request.args.get('salary_min', '').strip()
-    salary_max = request.args.get('salary_max', '').strip()
-    posted = request.args.get('posted', '').strip()
-    sort = request.args.get('sort', '').strip()
     show_all = request.args.get('show_all')
+    # Filter options with job counts, cached until the jobs table changes
+    facets = job_facets.get_facets()
     conn = get_db()
-    with conn.cursor() as cursor:
-        # Fetch filter options
-        cursor.execute("SELECT DISTINCT company FROM jobs WHERE company IS NOT NULL AND company != '' ORDER BY company ASC")
-        company_options = [row['company'] for row in cursor.fetchall()]
-        cursor.execute("SELECT DISTINCT location FROM jobs WHERE location IS NOT NULL AND location != '' ORDER BY location ASC")
-        location_options = [row['location'] for row in cursor.fetchall()]
-        cursor.execute("SELECT DISTINCT job_type FROM jobs WHERE job_type IS NOT NULL AND job_type != '' ORDER BY job_type ASC")
-        job_type_options = [row['job_type'] for row in cursor.fetchall()]
-        # Get recommended career IDs based on user's interest area
-        cursor.execute('SELECT id FROM resumes WHERE user_id = %s ORDER BY id DESC LIMIT 1', (user_id,))
-        resume_row = cursor.fetchone()
-        selected_resume_id = resume_row['id'] if resume_row else None
-        interest_area = None
-        if selected_resume_id:
-            cursor.execute('SELECT interest_area FROM interests WHERE user_id = %s AND resume_id = %s ORDER BY id DESC LIMIT 1', (user_id, selected_resume_id))
-            interest_row = cursor.fetchone()
-            if interest_row:
-                interest_area = interest_row['interest_area']
-        recommended_career_ids = []
-        if interest_area:
-            cursor.execute('SELECT id FROM careers WHERE category = %s', (interest_area,))
-            recommended_career_ids = [row['id'] for row in cursor.fetchall()]
-        # DEBUG: Show interest_area and recommended_career_ids
-        flash(f"Interest area: {interest_area}, Recommended career IDs: {recommended_career_ids}", "info")
-        jobs = []
-        saved = set()
-        if recommended_career_ids and not show_all:
-            # Build dynamic SQL with correct IN clause
-            placeholders = ','.join(['%s'] * len(recommended_career_ids))
-            sql = f'SELECT * FROM jobs WHERE career_id IN ({placeholders})'
-            params = recommended_career_ids[:]
-            if search:
-                sql += ' AND (title LIKE %s OR company LIKE %s OR location LIKE %s)'
-                params += [f'%{search}%', f'%{search}%', f'%{search}%']
-            if company:
-                sql += ' AND company LIKE %s'
-                params.append(f'%{company}%')
-            if location:
-                sql += ' AND location LIKE %s'
-                params.append(f'%{location}%')
-            if job_type:
-                sql += ' AND job_type = %s'
-                params.append(job_type)
-            if salary_min:
-                sql += ' AND salary >= %s'
-                params.append(salary_min)
-            if salary_max:
-                sql += ' AND salary <= %s'
-                params.append(salary_max)
-            if posted:
-                sql += " AND posted_at >= NOW() - INTERVAL '1 day' * %s"
-                params.append(posted)
-            # Sorting
-            if sort == 'newest':
-                sql += ' ORDER BY posted_at DESC'
-            elif sort == 'company':
-                sql += ' ORDER BY company ASC'
-            else:
-                sql += ' ORDER BY posted_at DESC'
-            cursor.execute(sql, tuple(params))
-            jobs = cursor.fetchall()
-            cursor.execute('SELECT job_id FROM saved_jobs WHERE user_id = %s', (user_id,))
-            saved = {row['job_id'] for row in cursor.fetchall()}
-        else:
-            # Show all jobs if no recommended careers (fallback) or show_all is set
-            sql = 'SELECT * FROM jobs WHERE 1=1'
-            params = []
-            if search:
-                sql += ' AND (title LIKE %s OR company LIKE %s OR location LIKE %s)'
-                params += [f'%{search}%', f'%{search}%', f'%{search}%']
-            if company:
-                sql += ' AND company LIKE %s'
-                params.append(f'%{company}%')
-            if location:
-                sql += ' AND location LIKE %s'
-                params.append(f'%{location}%')
-            if job_type:
-                sql += ' AND job_type = %s'
-                params.append(job_type)
-            if salary_min:
-                sql += ' AND salary >= %s'
-                params.append(salary_min)
-            if salary_max:
-                sql += ' AND salary <= %s'
-                params.append(salary_max)
-            if posted:
-                sql += " AND posted_at >= NOW() - INTERVAL '1 day' * %s"
-                params.append(posted)
-            # Sorting
-            if sort == 'newest':
-                sql += ' ORDER BY posted_at DESC'
-            elif sort == 'company':
-                sql += ' ORDER BY company ASC'
-            else:
-                sql += ' ORDER BY posted_at DESC'
-            cursor.execute(sql, tuple(params))
-            jobs = cursor.fetchall()
-            cursor.execute('SELECT job_id FROM saved_jobs WHERE user_id = %s', (user_id,))
-            saved = {row['job_id'] for row in cursor.fetchall()}
-    conn.close()
-    return render_template('jobs.html', jobs=jobs, saved=saved, search=search, recommended=(len(jobs) > 0 and not show_all and bool(recommended_career_ids)),
-                           company_options=company_options, location_options=location_options, job_type_options=job_type_options)
+    try:
+        with conn.cursor() as cursor:
+            job_recs = session_job_recommendations(cursor)
+            interest_area, recommended_career_ids = job_recs['interest_area'], job_recs['career_ids']
+            # DEBUG: Show interest_area and recommended_career_ids
+            flash(f"Interest area: {interest_area}, Recommended career IDs: {recommended_career_ids}", "info")
+            listing = _job_listing(cursor, request.args, recommended_career_ids)
+    finally:
+        conn.close()
+    jobs = listing['jobs']
+    next_args = listing['next_args']
+    return render_template('jobs.html', jobs=jobs, saved=listing['saved'], search=search, recommended=(len(jobs) > 0 and not show_all and bool(recommended_career_ids)),
+                           company_options=facets['company'], location_options=facets['location'], job_type_options=facets['job_type'],
+                           total_estimate=listing['total_estimate'],
+                           next_url=url_for('jobs', **next_args) if next_args else None,
+                           next_page_url=url_for('jobs_page', **next_args) if next_args else None)
+
+@app.route('/jobs/page')
+def jobs_page():
+    """Next page of /jobs as JSON for infinite scroll; pass the same args plus ``after``."""
+    if 'user_id' not in session:
+        return jsonify({'error': 'login required'}), 401
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            job_recs = session_job_recommendations(cursor)
+            listing = _job_listing(cursor, request.args, job_recs['career_ids'])
+    finally:
+        conn.close()
+    jobs, saved, next_args = listing['jobs'], listing['saved'], listing['next_args']
+    return jsonify({
+        'jobs': [{'id': job['id'], 'title': job['title'], 'company': job['company'],
+                  'location': job['location'], 'job_type': job['job_type'], 'salary': job['salary'],
+                  'url': job['url'], 'posted_at': job['posted_at'], 'saved': job['id'] in saved}
+                 for job in jobs],
+        'html': render_template('job_cards.html', jobs=jobs, saved=saved),
+        'next_url': url_for('jobs_page', **next_args) if next_args else None,
+        'total_estimate': listing['total_estimate'],
+    })
 
 @app.route('/save_job/<int:job_id>', methods=['POST'])
 def save_job(job_id):
@@ -2358,6 +1939,7 @@ def edit_resume_builder(resume_id):
                 cursor.execute('UPDATE resumes_builder SET title=%s, summary=%s, education=%s, experience=%s, skills=%s, projects=%s, certifications=%s, contact_info=%s WHERE id=%s AND user_id=%s',
                     (title, summary, education, experience, skills, projects, certifications, contact_info, resume_id, session['user_id']))
                 conn.commit()
+                pdf_reports.forget_user(session['user_id'])
                 flash('Resume updated successfully!', 'success')
                 return redirect(url_for('my_resumes'))
     finally:
@@ -2374,6 +1956,7 @@ def delete_resume_builder(resume_id):
         conn.commit()
     finally:
         conn.close()
+    pdf_reports.forget_user(session['user_id'])
     flash('Resume deleted.', 'info')
     return redirect(url_for('my_resumes'))
 
@@ -2390,64 +1973,8 @@ def download_resume_builder(resume_id):
                 return redirect(url_for('my_resumes'))
     finally:
         conn.close()
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    y = height - 50
-    min_y = 60
-    font_main = 11
-    font_header = 13
-    font_title = 18
-    line_gap = 14
-    section_gap = 8
-    # Title
-    p.setFont('Helvetica-Bold', font_title)
-    p.drawString(50, y, resume['title'])
-    y -= 30
-    # Draw a line under the title
-    p.setLineWidth(1)
-    p.line(50, y, width - 50, y)
-    y -= 20
-    # Sections
-    def draw_section(header, content):
-        nonlocal y
-        p.setFont('Helvetica-Bold', font_header)
-        if y < min_y:
-            p.showPage()
-            y = height - 50
-            p.setFont('Helvetica-Bold', font_header)
-        p.drawString(50, y, header)
-        y -= 18
-        p.setFont('Helvetica', font_main)
-        for line in (content or '').replace('\r', '').split('\n'):
-            line = line.strip()
-            if line:
-                if y < min_y:
-                    p.showPage()
-                    y = height - 50
-                    p.setFont('Helvetica', font_main)
-                p.drawString(60, y, line)
-                y -= line_gap
-        y -= section_gap
-        # Draw a line after each section
-        if y > min_y:
-            p.setLineWidth(0.5)
-            p.line(50, y, width - 50, y)
-            y -= 16
-        else:
-            p.showPage()
-            y = height - 50
-    draw_section("Summary:", resume['summary'])
-    draw_section("Education:", resume['education'])
-    draw_section("Experience:", resume['experience'])
-    draw_section("Skills:", resume['skills'])
-    draw_section("Projects:", resume['projects'])
-    draw_section("Certifications:", resume['certifications'])
-    draw_section("Contact Info:", resume['contact_info'])
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return send_file(buffer, as_attachment=True, download_name=f"{resume['title']}.pdf", mimetype='application/pdf')
+    return pdf_reports.send_pdf('built_resume', pdf_reports.resume_source(resume), f"{resume['title']}.pdf",
+                                session['user_id'])
 
 # ------------------- Peer Groups Backend -------------------
 @app.route('/peer_groups')
@@ -2455,16 +1982,17 @@ def peer_groups():
     if 'user_id' not in session:
         return redirect('/login')
     user_id = session['user_id']
+    search = request.args.get('q', '').strip()
     conn = get_db()
     try:
         with conn.cursor() as cursor:
-            cursor.execute('SELECT * FROM peer_groups')
-            groups = cursor.fetchall()
-            cursor.execute('SELECT group_id FROM group_members WHERE user_id = %s', (user_id,))
-            user_groups = [row['group_id'] for row in cursor.fetchall()]
+            groups, next_after = groups_service.list_groups(cursor, user_id, search=search,
+                                                            after=request.args.get('after', type=int))
     finally:
         conn.close()
-    return render_template('peer_groups.html', groups=groups, user_groups=user_groups)
+    next_url = url_for('peer_groups', q=search or None, after=next_after) if next_after else None
+    return render_template('peer_groups.html', groups=groups, search=search, next_url=next_url,
+                           paged=bool(request.args.get('after')))
 
 @app.route('/create_group', methods=['GET', 'POST'])
 def create_group():
@@ -2503,6 +2031,7 @@ def join_group(group_id):
             if not cursor.fetchone():
                 cursor.execute('INSERT INTO group_members (group_id, user_id) VALUES (%s, %s)', (group_id, user_id))
                 conn.commit()
+                rankings.group_changed(group_id)
                 flash('Joined group!', 'success')
             else:
                 flash('Already a member of this group.', 'info')
@@ -2520,6 +2049,7 @@ def leave_group(group_id):
         with conn.cursor() as cursor:
             cursor.execute('DELETE FROM group_members WHERE group_id = %s AND user_id = %s', (group_id, user_id))
             conn.commit()
+            rankings.group_changed(group_id)
             flash('Left group.', 'info')
     finally:
         conn.close()
@@ -2533,18 +2063,17 @@ def group_detail(group_id):
     conn = get_db()
     try:
         with conn.cursor() as cursor:
-            cursor.execute('SELECT * FROM peer_groups WHERE id = %s', (group_id,))
-            group = cursor.fetchone()
+            group = groups_service.get_group(cursor, group_id, user_id)
             if not group:
                 flash('Group not found.', 'danger')
                 return redirect(url_for('peer_groups'))
-            cursor.execute('SELECT u.id, u.name, u.profile_pic FROM group_members gm JOIN users u ON gm.user_id = u.id WHERE gm.group_id = %s', (group_id,))
-            members = cursor.fetchall()
-            cursor.execute('SELECT * FROM group_members WHERE group_id = %s AND user_id = %s', (group_id, user_id))
-            is_member = cursor.fetchone() is not None
+            members, next_after = groups_service.list_members(cursor, group_id,
+                                                              after=request.args.get('after', type=int))
     finally:
         conn.close()
-    return render_template('group_detail.html', group=group, members=members, is_member=is_member)
+    next_url = url_for('group_detail', group_id=group_id, after=next_after) if next_after else None
+    return render_template('group_detail.html', group=group, members=members, is_member=group['is_member'],
+                           next_url=next_url, paged=bool(request.args.get('after')))
 # ------------------- End Peer Groups Backend -------------------
 
 @app.route('/job/<int:job_id>')
@@ -2566,10 +2095,11 @@ def job_detail(job_id):
         status = app_row.get('status')
         notes = app_row.get('notes')
         applied_at = app_row.get('applied_at')
-    # Salary insight for this job title/location
-    avg_salary = get_average_salary(job['title'], job['location'])
     conn.close()
-    return render_template('job_detail.html', job=job, is_saved=is_saved, status=status, notes=notes, applied_at=applied_at, avg_salary=avg_salary)
+    # Salary insight for this job title/location
+    salary_stats = salary.get_salary_stats(job['title'], job['location'])
+    avg_salary = salary_stats['avg'] if salary_stats else None
+    return render_template('job_detail.html', job=job, is_saved=is_saved, status=status, notes=notes, applied_at=applied_at, avg_salary=avg_salary, salary_stats=salary_stats)
 
 @app.route('/job_alerts', methods=['GET', 'POST'])
 def job_alerts():
@@ -2585,30 +2115,22 @@ def job_alerts():
             flash('Please enter at least one field for the alert.', 'warning')
         else:
             with conn.cursor() as cursor:
-                cursor.execute('INSERT INTO job_alerts (user_id, keyword, company, location) VALUES (%s, %s, %s, %s)', (user_id, keyword, company, location))
-            conn.commit()
+                cursor.execute('INSERT INTO job_alerts (user_id, keyword, company, location) VALUES (%s, %s, %s, %s) RETURNING id', (user_id, keyword, company, location))
+                alert_id = cursor.fetchone()['id']
+                conn.commit()
+                alert_matcher.match_alert(cursor, alert_id)
             flash('Job alert added!', 'success')
     with conn.cursor() as cursor:
+        # Pick up jobs posted since the last match run (from either admin panel)
+        alert_matcher.match_new_jobs(cursor)
         cursor.execute('SELECT * FROM job_alerts WHERE user_id = %s ORDER BY created_at DESC', (user_id,))
         alerts = cursor.fetchall()
-        # Fetch suggested jobs for each alert
-        suggested_jobs_by_alert = {}
-        for alert in alerts:
-            sql = 'SELECT * FROM jobs WHERE 1=1'
-            params = []
-            if alert['keyword']:
-                sql += ' AND title LIKE %s'
-                params.append(f'%{alert["keyword"]}%')
-            if alert['company']:
-                sql += ' AND company LIKE %s'
-                params.append(f'%{alert["company"]}%')
-            if alert['location']:
-                sql += ' AND location LIKE %s'
-                params.append(f'%{alert["location"]}%')
-            sql += ' ORDER BY posted_at DESC LIMIT 5'
-            cursor.execute(sql, tuple(params))
-            jobs = cursor.fetchall()
-            suggested_jobs_by_alert[alert['id']] = {'alert': alert, 'jobs': jobs}
+        # Suggested jobs for every alert come from the precomputed matches
+        matches = alert_matcher.suggestions_for_user(cursor, user_id)
+        suggested_jobs_by_alert = {
+            alert['id']: {'alert': alert, 'jobs': matches.get(alert['id'], [])}
+            for alert in alerts
+        }
     conn.close()
     return render_template('job_alerts.html', alerts=alerts, suggested_jobs_by_alert=suggested_jobs_by_alert)
 
@@ -2625,6 +2147,15 @@ def delete_job_alert(alert_id):
     flash('Job alert deleted.', 'info')
     return redirect(url_for('job_alerts'))
 
+def _autocomplete_response(field, q):
+    """Suggestions from the in-memory index, revalidated by the browser via ETag."""
+    body, etag = autocomplete.get_index().response(field, q)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = 60
+    return response.make_conditional(request)
+
 @app.route('/autocomplete_job_titles')
 def autocomplete_job_titles():
     if 'user_id' not in session:
@@ -2632,42 +2163,19 @@ def autocomplete_job_titles():
     q = request.args.get('q', '').strip()
     if not q:
         return jsonify([])
-    conn = get_db()
-    with conn.cursor() as cursor:
-        cursor.execute('SELECT DISTINCT title FROM jobs WHERE title LIKE %s ORDER BY title LIMIT 10', (f'%{q}%',))
-        titles = [row['title'] for row in cursor.fetchall()]
-    conn.close()
-    return jsonify(titles)
+    return _autocomplete_response('title', q)
 
 @app.route('/autocomplete_companies')
 def autocomplete_companies():
     if 'user_id' not in session:
         return jsonify([])
-    q = request.args.get('q', '').strip()
-    conn = get_db()
-    with conn.cursor() as cursor:
-        if q:
-            cursor.execute('SELECT DISTINCT company FROM jobs WHERE company LIKE %s ORDER BY company LIMIT 10', (f'%{q}%',))
-        else:
-            cursor.execute('SELECT DISTINCT company FROM jobs ORDER BY company LIMIT 10')
-        companies = [row['company'] for row in cursor.fetchall()]
-    conn.close()
-    return jsonify(companies)
+    return _autocomplete_response('company', request.args.get('q', '').strip())
 
 @app.route('/autocomplete_locations')
 def autocomplete_locations():
     if 'user_id' not in session:
         return jsonify([])
-    q = request.args.get('q', '').strip()
-    conn = get_db()
-    with conn.cursor() as cursor:
-        if q:
-            cursor.execute('SELECT DISTINCT location FROM jobs WHERE location LIKE %s ORDER BY location LIMIT 10', (f'%{q}%',))
-        else:
-            cursor.execute('SELECT DISTINCT location FROM jobs ORDER BY location LIMIT 10')
-        locations = [row['location'] for row in cursor.fetchall()]
-    conn.close()
-    return jsonify(locations)
+    return _autocomplete_response('location', request.args.get('q', '').strip())
 
 # Static interview questions and tips for demonstration
 INTERVIEW_QUESTIONS = {
@@ -2909,23 +2417,16 @@ def interview_prep_job(job_id):
         ]
     return render_template('interview_prep.html', career_title=title, questions=questions, tips=tips, job=job)
 
-# Helper for salary insights
+# Helper for salary insights (served from the in-memory salary statistics)
 
 def get_average_salary(title, location=None):
-    conn = get_db()
-    with conn.cursor() as cursor:
-        if location:
-            cursor.execute('SELECT AVG(salary) as avg_salary FROM jobs WHERE title = %s AND location = %s AND salary IS NOT NULL', (title, location))
-            row = cursor.fetchone()
-            if row and row['avg_salary']:
-                conn.close()
-                return int(row['avg_salary'])
-        cursor.execute('SELECT AVG(salary) as avg_salary FROM jobs WHERE title = %s AND salary IS NOT NULL', (title,))
-        row = cursor.fetchone()
-    conn.close()
-    if row and row['avg_salary']:
-        return int(row['avg_salary'])
-    return None
+    return salary.get_average_salary(title, location)
+
+def _jobs_changed():
+    """Drop every in-process cache derived from the jobs table."""
+    salary.invalidate()
+    autocomplete.invalidate()
+    job_facets.invalidate()
 
 @app.route('/admin_jobs', methods=['GET', 'POST'])
 def admin_jobs():
@@ -2941,7 +2442,7 @@ def admin_jobs():
         company = request.form.get('company')
         location = request.form.get('location')
         job_type = request.form.get('job_type')
-        salary = request.form.get('salary')
+        salary_value = request.form.get('salary')
         description = request.form.get('description')
         requirements = request.form.get('requirements')
         url = request.form.get('url')
@@ -2950,8 +2451,10 @@ def admin_jobs():
             cursor.execute('''
                 INSERT INTO jobs (title, company, location, job_type, salary, description, requirements, url, career_id)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (title, company, location, job_type, salary, description, requirements, url, career_id))
-        conn.commit()
+            ''', (title, company, location, job_type, salary_value, description, requirements, url, career_id))
+            conn.commit()
+            alert_matcher.match_new_jobs(cursor)
+        _jobs_changed()
     with conn.cursor() as cursor:
         cursor.execute('SELECT * FROM jobs ORDER BY posted_at DESC')
         jobs = cursor.fetchall()
@@ -2966,7 +2469,7 @@ def admin_edit_job(job_id):
     company = request.form.get('company')
     location = request.form.get('location')
     job_type = request.form.get('job_type')
-    salary = request.form.get('salary')
+    salary_value = request.form.get('salary')
     description = request.form.get('description')
     requirements = request.form.get('requirements')
     url = request.form.get('url')
@@ -2974,9 +2477,11 @@ def admin_edit_job(job_id):
     with conn.cursor() as cursor:
         cursor.execute('''
             UPDATE jobs SET title=%s, company=%s, location=%s, job_type=%s, salary=%s, description=%s, requirements=%s, url=%s WHERE id=%s
-        ''', (title, company, location, job_type, salary, description, requirements, url, job_id))
-    conn.commit()
+        ''', (title, company, location, job_type, salary_value, description, requirements, url, job_id))
+        conn.commit()
+        alert_matcher.rematch_job(cursor, job_id)
     conn.close()
+    _jobs_changed()
     return redirect(url_for('admin_jobs'))
 
 @app.route('/admin_delete_job/<int:job_id>', methods=['POST'])
@@ -2988,6 +2493,7 @@ def admin_delete_job(job_id):
         cursor.execute('DELETE FROM jobs WHERE id = %s', (job_id,))
     conn.commit()
     conn.close()
+    _jobs_changed()
     return redirect(url_for('admin_jobs'))
 
 @app.route('/forgot_password', methods=['GET', 'POST'])
@@ -3030,6 +2536,9 @@ def reset_password(token):
 
 # Simple email sender (configure SMTP as needed)
 def send_email(to, subject, body):
+    import smtplib
+    from email.mime.text import MIMEText
+
     smtp_host = 'smtp.example.com'  # Change to your SMTP server
     smtp_port = 587
     smtp_user = 'your@email.com'
@@ -0,0 +1,5 @@
+"""
+Service layer for the Career Guidance sub-app.
+Each module wraps one concern (scoring, caching, DB access) so app.py
+routes stay thin and the heavy lifting can be reused outside a request.
+"""
@@ -0,0 +1,112 @@
+"""
+In-memory autocomplete for job titles, companies and locations.
+
+Every distinct value is indexed under each of its word starts ("senior data
+engineer" is reachable from "sen", "dat" and "eng") in one sorted array per
+field, so a lookup is a bisect plus a short range scan.  Suggestions are
+ranked by how many jobs carry the value.  Rendered responses are cached with
+an ETag so repeated keystrokes and browser revalidation cost nothing.
+"""
+import hashlib
+import heapq
+import json
+from bisect import bisect_left
+
+from .cache import CachedValue, TTLCache
+from .db import get_db
+
+FIELDS = ('title', 'company', 'location')
+LIMIT = 10
+
+_COUNTS_SQL = '''
+    SELECT title, company, location,
+           GROUPING(title) AS no_title, GROUPING(company) AS no_company,
+           COUNT(*) AS jobs
+    FROM jobs
+    GROUP BY GROUPING SETS ((title), (company), (location))
+'''
+
+
+class PrefixIndex:
+    """Sorted (key, value id) pairs for one field plus per-value job counts."""
+
+    def __init__(self, counts):
+        # Best first: most jobs, then alphabetical
+        self.values = sorted(counts, key=lambda v: (-counts[v], v.lower()))
+        entries = []
+        for vid, value in enumerate(self.values):
+            words = value.lower().split()
+            for i in range(len(words)):
+                entries.append((' '.join(words[i:]), vid))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.ids = [vid for _, vid in entries]
+
+    def suggest(self, prefix, limit=LIMIT):
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return self.values[:limit]
+        start = bisect_left(self.keys, prefix)
+        # Everything >= prefix and < prefix + U+FFFF shares the prefix
+        end = bisect_left(self.keys, prefix + '\uffff', start)
+        # Value ids are already in rank order, so the smallest ids win
+        best = heapq.nsmallest(limit, set(self.ids[start:end]))
+        return [self.values[vid] for vid in best]
+
+
+class AutocompleteIndex:
+    """One PrefixIndex per field, built from a single grouped count query."""
+
+    def __init__(self, rows):
+        counts = {field: {} for field in FIELDS}
+        for row in rows:
+            if not row['no_title']:
+                field = 'title'
+            elif not row['no_company']:
+                field = 'company'
+            else:
+                field = 'location'
+            value = row[field]
+            if value and value.strip():
+                counts[field][value] = row['jobs']
+        self.fields = {field: PrefixIndex(counts[field]) for field in FIELDS}
+        self.version = hashlib.sha1(
+            json.dumps(counts, sort_keys=True).encode()).hexdigest()[:12]
+        self._responses = TTLCache(ttl=300, maxsize=5000)
+
+    def response(self, field, q):
+        """
+        ``(body, etag)`` for the suggestions of ``q`` in ``field``; the JSON
+        body is rendered once per distinct query and index version.
+        """
+        key = (field, ' '.join(q.lower().split()))
+        cached = self._responses.get(key)
+        if cached is None:
+            body = json.dumps(self.fields[field].suggest(q))
+            etag = hashlib.sha1(f'{self.version}:{body}'.encode()).hexdigest()[:16]
+            cached = (body, etag)
+            self._responses.set(key, cached)
+        return cached
+
+
+def _load_index():
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(_COUNTS_SQL)
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    return AutocompleteIndex(rows)
+
+
+_index = CachedValue(_load_index, ttl=300)
+
+
+def get_index():
+    return _index.get()
+
+
+def invalidate():
+    """Call after any write to the ``jobs`` table."""
+    _index.invalidate()
@@ -0,0 +1,70 @@
+"""
+Small in-process caches used by the service modules.
+
+Every gunicorn worker keeps its own copy, so writes made in this process call
+invalidate() immediately while writes made elsewhere (other workers, the main
+app's mirrored admin panel) are picked up once the TTL expires.
+"""
+import threading
+import time
+
+
+class CachedValue:
+    """A single lazily-loaded value with a TTL and explicit invalidation."""
+
+    def __init__(self, loader, ttl=300):
+        self._loader = loader
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+
+    def get(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded_at is None or now - self._loaded_at > self._ttl:
+                self._value = self._loader()
+                self._loaded_at = now
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+            self._loaded_at = None
+
+
+class TTLCache:
+    """Keyed cache where every entry expires ``ttl`` seconds after it was set."""
+
+    def __init__(self, ttl=60, maxsize=10000):
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if time.monotonic() > expires:
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if len(self._data) >= self._maxsize and key not in self._data:
+                # Drop the entry closest to expiry rather than growing unbounded
+                oldest = min(self._data, key=lambda k: self._data[k][1])
+                del self._data[oldest]
+            self._data[key] = (value, time.monotonic() + self._ttl)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,183 @@
+"""
+Career plans: milestone creation and progress tracking.
+
+A plan is the set of ``career_progress`` rows for one (user, career, resume).
+Milestones are inserted in one multi-row statement guarded by a unique index
+on (user_id, career_id, resume_id, milestone), and the progress page gets its
+rows, required skills and the user's latest skills from one joined query.
+
+The index is added by the migration runner (``python -m
+career_guidance_ai.migrate``), which first has to fold duplicate milestones;
+until then start_plan() skips existing milestones with NOT EXISTS instead.
+"""
+import logging
+import threading
+
+from psycopg2.extras import execute_values
+
+from .recommendations import get_course_links_for_skills
+
+log = logging.getLogger(__name__)
+
+_UNIQUE_INDEX = 'career_progress_plan_milestone_uniq'
+
+_schema_ready = False
+_has_unique_index = False
+_schema_lock = threading.Lock()
+
+
+def migrate_unique_milestones(cursor):
+    """
+    Fold duplicate milestones and add the unique index (migration runner only).
+
+    Of each set of duplicates the most advanced copy is kept; the notes of the
+    copies removed are appended to its note so nothing a student wrote is lost.
+    """
+    cursor.execute('SELECT to_regclass(%s) AS idx', (_UNIQUE_INDEX,))
+    if cursor.fetchone()['idx'] is not None:
+        return
+    # No new duplicates between the clean-up and the index build
+    cursor.execute('LOCK TABLE career_progress IN SHARE ROW EXCLUSIVE MODE')
+    cursor.execute('''
+        CREATE TEMPORARY TABLE career_progress_fold ON COMMIT DROP AS
+        SELECT id, FIRST_VALUE(id) OVER plan AS keep_id, ROW_NUMBER() OVER plan AS rn
+        FROM career_progress
+        WINDOW plan AS (
+            PARTITION BY user_id, career_id, resume_id, milestone
+            ORDER BY CASE status WHEN 'Completed' THEN 0
+                                 WHEN 'In Progress' THEN 1 ELSE 2 END, id
+        )
+    ''')
+    cursor.execute('''
+        UPDATE career_progress cp
+        SET note = merged.note
+        FROM (
+            SELECT keep_id, STRING_AGG(note, E'\\n' ORDER BY first_rn) AS note
+            FROM (
+                SELECT f.keep_id, p.note, MIN(f.rn) AS first_rn
+                FROM career_progress_fold f
+                JOIN career_progress p ON p.id = f.id
+                WHERE COALESCE(p.note, '') <> ''
+                GROUP BY f.keep_id, p.note
+            ) notes
+            GROUP BY keep_id
+        ) merged
+        WHERE cp.id = merged.keep_id AND cp.note IS DISTINCT FROM merged.note
+    ''')
+    cursor.execute('DELETE FROM career_progress WHERE id IN (SELECT id FROM career_progress_fold WHERE rn > 1)')
+    if cursor.rowcount:
+        log.info('Folded %d duplicate career_progress rows', cursor.rowcount)
+    cursor.execute(f'''
+        CREATE UNIQUE INDEX IF NOT EXISTS {_UNIQUE_INDEX}
+        ON career_progress (user_id, career_id, resume_id, milestone)
+    ''')
+
+
+def ensure_schema(cursor):
+    """Find out, once per process, whether the unique milestone index exists."""
+    global _schema_ready, _has_unique_index
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        cursor.execute('SELECT to_regclass(%s) AS idx', (_UNIQUE_INDEX,))
+        _has_unique_index = cursor.fetchone()['idx'] is not None
+        if not _has_unique_index:
+            log.warning('%s is missing; run python -m career_guidance_ai.migrate', _UNIQUE_INDEX)
+        _schema_ready = True
+
+
+def default_milestones(title):
+    # Fallback when the career has no rows in career_milestones
+    title = title.lower()
+    if 'developer' in title:
+        return [
+            'Learn Programming Language',
+            'Complete Git & GitHub Course',
+            'Build Portfolio Website',
+            'Contribute to Open Source',
+            'Do Internship',
+            'Apply for Developer Jobs'
+        ]
+    if 'data analyst' in title:
+        return [
+            'Learn Excel & SQL',
+            'Master Data Visualization Tools',
+            'Do Case Study Projects',
+            'Internship in Analytics',
+            'Prepare Resume',
+            'Apply for Analyst Roles'
+        ]
+    return [
+        'Research the Career Path',
+        'Take Online Courses',
+        'Build Projects',
+        'Get Mentorship',
+        'Internship or Freelancing',
+        'Apply for Jobs'
+    ]
+
+
+def start_plan(cursor, user_id, career, resume_id):
+    """
+    Create the plan's missing milestones in one INSERT and commit.
+    Returns the number of milestones added.
+    """
+    ensure_schema(cursor)
+    cursor.execute('SELECT milestone FROM career_milestones WHERE career_id = %s ORDER BY id', (career['id'],))
+    milestones = [row['milestone'] for row in cursor.fetchall()]
+    if not milestones:
+        milestones = default_milestones(career['title'] or '')
+    rows = [(user_id, career['id'], m, 'Not Started', resume_id, None) for m in dict.fromkeys(milestones)]
+    if _has_unique_index:
+        execute_values(cursor, '''
+            INSERT INTO career_progress (user_id, career_id, milestone, status, resume_id, note)
+            VALUES %s
+            ON CONFLICT (user_id, career_id, resume_id, milestone) DO NOTHING
+        ''', rows)
+    else:
+        execute_values(cursor, '''
+            INSERT INTO career_progress (user_id, career_id, milestone, status, resume_id, note)
+            SELECT * FROM (VALUES %s) AS v (user_id, career_id, milestone, status, resume_id, note)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM career_progress p
+                WHERE p.user_id = v.user_id AND p.career_id = v.career_id
+                  AND p.resume_id = v.resume_id AND p.milestone = v.milestone
+            )
+        ''', rows, template='(%s, %s, %s, %s, %s::int, %s::text)')
+    added = cursor.rowcount
+    cursor.connection.commit()
+    return added
+
+
+def plan_progress(cursor, user_id):
+    """
+    Every progress row of the user, ordered by career title, each with
+    ``course_links`` for the missing skill its milestone mentions (if any).
+    """
+    cursor.execute('''
+        SELECT cp.*, c.title, c.required_skills,
+               (SELECT skills FROM resumes WHERE user_id = %(user_id)s
+                ORDER BY id DESC LIMIT 1) AS user_skills
+        FROM career_progress cp
+        JOIN careers c ON cp.career_id = c.id
+        WHERE cp.user_id = %(user_id)s
+        ORDER BY c.title, cp.id
+    ''', {'user_id': user_id})
+    progress = cursor.fetchall()
+    if not progress:
+        return progress
+    user_skills = progress[0]['user_skills']
+    user_skills = {s.strip().lower() for s in user_skills.split(',')} if user_skills else set()
+    # career_id -> missing skills, in required_skills order
+    missing_by_career = {}
+    for item in progress:
+        if item['career_id'] not in missing_by_career:
+            required = [s.strip().lower() for s in item['required_skills'].split(',')] if item['required_skills'] else []
+            missing_by_career[item['career_id']] = [s for s in required if s not in user_skills]
+    for item in progress:
+        milestone = (item['milestone'] or '').lower()
+        skill_match = next((s for s in missing_by_career[item['career_id']] if s in milestone), None)
+        item['course_links'] = get_course_links_for_skills([skill_match]) if skill_match else []
+    return progress
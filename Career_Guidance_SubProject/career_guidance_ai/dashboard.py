@@ -0,0 +1,83 @@
+"""
+Career dashboard panels.
+
+Every panel (user, unread notifications, feedback count, last completed
+milestone, last resume and per-plan progress) comes back from one SQL
+statement; plan progress is a single grouped count instead of two queries
+per plan.  Results are cached per user for a few seconds and dropped by the
+routes that change what the dashboard shows.
+"""
+from .cache import TTLCache
+from .db import get_db
+
+_DASHBOARD_SQL = '''
+    SELECT
+        (SELECT row_to_json(u) FROM (
+            SELECT name, profile_pic, unread_notifications FROM users WHERE id = %(user_id)s
+        ) u) AS user_info,
+        (SELECT COALESCE(json_agg(n ORDER BY n.id), '[]'::json) FROM (
+            SELECT * FROM notifications WHERE user_id = %(user_id)s AND is_read = FALSE
+        ) n) AS notifications,
+        (SELECT COUNT(*) FROM feedback WHERE user_id = %(user_id)s) AS feedback_count,
+        (SELECT row_to_json(m) FROM (
+            SELECT cp.milestone, c.title, cp.status, cp.id
+            FROM career_progress cp JOIN careers c ON cp.career_id = c.id
+            WHERE cp.user_id = %(user_id)s AND cp.status = 'Completed'
+            ORDER BY cp.id DESC LIMIT 1
+        ) m) AS last_milestone,
+        (SELECT row_to_json(r) FROM (
+            SELECT id, skills, education, experience
+            FROM resumes WHERE user_id = %(user_id)s ORDER BY id DESC LIMIT 1
+        ) r) AS last_resume,
+        (SELECT COALESCE(json_agg(p ORDER BY p.started), '[]'::json) FROM (
+            SELECT c.title AS career_title,
+                   COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE cp.status = 'Completed') AS completed,
+                   MIN(cp.id) AS started
+            FROM career_progress cp JOIN careers c ON cp.career_id = c.id
+            WHERE cp.user_id = %(user_id)s
+            GROUP BY cp.career_id, c.title
+        ) p) AS progress
+'''
+
+_cache = TTLCache(ttl=30)
+
+
+def _load(user_id):
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(_DASHBOARD_SQL, {'user_id': user_id})
+            row = cursor.fetchone()
+    finally:
+        conn.close()
+    progress_summaries = []
+    for plan in row['progress']:
+        total, completed = plan['total'], plan['completed']
+        progress_summaries.append({
+            'career_title': plan['career_title'],
+            'percent': round((completed / total * 100), 1) if total > 0 else 0,
+            'completed': completed,
+            'total': total,
+        })
+    return {
+        'user': row['user_info'],
+        'notifications': row['notifications'],
+        'feedback_count': row['feedback_count'],
+        'last_milestone': row['last_milestone'],
+        'last_resume': row['last_resume'],
+        'progress_summaries': progress_summaries,
+    }
+
+
+def get_dashboard(user_id):
+    data = _cache.get(user_id)
+    if data is None:
+        data = _load(user_id)
+        _cache.set(user_id, data)
+    return data
+
+
+def invalidate(user_id):
+    """Call after a write to anything the dashboard shows for ``user_id``."""
+    _cache.pop(user_id)
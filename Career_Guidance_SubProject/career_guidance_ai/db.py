@@ -0,0 +1,15 @@
+"""
+Database connection helper shared by app.py and the service modules.
+"""
+import psycopg2
+import psycopg2.extras
+from config import DATABASE_URL
+
+
+def get_db():
+    return psycopg2.connect(
+        DATABASE_URL,
+        sslmode='require',
+        cursor_factory=psycopg2.extras.RealDictCursor,
+        options='-c client_encoding=UTF8'
+    )
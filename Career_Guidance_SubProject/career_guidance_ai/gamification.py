@@ -0,0 +1,248 @@
+"""
+Points and badges, awarded from an event queue.
+
+Request handlers only emit() an event such as ``milestone_completed``; it is
+one INSERT into ``gamification_events`` that can join the caller's own
+transaction.  Events are unique per (user, event, ref), where ref names the
+thing that triggered it (the milestone, project, resume...), so completing
+the same milestone twice earns its points once.
+
+process_pending() applies a batch of queued events in one transaction: the
+points of every event are summed per user into one UPDATE, badges are
+inserted with ON CONFLICT DO NOTHING (badge names are resolved from a cached
+name -> id map) and the events are marked processed.  A worker thread in each
+web process runs it shortly after an emit, off the request path, and the
+scheduler job catches anything a process left behind.  Rows are claimed with
+SKIP LOCKED, so any number of processors can run at once.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from psycopg2.extras import execute_values
+
+from . import leaderboard, notifications
+from .cache import CachedValue
+from .db import get_db
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# Seconds the worker waits after a wake-up, so the emitting transaction has
+# committed and events of the same burst go into one batch
+FLUSH_DELAY = 1.0
+
+# event -> (points, badge name or None)
+RULES = {
+    'resume_uploaded': (10, 'First Resume Upload'),
+    'quiz_completed': (5, 'Quiz Master'),
+    'milestone_completed': (10, 'First Milestone'),
+    'career_plan_completed': (25, 'Career Plan Finisher'),
+    'feedback_submitted': (5, 'Feedback Giver'),
+    'project_added': (10, 'Project Builder'),
+}
+
+_USER_BADGE_INDEX = 'user_badges_user_badge_uniq'
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema():
+    """
+    Create the event queue and badge tables, and make awards unique per user
+    and badge.  Runs on its own connection, so emit(cursor=...) never commits
+    the caller's transaction.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = get_db()
+        try:
+            with conn.cursor() as cursor:
+                # Other processes wait here rather than racing on CREATE
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('gamification_schema'))")
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS gamification_events (
+                        id           BIGSERIAL PRIMARY KEY,
+                        user_id      INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                        event        VARCHAR(50) NOT NULL,
+                        ref          VARCHAR(100) NOT NULL DEFAULT '',
+                        created_at   TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                        processed_at TIMESTAMP,
+                        UNIQUE (user_id, event, ref)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS gamification_events_pending_idx
+                    ON gamification_events (id) WHERE processed_at IS NULL
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS badges (
+                        id          SERIAL PRIMARY KEY,
+                        name        VARCHAR(100) UNIQUE NOT NULL,
+                        description TEXT,
+                        icon        VARCHAR(50)
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS user_badges (
+                        id         SERIAL PRIMARY KEY,
+                        user_id    INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+                        badge_id   INTEGER NOT NULL REFERENCES badges(id) ON DELETE CASCADE,
+                        awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                for name in sorted({badge for _, badge in RULES.values() if badge}):
+                    cursor.execute('INSERT INTO badges (name) SELECT %s WHERE NOT EXISTS (SELECT 1 FROM badges WHERE name = %s)',
+                                   (name, name))
+                cursor.execute('SELECT to_regclass(%s) AS idx', (_USER_BADGE_INDEX,))
+                if cursor.fetchone()['idx'] is None:
+                    # Earlier check-then-insert awards could race into duplicates
+                    cursor.execute('''
+                        DELETE FROM user_badges a USING user_badges b
+                        WHERE a.user_id = b.user_id AND a.badge_id = b.badge_id AND a.ctid > b.ctid
+                    ''')
+                    cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {_USER_BADGE_INDEX} ON user_badges (user_id, badge_id)')
+            conn.commit()
+        finally:
+            conn.close()
+        _schema_ready = True
+
+
+def _load_badges():
+    ensure_schema()
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT id, name FROM badges')
+            return {row['name']: row['id'] for row in cursor.fetchall()}
+    finally:
+        conn.close()
+
+
+_badges = CachedValue(_load_badges, ttl=3600)
+
+
+def badge_ids():
+    """``{badge name: id}``, cached."""
+    return _badges.get()
+
+
+def emit(user_id, event, ref='', cursor=None):
+    """
+    Queue ``event`` for ``user_id``.  With ``cursor`` the insert joins the
+    caller's transaction (the caller commits); otherwise it commits on its
+    own connection.  Repeats of the same (user, event, ref) are ignored.
+    """
+    if event not in RULES:
+        raise ValueError(f'Unknown gamification event: {event}')
+    sql = '''
+        INSERT INTO gamification_events (user_id, event, ref) VALUES (%s, %s, %s)
+        ON CONFLICT (user_id, event, ref) DO NOTHING
+    '''
+    ensure_schema()
+    if cursor is not None:
+        cursor.execute(sql, (user_id, event, str(ref)))
+    else:
+        conn = get_db()
+        try:
+            with conn.cursor() as own_cursor:
+                own_cursor.execute(sql, (user_id, event, str(ref)))
+            conn.commit()
+        finally:
+            conn.close()
+    _wake()
+
+
+def process_pending(limit=BATCH_SIZE):
+    """Apply up to ``limit`` queued events in one transaction; returns how many."""
+    ensure_schema()
+    badges_by_name = badge_ids()
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('''
+                SELECT id, user_id, event FROM gamification_events
+                WHERE processed_at IS NULL
+                ORDER BY id LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ''', (limit,))
+            events = cursor.fetchall()
+            if not events:
+                conn.commit()
+                return 0
+            points = Counter()
+            awards = set()
+            for event in events:
+                event_points, badge = RULES.get(event['event'], (0, None))
+                points[event['user_id']] += event_points
+                if badge in badges_by_name:
+                    awards.add((event['user_id'], badges_by_name[badge]))
+            new_badges = []
+            if awards:
+                new_badges = execute_values(cursor, '''
+                    INSERT INTO user_badges (user_id, badge_id) VALUES %s
+                    ON CONFLICT (user_id, badge_id) DO NOTHING
+                    RETURNING user_id, badge_id
+                ''', sorted(awards), fetch=True)
+            totals = []
+            if any(points.values()):
+                totals = execute_values(cursor, '''
+                    UPDATE users u SET points = COALESCE(u.points, 0) + v.points
+                    FROM (VALUES %s) AS v(id, points)
+                    WHERE u.id = v.id
+                    RETURNING u.id, u.points
+                ''', sorted((user_id, p) for user_id, p in points.items() if p), fetch=True)
+            cursor.execute('UPDATE gamification_events SET processed_at = CURRENT_TIMESTAMP WHERE id = ANY(%s)',
+                           ([event['id'] for event in events],))
+            names = {badge_id: name for name, badge_id in badges_by_name.items()}
+            notified = notifications.add_many(((row['user_id'], f"You earned the {names[row['badge_id']]} badge!")
+                                               for row in new_badges), cursor=cursor)
+        conn.commit()
+    finally:
+        conn.close()
+    notifications.added(notified)
+    for row in totals:
+        leaderboard.points_changed(row['id'], row['points'])
+    return len(events)
+
+
+def process_all():
+    """Drain the queue batch by batch (the scheduler job)."""
+    processed = 0
+    while True:
+        count = process_pending()
+        processed += count
+        if count < BATCH_SIZE:
+            return processed
+
+
+_pending = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _run_worker():
+    while True:
+        _pending.wait()
+        time.sleep(FLUSH_DELAY)
+        _pending.clear()
+        try:
+            process_all()
+        except Exception:
+            log.exception('Processing gamification events failed')
+
+
+def _wake():
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run_worker, name='gamification', daemon=True)
+                _worker.start()
+    _pending.set()
@@ -0,0 +1,194 @@
+"""
+Job alert matching.
+
+Matches are computed set-wise in SQL (every alert joined against a batch of
+jobs in one statement) and stored in ``job_alert_matches``, so the alerts page
+only reads precomputed rows.  An insert trigger on ``jobs`` queues every new
+job in ``job_alert_pending``, whichever app inserted it, and
+match_new_jobs() evaluates and dequeues them.  The queue row commits with the
+job, so a job whose transaction commits late is still picked up (a high water
+mark on the id would skip it).  Alert fields keep their "contains" meaning;
+empty fields match everything.
+"""
+import threading
+
+from . import notifications
+from .db import get_db
+
+SUGGESTIONS_PER_ALERT = 5
+
+_MATCH_CONDITION = '''
+    (COALESCE(a.keyword, '') = '' OR j.title ILIKE '%%' || a.keyword || '%%')
+    AND (COALESCE(a.company, '') = '' OR j.company ILIKE '%%' || a.company || '%%')
+    AND (COALESCE(a.location, '') = '' OR j.location ILIKE '%%' || a.location || '%%')
+'''
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _match(cursor, where, params):
+    """Insert matches for job/alert pairs satisfying ``where``; returns the new ones."""
+    cursor.execute(f'''
+        INSERT INTO job_alert_matches (alert_id, job_id, user_id)
+        SELECT a.id, j.id, a.user_id
+        FROM jobs j JOIN job_alerts a ON {_MATCH_CONDITION}
+        WHERE {where}
+        ON CONFLICT (alert_id, job_id) DO NOTHING
+        RETURNING alert_id, job_id, user_id
+    ''', params)
+    return cursor.fetchall()
+
+
+def ensure_schema():
+    """
+    Create the match tables and the job queue on first use, and backfill once.
+    Runs on its own connection so the caller's transaction is never committed
+    halfway.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = get_db()
+        try:
+            with conn.cursor() as cursor:
+                # Other processes wait here rather than racing on CREATE
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('job_alert_schema'))")
+                cursor.execute('''
+                    SELECT to_regclass('job_alert_pending') IS NULL AS fresh,
+                           to_regclass('job_alert_state') IS NOT NULL AS had_mark
+                ''')
+                state = cursor.fetchone()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS job_alert_matches (
+                        alert_id   INTEGER NOT NULL REFERENCES job_alerts(id) ON DELETE CASCADE,
+                        job_id     INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+                        user_id    INTEGER NOT NULL,
+                        matched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (alert_id, job_id)
+                    )
+                ''')
+                cursor.execute('CREATE INDEX IF NOT EXISTS job_alert_matches_user_idx ON job_alert_matches (user_id, alert_id)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS job_alert_matches_job_idx ON job_alert_matches (job_id)')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS job_alert_pending (
+                        job_id INTEGER PRIMARY KEY REFERENCES jobs(id) ON DELETE CASCADE
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE OR REPLACE FUNCTION job_alert_enqueue() RETURNS TRIGGER AS $$
+                    BEGIN
+                        INSERT INTO job_alert_pending (job_id) VALUES (NEW.id) ON CONFLICT DO NOTHING;
+                        RETURN NULL;
+                    END;
+                    $$ LANGUAGE plpgsql
+                ''')
+                cursor.execute('''
+                    DO $$
+                    BEGIN
+                        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_jobs_alert_pending') THEN
+                            CREATE TRIGGER trg_jobs_alert_pending AFTER INSERT ON jobs
+                            FOR EACH ROW EXECUTE FUNCTION job_alert_enqueue();
+                        END IF;
+                    END
+                    $$
+                ''')
+                if state['fresh'] and state['had_mark']:
+                    # Replaces the old id high water mark: queue what it had not reached
+                    cursor.execute('''
+                        INSERT INTO job_alert_pending (job_id)
+                        SELECT j.id FROM jobs j, job_alert_state s WHERE j.id > s.last_job_id
+                        ON CONFLICT DO NOTHING
+                    ''')
+                    cursor.execute('DROP TABLE job_alert_state')
+                elif state['fresh']:
+                    # First run: existing alerts against existing jobs, without notifications
+                    _match(cursor, 'TRUE', ())
+            conn.commit()
+        finally:
+            conn.close()
+        _schema_ready = True
+
+
+def notify(cursor, matches):
+    """
+    One notification per user summarising their new matches, in one INSERT
+    in the caller's transaction.  Returns the user ids for notifications.added().
+    """
+    per_user = {}
+    for match in matches:
+        per_user.setdefault(match['user_id'], set()).add(match['job_id'])
+    if not per_user:
+        return set()
+    rows = []
+    for user_id, job_ids in per_user.items():
+        count = len(job_ids)
+        noun = 'job matches' if count == 1 else 'jobs match'
+        rows.append((user_id, f'{count} new {noun} your job alerts.'))
+    return notifications.add_many(rows, cursor=cursor)
+
+
+def match_new_jobs(cursor, send_notifications=True):
+    """
+    Evaluate every alert against the queued new jobs and dequeue them.  Cheap
+    no-op when nothing is queued; concurrent runs take disjoint jobs.
+    """
+    ensure_schema()
+    cursor.execute('''
+        DELETE FROM job_alert_pending
+        WHERE job_id IN (SELECT job_id FROM job_alert_pending FOR UPDATE SKIP LOCKED)
+        RETURNING job_id
+    ''')
+    job_ids = [row['job_id'] for row in cursor.fetchall()]
+    if not job_ids:
+        return []
+    matches = _match(cursor, 'j.id = ANY(%s)', (job_ids,))
+    notified = notify(cursor, matches) if send_notifications else set()
+    cursor.connection.commit()
+    notifications.added(notified)
+    return matches
+
+
+def rematch_job(cursor, job_id):
+    """After a job edit: drop matches it no longer satisfies and add new ones."""
+    ensure_schema()
+    cursor.execute(f'''
+        DELETE FROM job_alert_matches m
+        USING jobs j, job_alerts a
+        WHERE m.job_id = %s AND j.id = m.job_id AND a.id = m.alert_id
+          AND NOT ({_MATCH_CONDITION})
+    ''', (job_id,))
+    notified = notify(cursor, _match(cursor, 'j.id = %s', (job_id,)))
+    cursor.connection.commit()
+    notifications.added(notified)
+
+
+def match_alert(cursor, alert_id):
+    """Backfill a newly created alert against the jobs already posted."""
+    ensure_schema()
+    _match(cursor, 'a.id = %s', (alert_id,))
+    cursor.connection.commit()
+
+
+def suggestions_for_user(cursor, user_id):
+    """``{alert_id: [job, ...]}`` with the newest matches of each alert."""
+    ensure_schema()
+    cursor.execute('''
+        SELECT * FROM (
+            SELECT m.alert_id, j.*,
+                   ROW_NUMBER() OVER (PARTITION BY m.alert_id
+                                      ORDER BY j.posted_at DESC NULLS LAST, j.id DESC) AS rn
+            FROM job_alert_matches m
+            JOIN jobs j ON j.id = m.job_id
+            WHERE m.user_id = %s
+        ) ranked
+        WHERE rn <= %s
+        ORDER BY alert_id, rn
+    ''', (user_id, SUGGESTIONS_PER_ALERT))
+    by_alert = {}
+    for row in cursor.fetchall():
+        by_alert.setdefault(row['alert_id'], []).append(row)
+    return by_alert
@@ -0,0 +1,57 @@
+"""
+Facets for the /jobs filters.
+
+Distinct companies, locations and job types come with the number of jobs
+carrying each value, all from one grouped query.  The result is cached per
+process and dropped by invalidate() whenever the jobs table changes here; the
+TTL covers edits made from the main app.
+"""
+from .cache import CachedValue
+from .db import get_db
+
+FACETS = ('company', 'location', 'job_type')
+
+_FACETS_SQL = '''
+    SELECT company, location, job_type,
+           GROUPING(company) AS no_company, GROUPING(location) AS no_location,
+           COUNT(*) AS jobs
+    FROM jobs
+    GROUP BY GROUPING SETS ((company), (location), (job_type))
+'''
+
+
+def _load():
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(_FACETS_SQL)
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    facets = {facet: [] for facet in FACETS}
+    for row in rows:
+        if not row['no_company']:
+            facet = 'company'
+        elif not row['no_location']:
+            facet = 'location'
+        else:
+            facet = 'job_type'
+        value = row[facet]
+        if value and value.strip():
+            facets[facet].append((value, row['jobs']))
+    for values in facets.values():
+        values.sort(key=lambda item: item[0])
+    return facets
+
+
+_facets = CachedValue(_load, ttl=300)
+
+
+def get_facets():
+    """``{facet: [(value, job_count), ...]}`` in alphabetical order."""
+    return _facets.get()
+
+
+def invalidate():
+    """Call after any write to the ``jobs`` table."""
+    _facets.invalidate()
@@ -0,0 +1,254 @@
+"""
+Job board search.
+
+``jobs.search_vector`` is a generated tsvector (title weighted over company
+over location) with a GIN index, and title/company/location carry pg_trgm
+GIN indexes so substring filters and misspelt searches are index scans
+instead of sequential scans.  Results are ranked with ts_rank when a search
+term is given and paged with keyset cursors, so a page costs the same no
+matter how deep the user scrolls.  The total shown to the user is the
+planner's row estimate (estimate_count), not an exact COUNT(*).
+
+The column and indexes are created by the migration runner
+(``python -m career_guidance_ai.migrate``), never on a request: adding a
+stored generated column rewrites the whole table under an exclusive lock.
+Until it has run, searches compute the tsvector inline and, without pg_trgm,
+work minus typo tolerance.
+"""
+import base64
+import json
+import logging
+import threading
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+PAGE_SIZE = 24
+
+SORTS = ('relevance', 'newest', 'company')
+
+_VECTOR_EXPR = (
+    "(setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(company, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'C'))"
+)
+
+_SCHEMA = [
+    f'ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS {_VECTOR_EXPR} STORED',
+    'CREATE INDEX IF NOT EXISTS jobs_search_vector_idx ON jobs USING GIN (search_vector)',
+    # Keyset pagination indexes for the two explicit sort orders
+    "CREATE INDEX IF NOT EXISTS jobs_newest_idx ON jobs ((COALESCE(posted_at, 'epoch')) DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS jobs_company_idx ON jobs ((COALESCE(company, '')), id)",
+]
+
+_TRGM_SCHEMA = [
+    'CREATE INDEX IF NOT EXISTS jobs_title_trgm_idx ON jobs USING GIN (title gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS jobs_company_trgm_idx ON jobs USING GIN (company gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS jobs_location_trgm_idx ON jobs USING GIN (location gin_trgm_ops)',
+]
+
+# Columns returned to the templates (search_vector stays in the database)
+_COLUMNS = 'id, title, company, location, job_type, salary, url, description, requirements, posted_at, career_id'
+
+_schema_ready = False
+_has_trgm = False
+_vector_sql = _VECTOR_EXPR
+_schema_lock = threading.Lock()
+
+
+def migrate_search_schema(cursor):
+    """Add the search column and sort indexes (migration runner only)."""
+    for statement in _SCHEMA:
+        cursor.execute(statement)
+
+
+def migrate_trigram_indexes(cursor):
+    """
+    Install pg_trgm and index title/company/location (migration runner only).
+    Returns False when the extension is not available, to be retried later.
+    """
+    cursor.execute('SAVEPOINT trgm')
+    try:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for statement in _TRGM_SCHEMA:
+            cursor.execute(statement)
+    except Exception:
+        cursor.execute('ROLLBACK TO SAVEPOINT trgm')
+        log.warning('pg_trgm is not available; job search runs without typo tolerance')
+        return False
+    cursor.execute('RELEASE SAVEPOINT trgm')
+    return True
+
+
+def ensure_search_schema(cursor):
+    """Find out, once per process, what the migration has set up."""
+    global _schema_ready, _has_trgm, _vector_sql
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        cursor.execute('''
+            SELECT EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'jobs' AND column_name = 'search_vector') AS has_vector,
+                   EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') AS has_trgm
+        ''')
+        row = cursor.fetchone()
+        if row['has_vector']:
+            _vector_sql = 'search_vector'
+        else:
+            log.warning('jobs.search_vector is missing; run python -m career_guidance_ai.migrate')
+        _has_trgm = row['has_trgm']
+        _schema_ready = True
+
+
+def encode_cursor(key, job_id):
+    raw = json.dumps([key, job_id], default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _cursor_key(sort, key):
+    """The sort key of a decoded cursor as the type ``sort`` compares, or None."""
+    if sort == 'relevance':
+        if isinstance(key, (int, float)) and not isinstance(key, bool):
+            return float(key)
+    elif sort == 'newest':
+        if isinstance(key, str):
+            try:
+                return datetime.fromisoformat(key)
+            except ValueError:
+                return None
+    elif isinstance(key, str):
+        return key
+    return None
+
+
+def decode_cursor(token, sort):
+    """Inverse of encode_cursor(); None for a missing or malformed token."""
+    if not token:
+        return None
+    try:
+        key, job_id = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    key = _cursor_key(sort, key)
+    if key is None or type(job_id) is not int:
+        return None
+    return key, job_id
+
+
+def _filters(search='', company='', location='', job_type='', salary_min='',
+             salary_max='', posted='', career_ids=None):
+    """``(where_sql, params, rank_sql, rank_params)`` for the /jobs filters."""
+    where, params = [], []
+    rank_sql, rank_params = '0::float8', []
+    if search:
+        text_match = [f"{_vector_sql} @@ websearch_to_tsquery('english', %s)"]
+        text_params = [search]
+        if _has_trgm:
+            # Substring matches use the trigram indexes; "<%" tolerates typos
+            like = f'%{search}%'
+            text_match += ['title ILIKE %s', 'company ILIKE %s', 'location ILIKE %s', '%s <%% title']
+            text_params += [like, like, like, search]
+            rank_sql = f"(ts_rank({_vector_sql}, websearch_to_tsquery('english', %s)) + word_similarity(%s, title))::float8"
+            rank_params = [search, search]
+        else:
+            like = f'%{search}%'
+            text_match += ['title ILIKE %s', 'company ILIKE %s', 'location ILIKE %s']
+            text_params += [like, like, like]
+            rank_sql = f"ts_rank({_vector_sql}, websearch_to_tsquery('english', %s))::float8"
+            rank_params = [search]
+        where.append('(' + ' OR '.join(text_match) + ')')
+        params += text_params
+    if career_ids:
+        where.append('career_id = ANY(%s)')
+        params.append(list(career_ids))
+    if company:
+        where.append('company ILIKE %s')
+        params.append(f'%{company}%')
+    if location:
+        where.append('location ILIKE %s')
+        params.append(f'%{location}%')
+    if job_type:
+        where.append('job_type = %s')
+        params.append(job_type)
+    if salary_min:
+        where.append('salary >= %s')
+        params.append(salary_min)
+    if salary_max:
+        where.append('salary <= %s')
+        params.append(salary_max)
+    if posted:
+        where.append("posted_at >= NOW() - INTERVAL '1 day' * %s")
+        params.append(posted)
+    return ' AND '.join(where) or 'TRUE', params, rank_sql, rank_params
+
+
+def estimate_count(cursor, sort='', **filters):
+    """
+    Planner estimate of how many jobs match ``filters``, read from EXPLAIN
+    (table statistics) instead of counting every matching row.
+    """
+    ensure_search_schema(cursor)
+    where_sql, params, _, _ = _filters(**filters)
+    cursor.execute(f'EXPLAIN (FORMAT JSON) SELECT 1 FROM jobs WHERE {where_sql}', tuple(params))
+    plan = cursor.fetchone()['QUERY PLAN']
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def search_jobs(cursor, search='', company='', location='', job_type='',
+                salary_min='', salary_max='', posted='', sort='',
+                career_ids=None, after=None, limit=PAGE_SIZE):
+    """
+    One page of jobs matching the /jobs filters.
+
+    ``sort`` is 'relevance' (default while searching), 'newest' (default
+    otherwise) or 'company'.  ``career_ids`` restricts to recommended careers.
+    ``after`` is the cursor string from the previous page.  Returns
+    ``(jobs, next_cursor)`` where next_cursor is None on the last page.
+    """
+    ensure_search_schema(cursor)
+    if sort not in SORTS:
+        sort = ''
+    if not sort or (sort == 'relevance' and not search):
+        sort = 'relevance' if search else 'newest'
+
+    where_sql, params, rank_sql, rank_params = _filters(
+        search, company, location, job_type, salary_min, salary_max, posted, career_ids)
+
+    if sort == 'relevance':
+        sort_key, direction = 'rank', 'DESC'
+    elif sort == 'company':
+        sort_key, direction = 'company_key', 'ASC'
+    else:
+        sort_key, direction = 'posted_key', 'DESC'
+
+    sql = f'''
+        SELECT * FROM (
+            SELECT {_COLUMNS},
+                   {rank_sql} AS rank,
+                   COALESCE(posted_at, 'epoch') AS posted_key,
+                   COALESCE(company, '') AS company_key
+            FROM jobs
+            WHERE {where_sql}
+        ) matches
+    '''
+    params = rank_params + params
+    position = decode_cursor(after, sort)
+    if position:
+        op = '<' if direction == 'DESC' else '>'
+        sql += f' WHERE ({sort_key}, id) {op} (%s, %s)'
+        params += list(position)
+    sql += f' ORDER BY {sort_key} {direction}, id {direction} LIMIT %s'
+    params.append(limit + 1)
+
+    cursor.execute(sql, tuple(params))
+    rows = cursor.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[sort_key], last['id'])
+    return rows, next_cursor
@@ -0,0 +1,225 @@
+"""
+Points leaderboards with rank lookups.
+
+Each leaderboard (everyone, one semester, one peer group) is a RankIndex: the
+members' ``(-points, id)`` keys in one sorted list, so a user's rank is a
+binary search and the top N is a slice.  An index is built from a single
+query (served by the ``(points DESC, id)`` covering index on ``users``) the
+first time it is needed and then kept current in this process by
+points_changed(), which gamification calls after committing new totals; the
+TTL picks up points, joins and renames written by other workers or the main
+app.
+
+Moving a user is a binary search plus a list insert and delete, each a
+memmove of the keys behind it: O(n), but for boards of a few thousand
+students that is microseconds, against a full query and sort to rebuild.
+
+Only boards for semesters and groups that exist are built (see
+valid_scope()), and at most MAX_BOARDS are kept, least recently used first
+out; the everyone board is always kept.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from .db import get_db
+
+TTL = 300
+TOP_N = 20
+MAX_BOARDS = 64
+
+EVERYONE = ('all', None)
+
+_LOAD_SQL = {
+    'all': 'SELECT id, name, COALESCE(points, 0) AS points FROM users',
+    'semester': 'SELECT id, name, COALESCE(points, 0) AS points FROM users WHERE semester = %s',
+    'group': '''
+        SELECT u.id, u.name, COALESCE(u.points, 0) AS points
+        FROM group_members gm JOIN users u ON u.id = gm.user_id
+        WHERE gm.group_id = %s
+    ''',
+}
+
+_EXISTS_SQL = {
+    'semester': 'SELECT 1 FROM users WHERE semester = %s LIMIT 1',
+    'group': 'SELECT 1 FROM peer_groups WHERE id = %s',
+}
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+def _ensure_schema(cursor):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        cursor.execute('CREATE INDEX IF NOT EXISTS users_points_rank_idx ON users (points DESC, id) INCLUDE (name)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS users_semester_points_idx ON users (semester, points DESC, id)')
+        _schema_ready = True
+
+
+class RankIndex:
+    """The members of one leaderboard ordered by points (highest first), then id."""
+
+    def __init__(self, rows):
+        self._lock = threading.Lock()
+        self._points = {row['id']: row['points'] for row in rows}
+        self._names = {row['id']: row['name'] for row in rows}
+        self._keys = sorted((-points, user_id) for user_id, points in self._points.items())
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, user_id):
+        return user_id in self._points
+
+    def rank(self, user_id):
+        """1-based rank of ``user_id``, or None if they are not on this board."""
+        with self._lock:
+            points = self._points.get(user_id)
+            if points is None:
+                return None
+            return bisect_left(self._keys, (-points, user_id)) + 1
+
+    def entry(self, user_id):
+        with self._lock:
+            if user_id not in self._points:
+                return None
+            points = self._points[user_id]
+            return {'id': user_id, 'name': self._names[user_id], 'points': points,
+                    'rank': bisect_left(self._keys, (-points, user_id)) + 1}
+
+    def top(self, n=TOP_N):
+        with self._lock:
+            return [{'id': user_id, 'name': self._names[user_id], 'points': -neg_points, 'rank': rank}
+                    for rank, (neg_points, user_id) in enumerate(self._keys[:n], 1)]
+
+    def set(self, user_id, points, name=None):
+        """Move ``user_id`` to ``points``, adding them to the board if needed."""
+        with self._lock:
+            old = self._points.get(user_id)
+            if old is not None:
+                del self._keys[bisect_left(self._keys, (-old, user_id))]
+            elif name is None:
+                return
+            insort(self._keys, (-points, user_id))
+            self._points[user_id] = points
+            if name is not None:
+                self._names[user_id] = name
+
+    def rename(self, user_id, name):
+        with self._lock:
+            if user_id in self._names:
+                self._names[user_id] = name
+
+    def discard(self, user_id):
+        with self._lock:
+            points = self._points.pop(user_id, None)
+            if points is not None:
+                del self._keys[bisect_left(self._keys, (-points, user_id))]
+                del self._names[user_id]
+
+
+# (kind, key) -> RankIndex for the boards loaded in this process, least recently used first
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _load(scope):
+    kind, key = scope
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            _ensure_schema(cursor)
+            cursor.execute(_LOAD_SQL[kind], () if key is None else (key,))
+            rows = cursor.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+    return RankIndex(rows)
+
+
+def valid_scope(scope):
+    """Whether ``scope`` is everyone, a semester someone is in, or an existing peer group."""
+    if scope == EVERYONE or scope in _indexes:
+        return True
+    kind, key = scope
+    if kind not in _EXISTS_SQL:
+        return False
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(_EXISTS_SQL[kind], (key,))
+            return cursor.fetchone() is not None
+    finally:
+        conn.close()
+
+
+def get_index(scope=EVERYONE):
+    """The board for ``scope``; check request input with valid_scope() first."""
+    with _indexes_lock:
+        index = _indexes.get(scope)
+        if index is not None:
+            _indexes.move_to_end(scope)
+    if index is None or time.monotonic() - index.loaded_at > TTL:
+        index = _load(scope)
+        with _indexes_lock:
+            _indexes[scope] = index
+            _indexes.move_to_end(scope)
+            while len(_indexes) > MAX_BOARDS:
+                oldest = next(key for key in _indexes if key != EVERYONE)
+                del _indexes[oldest]
+    return index
+
+
+def top(scope=EVERYONE, n=TOP_N):
+    """``[{'id', 'name', 'points', 'rank'}, ...]`` for the first ``n`` places."""
+    return get_index(scope).top(n)
+
+
+def my_rank(user_id, scope=EVERYONE):
+    """``{'id', 'name', 'points', 'rank'}`` of ``user_id`` on the board, or None."""
+    index = get_index(scope)
+    entry = index.entry(user_id)
+    if entry is None and scope[0] != 'group':
+        # Registered (or moved semester) since the board was loaded
+        conn = get_db()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT name, COALESCE(points, 0) AS points, semester FROM users WHERE id = %s',
+                               (user_id,))
+                user = cursor.fetchone()
+        finally:
+            conn.close()
+        if user and (scope[0] == 'all' or user['semester'] == scope[1]):
+            index.set(user_id, user['points'], user['name'])
+            entry = index.entry(user_id)
+    return entry
+
+
+def points_changed(user_id, points):
+    """Call after committing ``user_id``'s new total; moves them on every loaded board they are on."""
+    for index in list(_indexes.values()):
+        index.set(user_id, points)
+
+
+def renamed(user_id, name):
+    for index in list(_indexes.values()):
+        index.rename(user_id, name)
+
+
+def removed(user_id):
+    """Call after deleting a user."""
+    for index in list(_indexes.values()):
+        index.discard(user_id)
+
+
+def group_changed(group_id):
+    """Call after members join or leave a peer group."""
+    with _indexes_lock:
+        _indexes.pop(('group', group_id), None)
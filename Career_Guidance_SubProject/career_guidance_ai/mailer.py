@@ -0,0 +1,261 @@
+"""
+Weekly progress email batch.
+
+All users and their milestones are streamed from one joined query through a
+server-side cursor, grouped per user, and sent in chunks by a thread pool
+that shares a small pool of persistent SMTP sessions.  Just before a user's
+message goes out, the user is claimed in ``email_send_log`` under the batch
+key (one per ISO week) with status 'sending'.  The row is marked 'sent' or
+'failed' as soon as that message completes.  Each write is committed at once,
+so a crashed or interrupted run picks up where it stopped without re-sending.
+A crash can leave at most the messages in flight, one per SMTP session, as
+'sending'.  These are not retried automatically because they may have been
+delivered.
+
+smtplib and the email package are imported by the first send, not when the
+app (which schedules this job) starts.
+
+Run by hand (e.g. against ``python -m aiosmtpd -n -l localhost:8025`` with
+SMTP_HOST=localhost SMTP_PORT=8025 SMTP_STARTTLS=0)::
+
+    python -m career_guidance_ai.mailer
+"""
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from config import (SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_STARTTLS,
+                    MAIL_FROM, MAIL_POOL_SIZE)
+from .db import get_db
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 200
+MAX_ATTEMPTS = 3
+BACKOFF_SECONDS = 2.0
+
+_PROGRESS_SQL = '''
+    SELECT u.id AS user_id, u.email, u.name, cp.milestone, cp.status
+    FROM users u
+    LEFT JOIN career_progress cp ON cp.user_id = u.id
+    WHERE u.email IS NOT NULL AND u.email <> ''
+      AND NOT EXISTS (
+          SELECT 1 FROM email_send_log l
+          WHERE l.batch_key = %s AND l.user_id = u.id AND l.status IN ('sent', 'sending')
+      )
+    ORDER BY u.id, cp.id
+'''
+
+
+class SMTPPool:
+    """A fixed number of logged-in SMTP sessions shared between threads."""
+
+    def __init__(self, size=MAIL_POOL_SIZE, host=SMTP_HOST, port=SMTP_PORT,
+                 user=SMTP_USER, password=SMTP_PASSWORD, starttls=SMTP_STARTTLS):
+        self.size = size
+        self.host, self.port = host, port
+        self.user, self.password = user, password
+        self.starttls = starttls
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(size)
+
+    def _connect(self):
+        import smtplib
+
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.starttls:
+            server.starttls()
+        if self.user:
+            server.login(self.user, self.password)
+        return server
+
+    def send(self, msg):
+        import smtplib
+
+        with self._slots:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._connect()
+            try:
+                server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # Broken session: drop it, the next attempt opens a fresh one
+                _quit(server)
+                raise
+            except smtplib.SMTPException:
+                # The session itself is still usable after a rejected message
+                self._idle.put(server)
+                raise
+            self._idle.put(server)
+
+    def close(self):
+        while True:
+            try:
+                _quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _quit(server):
+    import smtplib
+
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+def _is_permanent(exc):
+    import smtplib
+
+    # 5xx replies (bad recipient, rejected content) will not succeed on retry
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+def weekly_batch_key(today=None):
+    year, week, _ = (today or date.today()).isocalendar()
+    return f'weekly-progress-{year}-W{week:02d}'
+
+
+def render_progress_email(user, progress):
+    from email.mime.text import MIMEText
+
+    body = f"Hello {user['name']},\n\nHere is your career progress:\n"
+    for p in progress:
+        body += f"- {p['milestone']}: {p['status']}\n"
+    msg = MIMEText(body)
+    msg['Subject'] = 'Your Weekly Career Progress'
+    msg['From'] = MAIL_FROM
+    msg['To'] = user['email']
+    return msg
+
+
+def _ensure_log_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_send_log (
+            batch_key  VARCHAR(64) NOT NULL,
+            user_id    INTEGER NOT NULL,
+            status     VARCHAR(10) NOT NULL,
+            attempts   INTEGER NOT NULL DEFAULT 0,
+            error      TEXT,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (batch_key, user_id)
+        )
+    ''')
+
+
+def _iter_users(cursor):
+    """Yield ``(user, progress_rows)`` from the streamed join, one user at a time."""
+    for _, rows in itertools.groupby(cursor, key=lambda row: row['user_id']):
+        rows = list(rows)
+        user = {'id': rows[0]['user_id'], 'email': rows[0]['email'], 'name': rows[0]['name']}
+        yield user, [row for row in rows if row['milestone'] is not None]
+
+
+class _SendLog:
+    """email_send_log writes from the sending threads, each committed at once."""
+
+    def __init__(self, conn, batch_key):
+        self._conn = conn
+        self.batch_key = batch_key
+        self._lock = threading.Lock()
+
+    def _write(self, sql, params):
+        with self._lock:
+            with self._conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                written = cursor.rowcount
+            self._conn.commit()
+        return written
+
+    def claim(self, user_id):
+        """Mark the user 'sending'; False if already sent or claimed by another run."""
+        return self._write('''
+            INSERT INTO email_send_log (batch_key, user_id, status) VALUES (%s, %s, 'sending')
+            ON CONFLICT (batch_key, user_id) DO UPDATE
+            SET status = 'sending', updated_at = CURRENT_TIMESTAMP
+            WHERE email_send_log.status = 'failed'
+        ''', (self.batch_key, user_id)) == 1
+
+    def finish(self, user_id, status, attempts, error):
+        self._write('''
+            UPDATE email_send_log
+            SET status = %s, attempts = attempts + %s, error = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE batch_key = %s AND user_id = %s
+        ''', (status, attempts, error, self.batch_key, user_id))
+
+
+def _send_one(pool, send_log, user, progress, attempts=MAX_ATTEMPTS, backoff=BACKOFF_SECONDS):
+    """
+    Claim, send with exponential backoff and record one user's email.
+    Returns 'sent', 'failed', or None when the user was skipped.
+    """
+    import smtplib
+
+    msg = render_progress_email(user, progress)
+    if not send_log.claim(user['id']):
+        return None
+    for attempt in range(1, attempts + 1):
+        try:
+            pool.send(msg)
+            send_log.finish(user['id'], 'sent', attempt, None)
+            return 'sent'
+        except (smtplib.SMTPException, OSError) as exc:
+            if attempt == attempts or _is_permanent(exc):
+                log.warning('Weekly email to user %s failed: %s', user['id'], exc)
+                send_log.finish(user['id'], 'failed', attempt, str(exc)[:500])
+                return 'failed'
+        except Exception as exc:
+            # Not an SMTP outcome: release the claim so the next run retries
+            send_log.finish(user['id'], 'failed', attempt, repr(exc)[:500])
+            raise
+        time.sleep(backoff * 2 ** (attempt - 1))
+
+
+def send_weekly_progress_emails(batch_key=None, pool=None, chunk_size=CHUNK_SIZE):
+    """
+    Send this week's progress email to every user not yet marked 'sent'
+    for ``batch_key``.  Returns ``{'sent': n, 'failed': n}``.
+    """
+    batch_key = batch_key or weekly_batch_key()
+    own_pool = pool is None
+    pool = pool or SMTPPool()
+    totals = {'sent': 0, 'failed': 0}
+    read_conn, log_conn = get_db(), get_db()
+    try:
+        with log_conn.cursor() as cursor:
+            _ensure_log_table(cursor)
+        log_conn.commit()
+        send_log = _SendLog(log_conn, batch_key)
+        # Named cursor: rows are streamed from the server instead of loaded at once
+        with read_conn.cursor(name='weekly_progress_emails') as cursor, \
+                ThreadPoolExecutor(max_workers=pool.size) as executor:
+            cursor.itersize = 2000
+            cursor.execute(_PROGRESS_SQL, (batch_key,))
+            users = _iter_users(cursor)
+            while True:
+                chunk = list(itertools.islice(users, chunk_size))
+                if not chunk:
+                    break
+                for status in executor.map(lambda item: _send_one(pool, send_log, *item), chunk):
+                    if status:
+                        totals[status] += 1
+                log.info('%s: %d sent, %d failed so far', batch_key, totals['sent'], totals['failed'])
+    finally:
+        read_conn.close()
+        log_conn.close()
+        if own_pool:
+            pool.close()
+    return totals
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    print(send_weekly_progress_emails())
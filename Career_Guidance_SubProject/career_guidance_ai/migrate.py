@@ -0,0 +1,100 @@
+"""
+Schema changes too heavy or too destructive to make on a request.
+
+Most tables are created on first use by the module that owns them.  Changes
+that rewrite or delete existing rows are listed here instead and applied by
+hand, or as a deploy step, before the new web processes start::
+
+    python -m career_guidance_ai.migrate            # apply what is pending
+    python -m career_guidance_ai.migrate --list     # show what has run
+
+Each migration runs once, in order, in its own transaction, and is recorded
+in ``schema_migrations``.  An advisory lock keeps two runners from applying
+them at the same time.  A migration that returns False is committed but not
+recorded, so it is tried again next time (e.g. an optional extension).
+"""
+import argparse
+import logging
+
+from . import career_plans, job_search, notifications
+from .db import get_db
+from .scheduler import ADVISORY_LOCK_KEY
+
+log = logging.getLogger(__name__)
+
+# (name, function(cursor)), in the order they must run
+MIGRATIONS = [
+    ('0001_jobs_search_vector', job_search.migrate_search_schema),
+    ('0002_jobs_trigram_indexes', job_search.migrate_trigram_indexes),
+    ('0003_career_progress_unique_milestones', career_plans.migrate_unique_milestones),
+    ('0004_notifications_unread_index', notifications.migrate_unread_index),
+    ('0005_users_unread_notifications', notifications.migrate_unread_counter),
+]
+
+
+def _applied(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name       VARCHAR(100) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('SELECT name, applied_at FROM schema_migrations')
+    return {row['name']: row['applied_at'] for row in cursor.fetchall()}
+
+
+def migrate():
+    """Apply every pending migration; returns the names applied."""
+    conn = get_db()
+    done = []
+    try:
+        with conn.cursor() as cursor:
+            # Session lock: held across the per-migration commits below
+            cursor.execute("SELECT pg_advisory_lock(%s, hashtext('schema_migrations'))", (ADVISORY_LOCK_KEY,))
+            applied = _applied(cursor)
+            conn.commit()
+            for name, func in MIGRATIONS:
+                if name in applied:
+                    continue
+                log.info('Applying migration %s', name)
+                try:
+                    complete = func(cursor) is not False
+                    if complete:
+                        cursor.execute('INSERT INTO schema_migrations (name) VALUES (%s)', (name,))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    log.exception('Migration %s failed; later migrations were not run', name)
+                    raise
+                if complete:
+                    done.append(name)
+                else:
+                    log.warning('Migration %s is incomplete; it will run again next time', name)
+    finally:
+        # Closing the session releases the lock
+        conn.close()
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply the Career Guidance schema migrations.')
+    parser.add_argument('--list', action='store_true', help='show each migration and when it ran')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if args.list:
+        conn = get_db()
+        try:
+            with conn.cursor() as cursor:
+                applied = _applied(cursor)
+            conn.commit()
+        finally:
+            conn.close()
+        for name, _ in MIGRATIONS:
+            print(f"{name:<40} {applied.get(name) or 'pending'}")
+        return
+    done = migrate()
+    print(f"Applied {len(done)} migration(s){': ' + ', '.join(done) if done else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+User notifications and the unread badge count.
+
+Each user's unread count is kept in ``users.unread_notifications`` (added and
+backfilled by migration 0005).  add_many() raises it in the same statement as
+the INSERT and mark_all_read() zeroes it in the same transaction as the
+UPDATE, so it is exact in every worker and a rolled-back transaction leaves
+it untouched.  Pages that already load the user's row show the badge from
+it; otherwise unread_count() reads the one column by primary key.
+
+Writes that join the caller's transaction leave cache invalidation to the
+caller, after its commit: see added().
+"""
+from psycopg2.extras import execute_values
+
+from . import dashboard
+from .db import get_db
+
+UNREAD_INDEX = 'notifications_unread_user_idx'
+
+# One statement per page of rows: insert, then add each user's count of new rows
+_INSERT_SQL = '''
+    WITH added AS (
+        INSERT INTO notifications (user_id, message) VALUES %s
+        RETURNING user_id
+    )
+    UPDATE users u SET unread_notifications = u.unread_notifications + a.count
+    FROM (SELECT user_id, COUNT(*) AS count FROM added GROUP BY user_id) a
+    WHERE u.id = a.user_id
+'''
+
+
+def migrate_unread_index(cursor):
+    """Index the unread notifications by user (migration runner only)."""
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {UNREAD_INDEX} ON notifications (user_id) WHERE is_read = FALSE')
+
+
+def migrate_unread_counter(cursor):
+    """Add ``users.unread_notifications`` and backfill it (migration runner only)."""
+    cursor.execute('ALTER TABLE users ADD COLUMN IF NOT EXISTS unread_notifications INTEGER NOT NULL DEFAULT 0')
+    # Writers that predate the counter must not insert between the count and the commit
+    cursor.execute('LOCK TABLE notifications IN SHARE MODE')
+    cursor.execute('''
+        UPDATE users u SET unread_notifications = n.count
+        FROM (SELECT user_id, COUNT(*) AS count FROM notifications WHERE is_read = FALSE GROUP BY user_id) n
+        WHERE u.id = n.user_id
+    ''')
+
+
+def unread_count(user_id):
+    """The user's unread count, for pages that have not loaded the user's row."""
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT unread_notifications FROM users WHERE id = %s', (user_id,))
+            user = cursor.fetchone()
+            return user['unread_notifications'] if user else 0
+    finally:
+        conn.close()
+
+
+def added(user_ids):
+    """Call once notifications for ``user_ids`` are committed."""
+    for user_id in set(user_ids):
+        dashboard.invalidate(user_id)
+
+
+def add_many(rows, cursor=None):
+    """
+    Fan out ``(user_id, message)`` pairs in a single INSERT.  With ``cursor``
+    the insert joins the caller's transaction: the caller commits and then
+    passes the returned user ids to added().  Otherwise it runs and commits on
+    its own connection.  Returns the set of user ids notified.
+    """
+    rows = list(rows)
+    if not rows:
+        return set()
+    user_ids = {user_id for user_id, _ in rows}
+    if cursor is not None:
+        execute_values(cursor, _INSERT_SQL, rows)
+        return user_ids
+    conn = get_db()
+    try:
+        with conn.cursor() as own_cursor:
+            execute_values(own_cursor, _INSERT_SQL, rows)
+        conn.commit()
+    finally:
+        conn.close()
+    added(user_ids)
+    return user_ids
+
+
+def add(user_id, message):
+    add_many([(user_id, message)])
+
+
+def mark_all_read(cursor, user_id):
+    """Runs inside the caller's transaction; invalidate the dashboard after commit."""
+    # Zero the counter first: its row lock makes a concurrent add_many() either
+    # commit before the UPDATE below sees its rows, or count them after ours
+    cursor.execute('UPDATE users SET unread_notifications = 0 WHERE id = %s', (user_id,))
+    cursor.execute('UPDATE notifications SET is_read = TRUE WHERE user_id = %s AND is_read = FALSE', (user_id,))
@@ -0,0 +1,120 @@
+"""
+Peer group listing, search and membership pages.
+
+A page of groups comes back with each group's member count and whether the
+viewer belongs to it from one query: the counts are grouped over just the
+groups on the page, using the (group_id, user_id) unique index of
+group_members.  Groups and members are paged with keyset cursors (the last
+id seen), so a later page costs the same as the first.  Name/description
+search is a substring match; when pg_trgm is available it is served by a
+trigram index and also tolerates typos.
+"""
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+GROUPS_PAGE_SIZE = 24
+MEMBERS_PAGE_SIZE = 50
+
+# Must match the indexed expression exactly for the trigram index to be used
+_SEARCH_EXPR = "(name || ' ' || COALESCE(description, ''))"
+
+_schema_ready = False
+_has_trgm = False
+_schema_lock = threading.Lock()
+
+
+def ensure_schema(cursor):
+    """Create the member paging index and, if pg_trgm is available, the search index."""
+    global _schema_ready, _has_trgm
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        conn = cursor.connection
+        cursor.execute('CREATE INDEX IF NOT EXISTS group_members_group_page_idx ON group_members (group_id, id)')
+        conn.commit()
+        try:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS peer_groups_search_trgm_idx
+                ON peer_groups USING GIN ({_SEARCH_EXPR} gin_trgm_ops)
+            ''')
+            conn.commit()
+            _has_trgm = True
+        except Exception:
+            conn.rollback()
+            log.warning('pg_trgm is not available; group search runs without an index')
+        _schema_ready = True
+
+
+def list_groups(cursor, user_id, search='', after=None, limit=GROUPS_PAGE_SIZE):
+    """
+    Newest groups first, each with ``member_count`` and ``is_member`` for
+    ``user_id``.  ``after`` is the last group id of the previous page.
+    Returns ``(groups, next_after)``; next_after is None on the last page.
+    """
+    ensure_schema(cursor)
+    where, params = [], []
+    if search:
+        if _has_trgm:
+            # Both sides use the trigram index; "<%" tolerates typos
+            where.append(f'({_SEARCH_EXPR} ILIKE %s OR %s <%% {_SEARCH_EXPR})')
+            params += [f'%{search}%', search]
+        else:
+            where.append(f'{_SEARCH_EXPR} ILIKE %s')
+            params.append(f'%{search}%')
+    if after:
+        where.append('id < %s')
+        params.append(after)
+    where_sql = ('WHERE ' + ' AND '.join(where)) if where else ''
+    cursor.execute(f'''
+        WITH page AS (
+            SELECT id, name, description, image, created_by, created_at
+            FROM peer_groups {where_sql}
+            ORDER BY id DESC LIMIT %s
+        )
+        SELECT page.*, COALESCE(counts.members, 0) AS member_count,
+               mine.user_id IS NOT NULL AS is_member
+        FROM page
+        LEFT JOIN (
+            SELECT group_id, COUNT(*) AS members FROM group_members
+            WHERE group_id IN (SELECT id FROM page)
+            GROUP BY group_id
+        ) counts ON counts.group_id = page.id
+        LEFT JOIN group_members mine ON mine.group_id = page.id AND mine.user_id = %s
+        ORDER BY page.id DESC
+    ''', params + [limit + 1, user_id])
+    groups = cursor.fetchall()
+    next_after = groups[limit - 1]['id'] if len(groups) > limit else None
+    return groups[:limit], next_after
+
+
+def get_group(cursor, group_id, user_id):
+    """One group with ``member_count`` and ``is_member``, or None."""
+    cursor.execute('''
+        SELECT g.*,
+               (SELECT COUNT(*) FROM group_members WHERE group_id = g.id) AS member_count,
+               EXISTS (SELECT 1 FROM group_members WHERE group_id = g.id AND user_id = %s) AS is_member
+        FROM peer_groups g WHERE g.id = %s
+    ''', (user_id, group_id))
+    return cursor.fetchone()
+
+
+def list_members(cursor, group_id, after=None, limit=MEMBERS_PAGE_SIZE):
+    """
+    Members in the order they joined.  ``after`` is the membership key of the
+    last member on the previous page.  Returns ``(members, next_after)``.
+    """
+    ensure_schema(cursor)
+    cursor.execute('''
+        SELECT gm.id AS member_key, u.id, u.name, u.profile_pic
+        FROM group_members gm JOIN users u ON u.id = gm.user_id
+        WHERE gm.group_id = %s AND gm.id > %s
+        ORDER BY gm.id LIMIT %s
+    ''', (group_id, after or 0, limit + 1))
+    members = cursor.fetchall()
+    next_after = members[limit - 1]['member_key'] if len(members) > limit else None
+    return members[:limit], next_after
@@ -0,0 +1,381 @@
+"""
+Recommendation snapshots.
+
+A snapshot is the fully built recommendations list (top careers with
+explanations, course links and project ideas) for one resume + quiz answer
+against one version of the careers catalogue.  It is computed when a quiz is
+submitted or a resume uploaded, stored as JSONB in ``recommendation_snapshots``
+and served as-is by /recommendations, /download_pdf and /saved_careers.
+Editing the careers table changes ``careers_version`` so stale snapshots are
+simply never looked up again.
+"""
+import threading
+
+from psycopg2.extras import Json, execute_values
+
+from . import scoring
+from .db import get_db
+from .scoring import CAREER_PROJECT_KEYWORDS, CAREER_EDU_KEYWORDS
+
+TOP_CAREERS = 8
+
+# Expanded project ideas with step-by-step guides
+PROJECT_IDEAS = {
+    'Software Developer': [
+        {'title': 'Build a Personal Portfolio Website', 'steps': [
+            'Choose a tech stack (HTML/CSS/JS, Flask, Django, etc.)',
+            'Design the layout and sections (About, Projects, Contact)',
+            'Implement navigation and responsive design',
+            'Deploy on GitHub Pages, Netlify, or Heroku'
+        ]},
+        {'title': 'Create a REST API with Flask', 'steps': [
+            'Set up a Flask project',
+            'Design API endpoints (CRUD)',
+            'Connect to a database (SQLite/MySQL)',
+            'Test with Postman and document the API'
+        ]},
+        {'title': 'Contribute to Open Source', 'steps': [
+            'Find a beginner-friendly project on GitHub',
+            'Read the contribution guidelines',
+            'Fix a bug or add a feature',
+            'Submit a pull request and get feedback'
+        ]},
+        {'title': 'Develop a To-Do List App', 'steps': [
+            'Design the UI and data model',
+            'Implement add/edit/delete functionality',
+            'Add user authentication (optional)',
+            'Deploy and share your app'
+        ]}
+    ],
+    'Data Analyst': [
+        {'title': 'Analyze a Public Dataset', 'steps': [
+            'Find a dataset on Kaggle or data.gov',
+            'Clean and preprocess the data',
+            'Visualize insights with matplotlib or Tableau',
+            'Write a summary report'
+        ]},
+        {'title': 'Build a Dashboard', 'steps': [
+            'Choose a tool (Power BI, Tableau, Dash)',
+            'Connect to a data source',
+            'Create interactive charts and filters',
+            'Publish or share your dashboard'
+        ]},
+        {'title': 'Predict Trends with Regression', 'steps': [
+            'Select a dataset with time series data',
+            'Apply linear regression in Python',
+            'Visualize predictions vs. actuals',
+            'Interpret and present your findings'
+        ]}
+    ],
+    'Data Scientist': [
+        {'title': 'Build a Sentiment Analysis Model', 'steps': [
+            'Collect or download a text dataset (e.g., IMDB reviews)',
+            'Preprocess and tokenize the text',
+            'Train an NLP model (LSTM or BERT)',
+            'Evaluate accuracy and deploy as an API'
+        ]},
+        {'title': 'Image Classification with CNN', 'steps': [
+            'Choose a dataset (e.g., CIFAR-10, Flowers)',
+            'Build a CNN model with TensorFlow/PyTorch',
+            'Train, validate, and tune hyperparameters',
+            'Deploy and test with new images'
+        ]},
+        {'title': 'Recommendation System', 'steps': [
+            'Use a public dataset (e.g., MovieLens)',
+            'Implement collaborative filtering',
+            'Evaluate with precision/recall metrics',
+            'Build a simple demo interface'
+        ]}
+    ],
+    'UI/UX Designer': [
+        {'title': 'Redesign a Popular App', 'steps': [
+            'Choose an app and analyze its UI/UX',
+            'Sketch wireframes for improvements',
+            'Create a Figma prototype',
+            'Present your redesign with rationale'
+        ]},
+        {'title': 'Design a Mobile App', 'steps': [
+            'Pick an app idea (e.g., habit tracker)',
+            'Design user flows and wireframes',
+            'Create high-fidelity mockups',
+            'Test with users and iterate'
+        ]}
+    ],
+    'Project Manager': [
+        {'title': 'Plan a Mock Project', 'steps': [
+            'Define project scope and goals',
+            'Create a timeline with milestones',
+            'Assign roles and responsibilities',
+            'Track progress using Trello or Jira'
+        ]},
+        {'title': 'Simulate a Risk Management Plan', 'steps': [
+            'Identify potential project risks',
+            'Assess likelihood and impact',
+            'Develop mitigation strategies',
+            'Document and review with team'
+        ]}
+    ],
+    'Support Engineer': [
+        {'title': 'Set Up a Virtual Helpdesk', 'steps': [
+            'Choose a helpdesk tool (e.g., Freshdesk, Zendesk)',
+            'Configure ticket categories and workflows',
+            'Create sample tickets and resolve them',
+            'Document common solutions in a knowledge base'
+        ]}
+    ],
+    'Cloud Engineer': [
+        {'title': 'Deploy a Web App to the Cloud', 'steps': [
+            'Choose a cloud provider (AWS, Azure, GCP)',
+            'Set up a virtual server or app service',
+            'Deploy your app and configure DNS',
+            'Set up monitoring and scaling'
+        ]},
+        {'title': 'Build a CI/CD Pipeline', 'steps': [
+            'Set up a GitHub Actions or Jenkins pipeline',
+            'Configure build, test, and deploy stages',
+            'Add notifications on success/failure',
+            'Document the pipeline architecture'
+        ]}
+    ],
+    'Business Analyst': [
+        {'title': 'Business Process Mapping', 'steps': [
+            'Identify a business process to analyse',
+            'Create an AS-IS process diagram',
+            'Identify inefficiencies and propose improvements',
+            'Present your TO-BE process diagram'
+        ]}
+    ],
+}
+
+
+def get_course_links_for_skills(skills):
+    # skills: list of skill names (strings)
+    links = []
+    for skill in skills:
+        q = skill.replace(' ', '+')
+        links.append({
+            'skill': skill.title(),
+            'google': f'https://www.google.com/search?q={q}+course',
+            'coursera': f'https://www.coursera.org/search?query={q}',
+            'udemy': f'https://www.udemy.com/courses/search/?q={q}',
+            'edx': f'https://www.edx.org/search?q={q}',
+            'linkedin': f'https://www.linkedin.com/learning/search?keywords={q}',
+            'khan': f'https://www.khanacademy.org/search?page_search_query={q}'
+        })
+    return links
+
+
+def build_recommendations(resume, interest_area, scorer):
+    """
+    Score every career for ``resume`` and build the display data for the top
+    ones.  Returns the snapshot payload: ``careers`` (top matches, best first)
+    and ``scores`` (raw 0-100 score for every career id, used by saved_careers).
+    """
+    user_skills    = [skill.strip().lower() for skill in resume['skills'].split(',')] if resume['skills'] else []
+    user_education = resume['education'].lower() if resume['education'] else ''
+    user_experience= resume['experience'].lower() if resume['experience'] else ''
+
+    # ALL careers are scored (not just the quiz category) in one vectorised pass
+    scores = scorer.score(user_skills, user_education, user_experience, interest_area)
+
+    # Only the top matches need explanations, links and project ideas
+    enhanced_careers = []
+    for idx in scorer.top_k(scores, TOP_CAREERS):
+        career           = scorer.careers[idx]
+        required_skills  = [s.strip().lower() for s in career['required_skills'].split(',')] if career['required_skills'] else []
+        available_skills = [s for s in required_skills if s in user_skills]
+        missing_skills   = [s for s in required_skills if s not in user_skills]
+
+        # Comprehensive score (0–100)
+        raw_score = int(scores[idx])
+
+        # Build human-readable match explanation
+        explanation = []
+        # Project/experience signals
+        proj_kws = CAREER_PROJECT_KEYWORDS.get(career['title'], [])
+        if proj_kws and user_experience:
+            matched_proj = [kw for kw in proj_kws if kw in user_experience]
+            if matched_proj:
+                explanation.append(f"Project match: your experience mentions {', '.join(matched_proj[:3])}")
+        if available_skills:
+            explanation.append(f"Matched skills: {', '.join(s.title() for s in available_skills)}")
+        if missing_skills:
+            explanation.append(f"Skills to develop: {', '.join(s.title() for s in missing_skills[:4])}")
+        edu_kws = CAREER_EDU_KEYWORDS.get(career['title'], [])
+        if edu_kws and any(kw in user_education for kw in edu_kws):
+            explanation.append("Your education background aligns with this career.")
+        if (career['category'] or '').lower() == interest_area.lower():
+            explanation.append(f"Matches your quiz interest area: {interest_area}")
+
+        enhanced_careers.append({
+            **career,
+            'available_skills':  available_skills,
+            'missing_skills':    missing_skills,
+            'course_links':      get_course_links_for_skills(missing_skills),
+            'project_ideas':     PROJECT_IDEAS.get(career['title'], []),
+            'match_explanation': explanation,
+            'match_score':       round(raw_score / 10, 1),   # 0.0 – 10.0
+            'raw_score':         raw_score,                  # 0 – 100 (used for sorting)
+        })
+
+    return {
+        'careers': enhanced_careers,
+        'scores':  {str(career['id']): int(s) for career, s in zip(scorer.careers, scores)},
+    }
+
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+
+def _ensure_table():
+    # Created on first use, like the other runtime schema tweaks in app.py.
+    # Committed on its own connection, so a caller's rollback cannot undo it
+    # and callers' open transactions are left alone.
+    global _table_ready
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        conn = get_db()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS recommendation_snapshots (
+                        resume_id       INTEGER NOT NULL,
+                        interest_id     INTEGER NOT NULL,
+                        careers_version VARCHAR(32) NOT NULL,
+                        user_id         INTEGER NOT NULL,
+                        payload         JSONB NOT NULL,
+                        created_at      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (resume_id, interest_id, careers_version)
+                    )
+                ''')
+            conn.commit()
+        finally:
+            conn.close()
+        _table_ready = True
+
+
+def _store(cursor, resume, interest, version, payload):
+    cursor.execute('''
+        INSERT INTO recommendation_snapshots (resume_id, interest_id, careers_version, user_id, payload)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (resume_id, interest_id, careers_version)
+        DO UPDATE SET payload = EXCLUDED.payload, created_at = CURRENT_TIMESTAMP
+    ''', (resume['id'], interest['id'], version, resume['user_id'], Json(payload)))
+    # Older quiz attempts and catalogue versions for this resume are never read again
+    cursor.execute('''
+        DELETE FROM recommendation_snapshots
+        WHERE resume_id = %s AND (interest_id <> %s OR careers_version <> %s)
+    ''', (resume['id'], interest['id'], version))
+
+
+def get_snapshot(resume, interest):
+    """
+    Payload for ``resume`` + ``interest`` against the current catalogue,
+    building and storing it first if it does not exist yet.
+    """
+    scorer = scoring.get_scorer()
+    _ensure_table()
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('''
+                SELECT payload FROM recommendation_snapshots
+                WHERE resume_id = %s AND interest_id = %s AND careers_version = %s
+            ''', (resume['id'], interest['id'], scorer.version))
+            row = cursor.fetchone()
+            if row:
+                return row['payload']
+            payload = build_recommendations(resume, interest['interest_area'], scorer)
+            _store(cursor, resume, interest, scorer.version, payload)
+        conn.commit()
+    finally:
+        conn.close()
+    return payload
+
+
+def refresh_snapshot(user_id, resume_id):
+    """
+    Recompute the snapshot for a resume and its latest quiz answer.
+    Called after a quiz submission or resume upload; does nothing until the
+    resume has quiz answers.  Returns the payload or None.
+    """
+    scorer = scoring.get_scorer()
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT * FROM resumes WHERE id = %s AND user_id = %s', (resume_id, user_id))
+            resume = cursor.fetchone()
+            cursor.execute('SELECT * FROM interests WHERE user_id = %s AND resume_id = %s ORDER BY id DESC LIMIT 1', (user_id, resume_id))
+            interest = cursor.fetchone()
+            if not resume or not interest:
+                return None
+            _ensure_table()
+            payload = build_recommendations(resume, interest['interest_area'], scorer)
+            _store(cursor, resume, interest, scorer.version, payload)
+        conn.commit()
+    finally:
+        conn.close()
+    return payload
+
+
+def build_many(pairs, scorer):
+    """
+    Build and store the snapshots of many ``(resume, interest)`` pairs (at
+    most one pair per resume) against ``scorer``, on one connection in one
+    transaction.  Returns the payloads in the order of ``pairs``.
+    """
+    payloads = [build_recommendations(resume, interest['interest_area'], scorer) for resume, interest in pairs]
+    if not pairs:
+        return payloads
+    _ensure_table()
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            execute_values(cursor, '''
+                INSERT INTO recommendation_snapshots (resume_id, interest_id, careers_version, user_id, payload)
+                VALUES %s
+                ON CONFLICT (resume_id, interest_id, careers_version)
+                DO UPDATE SET payload = EXCLUDED.payload, created_at = CURRENT_TIMESTAMP
+            ''', [(resume['id'], interest['id'], scorer.version, resume['user_id'], Json(payload))
+                  for (resume, interest), payload in zip(pairs, payloads)])
+            # As in _store(): older quiz attempts and catalogue versions are never read again
+            execute_values(cursor, '''
+                DELETE FROM recommendation_snapshots s
+                USING (VALUES %s) AS v (resume_id, interest_id, careers_version)
+                WHERE s.resume_id = v.resume_id
+                  AND (s.interest_id <> v.interest_id OR s.careers_version <> v.careers_version)
+            ''', [(resume['id'], interest['id'], scorer.version) for resume, interest in pairs])
+        conn.commit()
+    finally:
+        conn.close()
+    return payloads
+
+
+def delete_for_resume(cursor, resume_id):
+    """Drop snapshots of a deleted resume (runs inside the caller's transaction)."""
+    _ensure_table()
+    cursor.execute('DELETE FROM recommendation_snapshots WHERE resume_id = %s', (resume_id,))
+
+
+def recommended_career_ids(cursor, user_id):
+    """
+    ``(interest_area, career_ids)`` for the quiz result of the user's latest
+    resume, in one query; ``(None, [])`` before any quiz.
+    """
+    cursor.execute('''
+        SELECT i.interest_area,
+               ARRAY(SELECT c.id FROM careers c WHERE c.category = i.interest_area ORDER BY c.id) AS career_ids
+        FROM interests i
+        WHERE i.user_id = %(user_id)s
+          AND i.resume_id = (SELECT id FROM resumes WHERE user_id = %(user_id)s ORDER BY id DESC LIMIT 1)
+        ORDER BY i.id DESC
+        LIMIT 1
+    ''', {'user_id': user_id})
+    row = cursor.fetchone()
+    if not row or not row['interest_area']:
+        return None, []
+    return row['interest_area'], row['career_ids']
@@ -0,0 +1,207 @@
+"""
+Cohort-wide career report export.
+
+Selects the students of a semester and/or branch (columns of the ``users``
+table shared with the main college app) and loads every student's
+recommendation snapshot in one query.  The archive is then produced as a
+stream of chunks: batch by batch, the missing or stale snapshots are built
+in one go and the PDFs rendered and written into the ZIP as they complete.
+The first bytes go out after one batch, not after the whole cohort, and
+neither the web response nor the CLI ever holds the whole archive in memory.
+PDFs go through the reports disk cache, so a second export of an unchanged
+cohort does not render anything.  manifest.csv at the end of the archive
+lists every student's outcome and the export's duration and rate.
+
+Inside a web worker the PDFs are rendered on a few threads: forking a
+threaded gunicorn worker would copy its held locks and open connections into
+the children.  The CLI renders in a process pool of freshly spawned
+interpreters, which is the fast way to export a large cohort from cold.
+
+From the command line (run inside Career_Guidance_SubProject)::
+
+    python -m career_guidance_ai.report_export --semester 7 --branch CSE -o cohort.zip
+"""
+import argparse
+import csv
+import io
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import reports, scoring
+from . import recommendations as recs
+from .db import get_db
+
+log = logging.getLogger(__name__)
+
+PROGRESS_EVERY = 25
+# Students whose missing snapshots are built together before their PDFs render
+BATCH_SIZE = 50
+# Render threads per export in a web worker
+THREAD_WORKERS = 2
+
+_COHORT_SQL = '''
+    SELECT u.id AS user_id, u.name,
+           row_to_json(r) AS resume, row_to_json(i) AS interest, s.payload
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT * FROM resumes WHERE user_id = u.id ORDER BY id DESC LIMIT 1
+    ) r ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT * FROM interests WHERE user_id = u.id AND resume_id = r.id ORDER BY id DESC LIMIT 1
+    ) i ON TRUE
+    LEFT JOIN recommendation_snapshots s
+           ON s.resume_id = r.id AND s.interest_id = i.id AND s.careers_version = %(version)s
+    WHERE (%(semester)s::int IS NULL OR u.semester = %(semester)s::int)
+      AND (%(branch)s::text IS NULL OR u.branch = %(branch)s::text)
+    ORDER BY u.id
+'''
+
+
+def load_cohort(semester=None, branch=None):
+    """
+    ``[(student, inputs_or_None), ...]`` for the cohort.  inputs holds the
+    student's latest ``resume`` and ``interest`` and the snapshot ``payload``,
+    None where it is not built for the current catalogue yet (the export
+    builds it); None marks students without a resume and quiz yet.
+    """
+    version = scoring.get_scorer().version
+    recs._ensure_table()
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(_COHORT_SQL, {'version': version, 'semester': semester, 'branch': branch or None})
+            rows = cursor.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+    cohort = []
+    for row in rows:
+        student = {'id': row['user_id'], 'name': row['name']}
+        inputs = None
+        if row['resume'] and row['interest']:
+            inputs = {'resume': row['resume'], 'interest': row['interest'], 'payload': row['payload']}
+        cohort.append((student, inputs))
+    return cohort
+
+
+def _sources(batch, scorer):
+    # Snapshots not built yet (or built for an older catalogue), built in one go
+    missing = [inputs for _, inputs in batch if inputs['payload'] is None]
+    built = recs.build_many([(inputs['resume'], inputs['interest']) for inputs in missing], scorer)
+    for inputs, payload in zip(missing, built):
+        inputs['payload'] = payload
+    return [reports.career_report_source(student, inputs['payload']['careers']) for student, inputs in batch]
+
+
+def _render(job):
+    # May run in a worker process; only the cache path travels back
+    owner, source = job
+    return reports.render_cached('career_report', source, owner)[1]
+
+
+def _archive_name(student):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', student['name'] or '').strip('_') or 'student'
+    return f"{student['id']:05d}_{slug}.pdf"
+
+
+class _ChunkWriter:
+    """Write-only file object for ZipFile that hands out what was written so far."""
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+
+    def write(self, data):
+        return self._buffer.write(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = self._buffer.getvalue()
+        self._buffer = io.BytesIO()
+        return data
+
+
+def _executor(workers, processes):
+    if processes:
+        # Fresh interpreters: nothing of this process (locks, connections) is copied
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return ThreadPoolExecutor(max_workers=workers or THREAD_WORKERS, thread_name_prefix='report-export')
+
+
+def stream_cohort_zip(cohort, workers=None, progress=None, processes=False):
+    """
+    Yield the ZIP archive of ``cohort`` (from load_cohort) chunk by chunk.
+    ``progress(done, total, elapsed_seconds)`` is called as PDFs complete.
+    With ``processes`` the PDFs are rendered in spawned worker processes
+    (command line only), otherwise on threads.  The archive ends with
+    manifest.csv listing every student's outcome, then summary rows with the
+    number of snapshots built and the export's duration and rate.
+    """
+    out = _ChunkWriter()
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(['user_id', 'name', 'file', 'status'])
+    renderable = [(student, inputs) for student, inputs in cohort if inputs is not None]
+    total, done, built = len(renderable), 0, 0
+    scorer = scoring.get_scorer()
+    started = time.monotonic()
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as archive, \
+            _executor(workers, processes) as executor:
+        for start in range(0, total, BATCH_SIZE):
+            batch = renderable[start:start + BATCH_SIZE]
+            built += sum(1 for _, inputs in batch if inputs['payload'] is None)
+            jobs = [(student['id'], source) for (student, _), source in zip(batch, _sources(batch, scorer))]
+            for (student, _), path in zip(batch, executor.map(_render, jobs, chunksize=4)):
+                name = _archive_name(student)
+                with open(path, 'rb') as f:
+                    archive.writestr(name, f.read())
+                writer.writerow([student['id'], student['name'], name, 'ok'])
+                done += 1
+                if progress and (done % PROGRESS_EVERY == 0 or done == total):
+                    progress(done, total, time.monotonic() - started)
+                yield out.take()
+        for student, inputs in cohort:
+            if inputs is None:
+                writer.writerow([student['id'], student['name'], '', 'no resume or quiz'])
+        elapsed = time.monotonic() - started
+        writer.writerow([])
+        writer.writerow(['', 'summary', '', f'{done} reports, {len(cohort) - total} skipped, {built} snapshots built'])
+        writer.writerow(['', 'duration', '', f'{elapsed:.1f}s ({done / elapsed if elapsed else 0.0:.1f} PDFs/s)'])
+        archive.writestr('manifest.csv', manifest.getvalue())
+    yield out.take()
+
+
+def log_progress(done, total, elapsed):
+    rate = done / elapsed if elapsed else 0.0
+    log.info('Rendered %d/%d reports (%.1f PDFs/s)', done, total, rate)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export career report PDFs for a cohort as a ZIP.')
+    parser.add_argument('--semester', type=int)
+    parser.add_argument('--branch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('-o', '--output', default='career_reports.zip')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stderr)
+
+    started = time.monotonic()
+    cohort = load_cohort(args.semester, args.branch)
+    log.info('Cohort: %d students, %d with reports', len(cohort), sum(1 for _, inputs in cohort if inputs))
+    written = 0
+    with open(args.output, 'wb') as f:
+        for chunk in stream_cohort_zip(cohort, workers=args.workers, progress=log_progress, processes=True):
+            f.write(chunk)
+            written += len(chunk)
+    log.info('Wrote %s (%.1f MB) in %.1fs', args.output, written / 1e6, time.monotonic() - started)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+PDF rendering for career reports and built resumes.
+
+Documents are laid out with reportlab Platypus (wrapped paragraphs, automatic
+page breaks) from shared page templates.  The render functions are pure --
+plain data in, PDF bytes out -- so they can also run in worker processes.
+reportlab is imported by the first render, not when the app starts.
+
+Rendered files are cached on disk under PDF_CACHE_DIR, named by the owning
+user and a hash of the source data and TEMPLATE_VERSION.  The same hash is the
+response ETag, so a repeat download with a matching If-None-Match gets a 304
+before anything is rendered or read from disk.
+
+The cache holds students' personal data, so it does not keep it for long:
+forget_user() drops a user's files when their data changes, and after a write
+a sweep (at most every SWEEP_INTERVAL seconds per process) removes files
+unused for PDF_CACHE_MAX_AGE and then the least recently used ones beyond
+PDF_CACHE_MAX_MB.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from flask import Response, request, send_file
+
+from config import PDF_CACHE_DIR, PDF_CACHE_MAX_AGE, PDF_CACHE_MAX_MB
+
+log = logging.getLogger(__name__)
+
+# Bump when a layout changes so cached files are not served for the old one
+TEMPLATE_VERSION = 1
+SWEEP_INTERVAL = 600
+# Temp files older than this belong to a writer that died
+_STALE_TMP_SECONDS = 3600
+
+
+@lru_cache(maxsize=None)
+def styles():
+    """Paragraph styles by role, built once per process."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    base = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('ReportTitle', parent=base['Title'], fontSize=18, leading=22,
+                                alignment=0, spaceAfter=6),
+        'heading': ParagraphStyle('ReportHeading', parent=base['Heading2'], fontSize=13, leading=16,
+                                  spaceBefore=6, spaceAfter=4),
+        'body': ParagraphStyle('ReportBody', parent=base['BodyText'], fontSize=11, leading=14),
+        'detail': ParagraphStyle('ReportDetail', parent=base['BodyText'], fontSize=10, leading=13,
+                                 leftIndent=12, textColor=colors.HexColor('#333333')),
+        'footer': ParagraphStyle('ReportFooter', parent=base['BodyText'], fontSize=8,
+                                 textColor=colors.grey),
+    }
+
+
+def _text(value):
+    """Escape free text for a Paragraph, keeping its line breaks."""
+    lines = [escape(line.strip()) for line in str(value or '').replace('\r', '').split('\n')]
+    return '<br/>'.join(line for line in lines if line)
+
+
+def _rule(width=1):
+    from reportlab.lib import colors
+    from reportlab.platypus import HRFlowable
+
+    return HRFlowable(width='100%', thickness=width, color=colors.HexColor('#999999'),
+                      spaceBefore=4, spaceAfter=8)
+
+
+def _page_number(canvas, doc):
+    from reportlab.lib import colors
+    from reportlab.lib.units import mm
+
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, 12 * mm, f'Page {doc.page}')
+    canvas.restoreState()
+
+
+def _build(story, pagesize=None, title=''):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesize or A4, title=title,
+                            leftMargin=18 * mm, rightMargin=18 * mm,
+                            topMargin=18 * mm, bottomMargin=20 * mm)
+    doc.build(story, onFirstPage=_page_number, onLaterPages=_page_number)
+    return buffer.getvalue()
+
+
+def render_career_report(user_name, careers):
+    """Top career recommendations of one user."""
+    from reportlab.platypus import KeepTogether, Paragraph, Spacer
+
+    style = styles()
+    title = f'Career Recommendations for {user_name}'
+    story = [Paragraph(escape(title), style['title']), _rule()]
+    for i, career in enumerate(careers, 1):
+        story.append(KeepTogether([
+            Paragraph(f"{i}. {escape(career['title'] or '')}", style['heading']),
+            Paragraph(f"<b>Category:</b> {_text(career['category'])}", style['detail']),
+            Paragraph(f"<b>Skills:</b> {_text(career['required_skills'])}", style['detail']),
+            Paragraph(f"<b>Description:</b> {_text(career['description'])}", style['detail']),
+            Spacer(1, 6),
+        ]))
+    return _build(story, title=title)
+
+
+RESUME_SECTIONS = (
+    ('Summary', 'summary'),
+    ('Education', 'education'),
+    ('Experience', 'experience'),
+    ('Skills', 'skills'),
+    ('Projects', 'projects'),
+    ('Certifications', 'certifications'),
+    ('Contact Info', 'contact_info'),
+)
+
+
+def render_built_resume(resume):
+    """A resume from the resume builder (one ``resumes_builder`` row)."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import Paragraph
+
+    style = styles()
+    story = [Paragraph(escape(resume['title'] or ''), style['title']), _rule()]
+    for header, field in RESUME_SECTIONS:
+        story.append(Paragraph(f'{header}:', style['heading']))
+        body = _text(resume.get(field))
+        if body:
+            story.append(Paragraph(body, style['body']))
+        story.append(_rule(0.5))
+    return _build(story, pagesize=letter, title=resume['title'] or '')
+
+
+def career_report_source(user, careers):
+    """The data a career report is rendered from (also its cache key input)."""
+    fields = ('title', 'category', 'required_skills', 'description')
+    return {'user_name': user['name'], 'careers': [{f: c.get(f) for f in fields} for c in careers[:5]]}
+
+
+def resume_source(resume):
+    fields = ['title'] + [field for _, field in RESUME_SECTIONS]
+    return {f: resume.get(f) for f in fields}
+
+
+RENDERERS = {
+    'career_report': lambda source: render_career_report(source['user_name'], source['careers']),
+    'built_resume': render_built_resume,
+}
+
+
+def content_key(kind, source):
+    raw = json.dumps([kind, TEMPLATE_VERSION, source], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def sweep(max_age=PDF_CACHE_MAX_AGE, max_bytes=PDF_CACHE_MAX_MB * 1024 * 1024):
+    """Delete cached PDFs unused for ``max_age`` seconds, then the oldest beyond ``max_bytes``."""
+    now = time.time()
+    files = []
+    for entry in os.scandir(PDF_CACHE_DIR):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        if entry.name.endswith('.tmp'):
+            if now - stat.st_mtime > _STALE_TMP_SECONDS:
+                _remove(entry.path)
+        elif now - stat.st_mtime > max_age:
+            _remove(entry.path)
+        else:
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+
+def _maybe_sweep():
+    global _last_sweep
+    with _sweep_lock:
+        if time.monotonic() - _last_sweep < SWEEP_INTERVAL:
+            return
+        _last_sweep = time.monotonic()
+    try:
+        sweep()
+    except OSError:
+        log.exception('Could not sweep the PDF cache')
+
+
+def forget_user(user_id):
+    """Delete every cached PDF of ``user_id``; call after their data changes."""
+    for path in glob.glob(os.path.join(PDF_CACHE_DIR, f'{int(user_id)}_*.pdf')):
+        _remove(path)
+
+
+def render_cached(kind, source, owner):
+    """
+    ``(key, path)`` of the rendered PDF, rendering it only on a cache miss.
+    ``owner`` is the id of the user whose data ``source`` holds.
+    """
+    key = content_key(kind, source)
+    path = os.path.join(PDF_CACHE_DIR, f'{int(owner)}_{key}.pdf')
+    try:
+        # A hit counts as a use for the sweep
+        os.utime(path)
+    except FileNotFoundError:
+        data = RENDERERS[kind](source)
+        os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+        # Write to a temp file first so a concurrent reader never sees half a PDF
+        fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        _maybe_sweep()
+    return key, path
+
+
+def send_pdf(kind, source, download_name, owner):
+    """Serve the PDF for ``source`` with an ETag; 304 when the client already has it."""
+    key = content_key(kind, source)
+    if request.if_none_match.contains(key):
+        response = Response(status=304)
+        response.set_etag(key)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+    key, path = render_cached(kind, source, owner)
+    response = send_file(path, as_attachment=True, download_name=download_name,
+                         mimetype='application/pdf', etag=key, conditional=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,78 @@
+"""
+Salary statistics per job title and per (title, location).
+
+One grouped query over ``jobs`` computes avg / median / p25 / p75 for every
+title and every title+location pair; the result is held in memory so
+recommendations() and job_detail() never hit the database for salaries.
+"""
+from .cache import CachedValue
+from .db import get_db
+
+_STATS_SQL = '''
+    SELECT title, location, GROUPING(location) AS all_locations,
+           COUNT(*) AS jobs,
+           AVG(salary) AS avg_salary,
+           percentile_cont(0.25) WITHIN GROUP (ORDER BY salary::float8) AS p25,
+           percentile_cont(0.5)  WITHIN GROUP (ORDER BY salary::float8) AS median,
+           percentile_cont(0.75) WITHIN GROUP (ORDER BY salary::float8) AS p75
+    FROM jobs
+    WHERE salary IS NOT NULL
+    GROUP BY GROUPING SETS ((title, location), (title))
+'''
+
+
+def _as_int(value):
+    return int(value) if value else None
+
+
+def _load_stats():
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(_STATS_SQL)
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    by_title, by_location = {}, {}
+    for row in rows:
+        stats = {
+            'jobs':   row['jobs'],
+            'avg':    _as_int(row['avg_salary']),
+            'median': _as_int(row['median']),
+            'p25':    _as_int(row['p25']),
+            'p75':    _as_int(row['p75']),
+        }
+        if row['all_locations']:
+            by_title[row['title']] = stats
+        else:
+            by_location[(row['title'], row['location'])] = stats
+    return by_title, by_location
+
+
+_stats = CachedValue(_load_stats, ttl=300)
+
+
+def get_salary_stats(title, location=None):
+    """
+    Stats for ``title`` in ``location`` if that pair has salary data,
+    otherwise for ``title`` across all locations; None when nothing is known.
+    """
+    by_title, by_location = _stats.get()
+    if location:
+        stats = by_location.get((title, location))
+        if stats and stats['avg']:
+            return dict(stats, scope='location')
+    stats = by_title.get(title)
+    if stats and stats['avg']:
+        return dict(stats, scope='title')
+    return None
+
+
+def get_average_salary(title, location=None):
+    stats = get_salary_stats(title, location)
+    return stats['avg'] if stats else None
+
+
+def invalidate():
+    """Call after any write to the ``jobs`` table."""
+    _stats.invalidate()
@@ -0,0 +1,297 @@
+"""
+Background jobs and the single process that runs them.
+
+Web workers no longer each start their own scheduler.  How jobs run is set by
+SCHEDULER_MODE:
+
+* ``embedded`` (default): every web process competes for a leader lock and
+  only the holder runs the scheduler.  Non-leaders retry periodically, so a
+  new leader takes over when the old one exits.
+* ``external``: web processes never schedule; run the dedicated runner::
+
+      python -m career_guidance_ai.scheduler
+
+* ``off``: nothing is scheduled.
+
+With SCHEDULER_START=post_fork (set by gunicorn.conf.py when the app is
+preloaded) the election is not started when the app is imported in the
+gunicorn master, where its thread would not survive the fork; each worker
+starts it from the post_fork hook instead.
+
+The lock is a Postgres session advisory lock (SCHEDULER_LOCK=postgres, needs a
+session-mode connection, not a transaction pooler) or an fcntl lock on
+SCHEDULER_LOCK_FILE for single-host deployments (SCHEDULER_LOCK=file).  The
+runner takes the same lock, so an embedded leader and a runner never both
+fire.  Each job run is timed and recorded in ``scheduler_job_runs``;
+``max_instances=1`` plus a per-job advisory lock keep a slow run from
+overlapping the next one.
+"""
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime
+
+from config import SCHEDULER_MODE, SCHEDULER_LOCK, SCHEDULER_LOCK_FILE, SCHEDULER_START
+from . import gamification, mailer
+from .db import get_db
+
+log = logging.getLogger(__name__)
+
+# Arbitrary constant shared by every process of this app
+ADVISORY_LOCK_KEY = 0x43475341
+LEADER_RETRY_SECONDS = 60
+
+# job id -> (function, trigger arguments)
+JOBS = {
+    'weekly_progress_emails': (mailer.send_weekly_progress_emails,
+                               {'trigger': 'cron', 'day_of_week': 'mon', 'hour': 8}),
+    # Web processes apply their own events within seconds; this picks up the rest
+    'gamification_events': (gamification.process_all, {'trigger': 'interval', 'minutes': 5}),
+}
+
+_JOB_DEFAULTS = {'max_instances': 1, 'coalesce': True, 'misfire_grace_time': 3600}
+
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+
+class PostgresLeaderLock:
+    """Session advisory lock held on a dedicated connection while leading."""
+
+    def __init__(self, key=ADVISORY_LOCK_KEY):
+        self.key = key
+        self._conn = None
+
+    def acquire(self):
+        conn = get_db()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s) AS locked', (self.key,))
+            locked = cursor.fetchone()['locked']
+        if locked:
+            self._conn = conn
+        else:
+            conn.close()
+        return locked
+
+    def held(self):
+        # The lock lives as long as the session; a dropped connection loses it
+        try:
+            with self._conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def release(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+class FileLeaderLock:
+    """Exclusive fcntl lock on a local file (POSIX only, one host)."""
+
+    def __init__(self, path=SCHEDULER_LOCK_FILE):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        import fcntl
+        lock_file = open(self.path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def held(self):
+        return self._file is not None
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _ensure_schema(cursor):
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if _schema_ready:
+            return
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scheduler_job_runs (
+                id          SERIAL PRIMARY KEY,
+                job_id      VARCHAR(100) NOT NULL,
+                started_at  TIMESTAMP NOT NULL,
+                duration_ms INTEGER NOT NULL,
+                status      VARCHAR(10) NOT NULL,
+                error       TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS scheduler_job_runs_job_idx ON scheduler_job_runs (job_id, started_at DESC)')
+        cursor.connection.commit()
+        _schema_ready = True
+
+
+def _record_run(job_id, started_at, duration_ms, status, error):
+    try:
+        conn = get_db()
+        try:
+            with conn.cursor() as cursor:
+                _ensure_schema(cursor)
+                cursor.execute('''
+                    INSERT INTO scheduler_job_runs (job_id, started_at, duration_ms, status, error)
+                    VALUES (%s, %s, %s, %s, %s)
+                ''', (job_id, started_at, duration_ms, status, error))
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        # Metrics must never take the job down with them
+        log.exception('Could not record run of %s', job_id)
+
+
+def run_job(job_id):
+    """
+    Run one job now, timing it and recording the outcome.  A per-job advisory
+    lock skips the run if the same job is still going in any process (e.g. a
+    manual ``--once`` run overlapping the schedule).
+    """
+    func, _ = JOBS[job_id]
+    guard = get_db()
+    try:
+        guard.autocommit = True
+        with guard.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s, hashtext(%s)) AS locked', (ADVISORY_LOCK_KEY, job_id))
+            if not cursor.fetchone()['locked']:
+                log.warning('Scheduled job %s is already running; skipped', job_id)
+                _record_run(job_id, datetime.now(), 0, 'skipped', None)
+                return None
+        started_at = datetime.now()
+        start = time.monotonic()
+        status, error = 'ok', None
+        try:
+            return func()
+        except Exception as exc:
+            status, error = 'failed', repr(exc)[:1000]
+            log.exception('Scheduled job %s failed', job_id)
+        finally:
+            duration_ms = int((time.monotonic() - start) * 1000)
+            log.info('Scheduled job %s finished in %d ms (%s)', job_id, duration_ms, status)
+            _record_run(job_id, started_at, duration_ms, status, error)
+    finally:
+        # Closing the session releases the per-job lock
+        guard.close()
+
+
+def build_scheduler():
+    # Imported here: only the leader (or the runner) ever needs APScheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    scheduler = BackgroundScheduler(job_defaults=_JOB_DEFAULTS)
+    for job_id, (_, trigger) in JOBS.items():
+        scheduler.add_job(run_job, args=(job_id,), id=job_id, replace_existing=True, **trigger)
+    return scheduler
+
+
+def _make_lock():
+    return FileLeaderLock() if SCHEDULER_LOCK == 'file' else PostgresLeaderLock()
+
+
+class LeaderElection(threading.Thread):
+    """
+    Daemon thread that keeps trying to become leader and runs the scheduler
+    only while it holds the lock.
+    """
+
+    def __init__(self, lock=None, retry_seconds=LEADER_RETRY_SECONDS):
+        super().__init__(name='scheduler-leader', daemon=True)
+        self.lock = lock or _make_lock()
+        self.retry_seconds = retry_seconds
+        self.scheduler = None
+        self._stopping = threading.Event()
+
+    @property
+    def is_leader(self):
+        return self.scheduler is not None
+
+    def _step(self):
+        if self.is_leader:
+            if not self.lock.held():
+                log.warning('Scheduler leader lock lost; stopping jobs')
+                self._resign()
+            return
+        try:
+            acquired = self.lock.acquire()
+        except Exception:
+            log.exception('Scheduler leader election failed')
+            return
+        if acquired:
+            log.info('Acquired scheduler leader lock; starting jobs')
+            self.scheduler = build_scheduler()
+            self.scheduler.start()
+
+    def _resign(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = None
+        self.lock.release()
+
+    def run(self):
+        while not self._stopping.is_set():
+            self._step()
+            self._stopping.wait(self.retry_seconds)
+        self._resign()
+
+    def stop(self):
+        self._stopping.set()
+
+
+_election = None
+
+
+def start_embedded(after_fork=False):
+    """
+    Called by the web app at import (and, with SCHEDULER_START=post_fork, by
+    each forked worker with ``after_fork=True``); starts leader election
+    unless disabled.
+    """
+    global _election
+    if SCHEDULER_MODE != 'embedded' or _election is not None:
+        return None
+    if after_fork != (SCHEDULER_START == 'post_fork'):
+        return None
+    _election = LeaderElection()
+    _election.start()
+    return _election
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the Career Guidance background jobs.')
+    parser.add_argument('--once', choices=sorted(JOBS), help='run one job immediately and exit')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if args.once:
+        run_job(args.once)
+        return
+    election = LeaderElection()
+    election.start()
+    try:
+        while election.is_alive():
+            election.join(1)
+    except KeyboardInterrupt:
+        election.stop()
+        election.join()
+
+
+if __name__ == '__main__':
+    main()
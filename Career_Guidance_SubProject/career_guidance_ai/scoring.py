@@ -0,0 +1,254 @@
+"""
+Career match scoring.
+
+calculate_comprehensive_score() is the reference scorer for a single career.
+CareerScorer produces the exact same 0–100 scores for every career at once:
+keyword, skill and education lookups are precomputed into career x term
+matrices when the catalogue is loaded, so a request only has to encode the
+resume as term vectors and run a handful of NumPy matrix-vector products.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+from .cache import CachedValue
+from .db import get_db
+
+# ── Career domain keyword mapping for project-based matching ─────────────────
+CAREER_PROJECT_KEYWORDS = {
+    'Software Developer': [
+        'app', 'application', 'software', 'web app', 'system', 'api',
+        'backend', 'frontend', 'full stack', 'react', 'django', 'flask',
+        'spring', 'node', 'website', 'platform', 'portal', 'developed',
+        'built', 'created', 'implemented', 'deployed', 'rest api',
+    ],
+    'Data Analyst': [
+        'data analysis', 'analytics', 'dashboard', 'visualization', 'report',
+        'excel', 'tableau', 'power bi', 'sql', 'dataset', 'statistics',
+        'insight', 'trend', 'business intelligence', 'kpi', 'metric',
+    ],
+    'Data Scientist': [
+        'machine learning', 'ml', 'model', 'prediction', 'classification',
+        'regression', 'neural network', 'deep learning', 'nlp', 'ai',
+        'training', 'scikit', 'tensorflow', 'pytorch', 'xgboost', 'bert',
+        'lstm', 'computer vision', 'feature engineering',
+    ],
+    'UI/UX Designer': [
+        'design', 'ui', 'ux', 'figma', 'prototype', 'wireframe',
+        'user interface', 'user experience', 'mockup', 'redesign',
+        'creative', 'visual', 'branding', 'graphic', 'adobe xd',
+    ],
+    'Cloud Engineer': [
+        'cloud', 'aws', 'azure', 'gcp', 'deploy', 'docker', 'kubernetes',
+        'devops', 'ci/cd', 'infrastructure', 'server', 'microservice',
+        'container', 'jenkins', 'terraform', 'heroku', 'vercel',
+    ],
+    'Project Manager': [
+        'manage', 'team', 'project management', 'agile', 'scrum',
+        'sprint', 'planning', 'coordination', 'stakeholder', 'milestone',
+        'budget', 'timeline', 'delivery', 'leadership', 'led team',
+    ],
+    'Support Engineer': [
+        'support', 'helpdesk', 'troubleshoot', 'maintenance', 'documentation',
+        'ticket', 'technical support', 'client', 'customer support',
+    ],
+    'Business Analyst': [
+        'business', 'requirement', 'process', 'strategy', 'stakeholder',
+        'workflow', 'analysis', 'report', 'business intelligence', 'erp',
+    ],
+}
+
+CAREER_EDU_KEYWORDS = {
+    'Software Developer': ['computer', 'software', 'bca', 'mca', 'b.tech', 'btech', 'cse', 'it ', 'information technology'],
+    'Data Analyst': ['statistics', 'mathematics', 'data', 'analytics', 'msc', 'computer', 'it '],
+    'Data Scientist': ['statistics', 'mathematics', 'data science', 'machine learning', 'computer', 'msc', 'phd'],
+    'UI/UX Designer': ['design', 'computer', 'art', 'media', 'hci', 'it '],
+    'Cloud Engineer': ['computer', 'networking', 'it ', 'software', 'b.tech', 'btech', 'information technology'],
+    'Project Manager': ['management', 'mba', 'computer', 'business', 'b.tech', 'btech'],
+    'Support Engineer': ['computer', 'networking', 'it ', 'information technology'],
+    'Business Analyst': ['business', 'mba', 'management', 'commerce', 'economics', 'bba'],
+}
+
+
+def calculate_comprehensive_score(career, user_skills, user_education, user_experience, quiz_interest_area):
+    """
+    Calculate a comprehensive match score (0–100) for a career recommendation.
+    Weights: Projects/Experience 40% | Skills 35% | Education 15% | Quiz 10%
+    """
+    career_title    = career.get('title', '')
+    career_category = career.get('category', '')
+    required_skills = [s.strip().lower() for s in (career.get('required_skills', '') or '').split(',') if s.strip()]
+
+    score = 0
+
+    # 1. Project / experience match  (max 40 pts) ─────────────────────────────
+    project_keywords = CAREER_PROJECT_KEYWORDS.get(career_title, [])
+    if project_keywords and user_experience:
+        exp_lower = user_experience.lower()
+        matched   = sum(1 for kw in project_keywords if kw in exp_lower)
+        # Scale: ≥5 keyword matches → full 40 pts
+        score += min(40, int(matched / max(len(project_keywords), 1) * 160))
+    elif user_experience:
+        title_words = [w.lower() for w in career_title.split() if len(w) > 3]
+        if any(w in user_experience.lower() for w in title_words):
+            score += 15
+
+    # 2. Skill match  (max 35 pts) ────────────────────────────────────────────
+    if required_skills and user_skills:
+        available    = [s for s in required_skills if s in user_skills]
+        skill_ratio  = len(available) / len(required_skills)
+        score       += int(skill_ratio * 35)
+
+    # 3. Education match  (max 15 pts) ────────────────────────────────────────
+    edu_keywords = CAREER_EDU_KEYWORDS.get(career_title, [])
+    if edu_keywords and user_education:
+        if any(kw in user_education.lower() for kw in edu_keywords):
+            score += 15
+
+    # 4. Quiz interest area alignment  (max 10 pts) ───────────────────────────
+    if quiz_interest_area and career_category:
+        if career_category.lower() == quiz_interest_area.lower():
+            score += 10
+        elif (career_category.lower() in quiz_interest_area.lower()
+              or quiz_interest_area.lower() in career_category.lower()):
+            score += 5
+
+    return min(score, 100)
+
+
+class CareerScorer:
+    """Precomputed scoring matrices for one snapshot of the ``careers`` table."""
+
+    def __init__(self, careers):
+        self.careers = [dict(c) for c in careers]
+        self.version = careers_version(self.careers)
+
+        titles     = [c.get('title', '') or '' for c in self.careers]
+        categories = [c.get('category', '') or '' for c in self.careers]
+        required   = [[s.strip().lower() for s in (c.get('required_skills', '') or '').split(',') if s.strip()]
+                      for c in self.careers]
+
+        # 1. Project keywords (counted, so duplicate keywords weigh like the scalar loop)
+        proj_lists = [CAREER_PROJECT_KEYWORDS.get(t, []) for t in titles]
+        self._proj_terms, self._proj_matrix = _term_matrix(proj_lists)
+        self._proj_len = np.array([len(k) for k in proj_lists], dtype=np.int64)
+        self._has_proj = self._proj_len > 0
+
+        # Fallback for careers without a keyword list: long words of the title
+        title_words = [[w.lower() for w in t.split() if len(w) > 3] if not proj_lists[i] else []
+                       for i, t in enumerate(titles)]
+        self._title_terms, self._title_matrix = _term_matrix(title_words)
+
+        # 2. Required skills
+        self._skill_terms, self._skill_matrix = _term_matrix(required)
+        self._skill_len = np.array([len(r) for r in required], dtype=np.int64)
+
+        # 3. Education keywords
+        edu_lists = [CAREER_EDU_KEYWORDS.get(t, []) for t in titles]
+        self._edu_terms, self._edu_matrix = _term_matrix(edu_lists)
+
+        # 4. Quiz category — scored once per distinct category, then broadcast
+        cats = [c.lower() for c in categories]
+        self._categories, self._category_codes = np.unique(np.array(cats, dtype=object), return_inverse=True) \
+            if cats else (np.array([], dtype=object), np.array([], dtype=np.int64))
+
+    def __len__(self):
+        return len(self.careers)
+
+    def score(self, user_skills, user_education, user_experience, quiz_interest_area):
+        """Return an int array of 0–100 scores, one per career, in catalogue order."""
+        n = len(self.careers)
+        score = np.zeros(n, dtype=np.int64)
+        if not n:
+            return score
+
+        if user_experience:
+            exp_lower = user_experience.lower()
+            matched = self._proj_matrix @ _presence(self._proj_terms, exp_lower)
+            proj_pts = np.minimum(40, np.floor(matched / np.maximum(self._proj_len, 1) * 160)).astype(np.int64)
+            title_hit = (self._title_matrix @ _presence(self._title_terms, exp_lower)) > 0
+            score += np.where(self._has_proj, proj_pts, np.where(title_hit, 15, 0))
+
+        if user_skills:
+            skill_set = set(user_skills)
+            available = self._skill_matrix @ _presence(self._skill_terms, skill_set)
+            ratio = available / np.maximum(self._skill_len, 1)
+            score += np.where(self._skill_len > 0, np.floor(ratio * 35), 0).astype(np.int64)
+
+        if user_education:
+            edu_hit = (self._edu_matrix @ _presence(self._edu_terms, user_education.lower())) > 0
+            score += np.where(edu_hit, 15, 0)
+
+        if quiz_interest_area:
+            quiz = quiz_interest_area.lower()
+            cat_pts = np.array([
+                0 if not c else 10 if c == quiz else 5 if (c in quiz or quiz in c) else 0
+                for c in self._categories
+            ], dtype=np.int64)
+            score += cat_pts[self._category_codes]
+
+        return np.minimum(score, 100)
+
+    @staticmethod
+    def top_k(scores, k):
+        """
+        Indices of the ``k`` best scores, highest first.
+        Ties keep catalogue order, matching sorted(..., reverse=True)[:k].
+        """
+        n = len(scores)
+        if k <= 0 or n == 0:
+            return np.array([], dtype=np.int64)
+        if k >= n:
+            return np.argsort(-scores, kind='stable')
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+        return candidates[np.argsort(-scores[candidates], kind='stable')][:k]
+
+
+def _term_matrix(term_lists):
+    """Build a (rows x vocabulary) count matrix from a list of term lists."""
+    vocab = {}
+    for terms in term_lists:
+        for t in terms:
+            vocab.setdefault(t, len(vocab))
+    matrix = np.zeros((len(term_lists), len(vocab)), dtype=np.int64)
+    for row, terms in enumerate(term_lists):
+        for t in terms:
+            matrix[row, vocab[t]] += 1
+    return list(vocab), matrix
+
+
+def _presence(terms, haystack):
+    """0/1 vector: is each term contained in ``haystack`` (a string or a set)."""
+    return np.fromiter((t in haystack for t in terms), dtype=np.int64, count=len(terms))
+
+
+def careers_version(careers):
+    """Content hash of the catalogue; identical in every worker for the same rows."""
+    blob = json.dumps([dict(c) for c in careers], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode('utf-8')).hexdigest()[:16]
+
+
+def _load_scorer():
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT * FROM careers ORDER BY id')
+            careers = cursor.fetchall()
+    finally:
+        conn.close()
+    return CareerScorer(careers)
+
+
+_scorer = CachedValue(_load_scorer, ttl=300)
+
+
+def get_scorer():
+    """Scorer for the current catalogue (rebuilt after invalidate() or the TTL)."""
+    return _scorer.get()
+
+
+def invalidate():
+    """Call after any write to the ``careers`` table."""
+    _scorer.invalidate()
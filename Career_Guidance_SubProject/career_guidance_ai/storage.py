@@ -0,0 +1,263 @@
+"""
+Object storage for user-uploaded images.
+
+Two backends share one small interface (put / delete / public_url):
+
+* SupabaseStorage talks to Supabase Storage over one pooled requests.Session
+  with connect/read timeouts and retries on transient errors.
+* LocalStorage writes under LOCAL_STORAGE_DIR and is served by the app's
+  ``/media/<name>`` route, so uploads work offline and in development.
+
+STORAGE_BACKEND selects the backend.  Images are downscaled and re-encoded as
+WebP before upload (prepare_image), and replaced objects are deleted on a
+background thread so the request never waits for the delete.
+
+Object names carry a hash of their content and square thumbnails are stored
+next to the original as ``<stem>.<size>.webp``, so every URL is immutable and
+is served with a one-year Cache-Control.  Thumbnails are made at upload time,
+or on first request (ensure_thumbnail) for pictures uploaded before; names
+that are themselves thumbnails are refused, so derivatives never nest.
+
+Pillow and requests are imported on first use, not when the app starts.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
+from flask import url_for
+
+from config import (SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, SUPABASE_BUCKET,
+                    STORAGE_BACKEND, LOCAL_STORAGE_DIR)
+from .cache import TTLCache
+
+log = logging.getLogger(__name__)
+
+MAX_IMAGE_SIZE = 512
+WEBP_QUALITY = 85
+# Square avatar sizes (CSS px x2 for high-DPI screens)
+THUMBNAIL_SIZES = (128, 256)
+# (connect, read) seconds
+TIMEOUT = (3.05, 20)
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+_THUMBNAIL_RE = re.compile(r'\.\d+\.webp$')
+
+
+class StorageError(Exception):
+    pass
+
+
+def _open_image(data):
+    from PIL import Image, ImageOps
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise StorageError(f'Not a valid image: {exc}') from exc
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    return image
+
+
+def _encode_webp(image):
+    out = io.BytesIO()
+    image.save(out, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return out.getvalue()
+
+
+def prepare_image(data, max_size=MAX_IMAGE_SIZE):
+    """
+    Downscale ``data`` to fit ``max_size`` px and re-encode it as WebP.
+    Returns ``(bytes, 'webp')``; raises StorageError if it is not an image.
+    """
+    from PIL import Image
+
+    image = _open_image(data)
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    return _encode_webp(image), 'webp'
+
+
+def make_thumbnail(data, size):
+    """Centre-cropped ``size`` x ``size`` WebP of the image in ``data``."""
+    from PIL import Image, ImageOps
+
+    return _encode_webp(ImageOps.fit(_open_image(data), (size, size), Image.LANCZOS))
+
+
+def thumbnail_name(name, size):
+    return f"{name.rsplit('.', 1)[0]}.{size}.webp"
+
+
+def is_thumbnail(name):
+    return _THUMBNAIL_RE.search(name) is not None
+
+
+class SupabaseStorage:
+    def __init__(self, url=SUPABASE_URL, key=SUPABASE_SERVICE_ROLE_KEY, bucket=SUPABASE_BUCKET):
+        self.url = url.rstrip('/')
+        self.bucket = bucket
+        self._key = key
+
+    @cached_property
+    def session(self):
+        # Built by the first call, so the backend created at import loads no HTTP stack
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = requests.Session()
+        session.headers['Authorization'] = f'Bearer {self._key}'
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset({'GET', 'POST', 'PUT', 'DELETE'}))
+        session.mount('https://', HTTPAdapter(pool_maxsize=10, max_retries=retry))
+        return session
+
+    def _object_url(self, name):
+        return f'{self.url}/storage/v1/object/{self.bucket}/{name}'
+
+    def _authenticated_url(self, name):
+        return f'{self.url}/storage/v1/object/authenticated/{self.bucket}/{name}'
+
+    def put(self, name, data, content_type):
+        # x-upsert makes a retried POST idempotent; names are immutable, so the
+        # CDN and browsers may keep them for a year
+        response = self.session.post(self._object_url(name), data=data, timeout=TIMEOUT,
+                                     headers={'Content-Type': content_type, 'x-upsert': 'true',
+                                              'cache-control': f'max-age={CACHE_MAX_AGE}'})
+        if response.status_code not in (200, 201):
+            raise StorageError(response.text)
+
+    def get(self, name):
+        response = self.session.get(self._authenticated_url(name), timeout=TIMEOUT)
+        if response.status_code in (400, 404):
+            return None
+        if response.status_code != 200:
+            raise StorageError(response.text)
+        return response.content
+
+    def exists(self, name):
+        response = self.session.head(self._authenticated_url(name), timeout=TIMEOUT)
+        if response.status_code not in (200, 400, 404):
+            raise StorageError(f'HTTP {response.status_code}')
+        return response.status_code == 200
+
+    def delete(self, name):
+        response = self.session.delete(self._object_url(name), timeout=TIMEOUT)
+        if response.status_code not in (200, 204, 404):
+            raise StorageError(response.text)
+
+    def public_url(self, name):
+        return f'{self.url}/storage/v1/object/public/{self.bucket}/{name}'
+
+
+class LocalStorage:
+    def __init__(self, root=LOCAL_STORAGE_DIR):
+        self.root = root
+
+    def path(self, name):
+        return os.path.join(self.root, os.path.basename(name))
+
+    def put(self, name, data, content_type):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.path(name) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self.path(name))
+
+    def get(self, name):
+        try:
+            with open(self.path(name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    def delete(self, name):
+        try:
+            os.remove(self.path(name))
+        except FileNotFoundError:
+            pass
+
+    def public_url(self, name):
+        return url_for('media_file', filename=name)
+
+
+backend = LocalStorage() if STORAGE_BACKEND == 'local' else SupabaseStorage()
+
+_deleter = ThreadPoolExecutor(max_workers=2, thread_name_prefix='storage-delete')
+
+# Thumbnail names already known to exist, so lookups after the first are free;
+# bounded, and entries expire so a process never holds every name it has seen
+_known_thumbnails = TTLCache(ttl=24 * 3600, maxsize=4096)
+
+
+def _delete_quietly(name):
+    for obj in [name] + [thumbnail_name(name, size) for size in THUMBNAIL_SIZES]:
+        try:
+            backend.delete(obj)
+        except Exception:
+            log.exception('Could not delete stored object %s', obj)
+        _known_thumbnails.pop(obj)
+
+
+def delete_later(name):
+    """Delete ``name`` and its thumbnails in the background; failures are only logged."""
+    if name:
+        _deleter.submit(_delete_quietly, name)
+
+
+def upload_image(prefix, data):
+    """
+    Downscale, re-encode and store an uploaded image plus its thumbnails.
+    Returns the object name, which is derived from the stored content.
+    """
+    data, ext = prepare_image(data)
+    name = f'{prefix}_{hashlib.sha256(data).hexdigest()[:24]}.{ext}'
+    backend.put(name, data, f'image/{ext}')
+    for size in THUMBNAIL_SIZES:
+        thumb = thumbnail_name(name, size)
+        backend.put(thumb, make_thumbnail(data, size), 'image/webp')
+        _known_thumbnails.set(thumb, True)
+    return name
+
+
+def known_thumbnail(name, size):
+    """Name of the ``size`` thumbnail of ``name`` if this process knows it exists, else None."""
+    thumb = thumbnail_name(name, size)
+    return thumb if _known_thumbnails.get(thumb) else None
+
+
+def ensure_thumbnail(name, size):
+    """
+    Name of the ``size`` thumbnail of ``name``, generating it if missing.
+    Callers check that ``name`` is an image in use; thumbnails of thumbnails
+    are refused with StorageError.
+    """
+    if size not in THUMBNAIL_SIZES or is_thumbnail(name):
+        raise StorageError(f'No thumbnail for {name} at {size}px')
+    thumb = thumbnail_name(name, size)
+    if _known_thumbnails.get(thumb) or backend.exists(thumb):
+        _known_thumbnails.set(thumb, True)
+        return thumb
+    data = backend.get(name)
+    if data is None:
+        raise StorageError(f'No such object: {name}')
+    backend.put(thumb, make_thumbnail(data, size), 'image/webp')
+    _known_thumbnails.set(thumb, True)
+    return thumb
+
+
+def public_url(name):
+    return backend.public_url(name) if name else None
+
+
+def thumbnail_url(name, size=THUMBNAIL_SIZES[0]):
+    """Stable app URL for a thumbnail; it redirects to the stored derivative."""
+    return url_for('profile_thumbnail', size=size, filename=name) if name else None
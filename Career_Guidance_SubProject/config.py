@@ -15,3 +15,30 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'your_super_secret_key_123')
 SUPABASE_URL = os.getenv('SUPABASE_URL', 'https://sjvzrzqzftixopjgiuos.supabase.co')
 SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY', '')
 SUPABASE_BUCKET = 'user_logo'
+# 'supabase', or 'local' to keep uploaded images under LOCAL_STORAGE_DIR (offline/dev)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'supabase')
+LOCAL_STORAGE_DIR = os.getenv('LOCAL_STORAGE_DIR', os.path.join(os.path.dirname(__file__), 'uploads', 'storage'))
+
+# Rendered PDFs, named by owner and a hash of their content; safe to delete at any time.
+# Files unused for PDF_CACHE_MAX_AGE seconds are swept, oldest first beyond PDF_CACHE_MAX_MB
+PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'cache', 'pdf'))
+PDF_CACHE_MAX_AGE = int(os.getenv('PDF_CACHE_MAX_AGE', str(7 * 24 * 3600)))
+PDF_CACHE_MAX_MB = int(os.getenv('PDF_CACHE_MAX_MB', '200'))
+
+# Outgoing mail (weekly progress emails); leave SMTP_USER empty for servers without auth
+SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.example.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_USER = os.getenv('SMTP_USER', '')
+SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '1') == '1'
+MAIL_FROM = os.getenv('MAIL_FROM', SMTP_USER or 'your_email@example.com')
+MAIL_POOL_SIZE = int(os.getenv('MAIL_POOL_SIZE', '4'))
+
+# Background jobs: 'embedded' (web processes elect one leader), 'external'
+# (python -m career_guidance_ai.scheduler) or 'off'
+SCHEDULER_MODE = os.getenv('SCHEDULER_MODE', 'embedded')
+SCHEDULER_LOCK = os.getenv('SCHEDULER_LOCK', 'postgres')  # or 'file'
+SCHEDULER_LOCK_FILE = os.getenv('SCHEDULER_LOCK_FILE', os.path.join(os.path.dirname(__file__), 'scheduler.lock'))
+# When embedded election starts: 'import' (with the app), or 'post_fork' when the app is
+# preloaded in a pre-forking server that starts it in each worker (see gunicorn.conf.py)
+SCHEDULER_START = os.getenv('SCHEDULER_START', 'import')
@@ -3,17 +3,26 @@ Resume Parser — robust section-based + full-text fallback extraction.
 Works for any PDF/DOCX resume regardless of formatting style.
 """
 import re
-import fitz          # PyMuPDF
-from docx import Document
+
+# PyMuPDF, python-docx and spaCy are imported on first use, not at import:
+# loading them (spaCy's model above all) dominated worker start-up.
 
 # ── spaCy (optional, gracefully skipped) ─────────────────────────────────────
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-    SPACY_AVAILABLE = True
-except Exception:
-    nlp = None
-    SPACY_AVAILABLE = False
+_nlp = None
+_nlp_loaded = False
+
+
+def get_nlp():
+    """The ``en_core_web_sm`` pipeline, loaded on first call; None if unavailable."""
+    global _nlp, _nlp_loaded
+    if not _nlp_loaded:
+        try:
+            import spacy
+            _nlp = spacy.load("en_core_web_sm")
+        except Exception:
+            _nlp = None
+        _nlp_loaded = True
+    return _nlp
 
 # ── Comprehensive skill vocabulary ───────────────────────────────────────────
 SKILLS_VOCAB = [
@@ -99,6 +108,7 @@ def extract_text(file_path):
 def _pdf_text(path):
     text = ''
     try:
+        import fitz          # PyMuPDF
         doc = fitz.open(path)
         for page in doc:
             text += page.get_text('text') + '\n'
@@ -108,6 +118,7 @@ def _pdf_text(path):
 
 def _docx_text(path):
     try:
+        from docx import Document
         doc = Document(path)
         lines = [p.text for p in doc.paragraphs]
         # also grab table cells
@@ -0,0 +1,119 @@
+"""
+Import-time profile of the web entry points (``python -X importtime``).
+
+Each target is imported in a fresh interpreter several times; the fastest run
+is reported with the modules that cost the most, cumulative and self time::
+
+    python benchmarks/importtime.py                       # report
+    python benchmarks/importtime.py --json importtime.json
+    python benchmarks/importtime.py --baseline importtime.json --max-regression 20
+
+Targets:
+  run     what a web worker imports at start-up (main app; career app mounted lazily)
+  career  the career sub-app, as loaded by its first request
+  main    the main app alone
+
+With --baseline the totals are compared to an earlier --json file and the
+script exits with status 1 if any target is more than --max-regression percent
+slower.  Background jobs are switched off (SCHEDULER_MODE=off) while profiling.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    'run': 'import run',
+    'career': 'import run; run.career_app.load()',
+    'main': 'from app import create_app; create_app()',
+}
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def profile(statement):
+    """``(total_us, {module: (self_us, cumulative_us, depth)})`` for one fresh import."""
+    env = dict(os.environ, SCHEDULER_MODE='off')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f'{statement!r} failed:\n{proc.stderr[-2000:]}')
+    modules = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us = int(m.group(1)), int(m.group(2))
+        depth = (len(m.group(3)) - 1) // 2
+        modules[m.group(4)] = (self_us, cumulative_us, depth)
+        if depth == 0:
+            total += cumulative_us
+    return total, modules
+
+
+def best_of(statement, repeat):
+    runs = [profile(statement) for _ in range(repeat)]
+    return min(runs, key=lambda run: run[0])
+
+
+def report(name, total, modules, top):
+    print(f'\n== {name}: {total / 1000:.1f} ms ({len(modules)} modules)')
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    heaviest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+    for module, (self_us, cumulative_us, depth) in heaviest[:top]:
+        print(f'{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {"  " * depth}{module}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile start-up imports of the web apps.')
+    parser.add_argument('targets', nargs='*', metavar='target',
+                        help=f"what to import: {', '.join(TARGETS)} (default: run career)")
+    parser.add_argument('--repeat', type=int, default=3, help='runs per target; the fastest is kept')
+    parser.add_argument('--top', type=int, default=25, help='modules to list per target')
+    parser.add_argument('--json', help='write totals and per-module times to this file')
+    parser.add_argument('--baseline', help='a previous --json file to compare against')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='allowed slowdown against --baseline, in percent')
+    args = parser.parse_args(argv)
+    targets = args.targets or ['run', 'career']
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in targets:
+        total, modules = best_of(TARGETS[name], args.repeat)
+        report(name, total, modules, args.top)
+        results[name] = {
+            'total_us': total,
+            'modules': {module: {'self_us': s, 'cumulative_us': c} for module, (s, c, _) in modules.items()},
+        }
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print()
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before, after = baseline[name]['total_us'], result['total_us']
+            change = (after - before) * 100 / before
+            verdict = 'REGRESSION' if change > args.max_regression else 'ok'
+            print(f'{name}: {before / 1000:.1f} ms -> {after / 1000:.1f} ms ({change:+.1f}%) {verdict}')
+            if verdict != 'ok':
+                status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Gunicorn start-up benchmark: time to first response and per-worker memory,
+with and without preloading (GUNICORN_PRELOAD).
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --workers 4 --modes preload
+
+For each mode a server is started from gunicorn.conf.py on a free port.  The
+script records the time until the main app and the career app first answer,
+then sends a few requests to every worker and reads their memory from
+/proc/<pid>/smaps_rollup (Linux):
+
+  RSS  resident pages, shared ones included
+  PSS  resident pages with shared ones divided among the processes sharing them
+  USS  pages private to the worker -- what each extra worker really costs
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {'lazy': '0', 'preload': '1'}
+PATHS = ('/', '/Career_Guidance_SubProject/login')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _get(url, timeout=5):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def _wait_for(url, deadline):
+    while time.monotonic() < deadline:
+        try:
+            return _get(url)
+        except OSError:
+            time.sleep(0.02)
+    raise TimeoutError(f'no response from {url}')
+
+
+def _children(pid):
+    children = []
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as f:
+            children += [int(child) for child in f.read().split()]
+    return children
+
+
+def _memory_kb(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def measure(mode, workers, warm_requests, timeout):
+    port = _free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD=MODES[mode], GUNICORN_WORKERS=str(workers),
+               PORT=str(port), SCHEDULER_MODE=os.getenv('SCHEDULER_MODE', 'off'))
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+         '--access-logfile', '/dev/null', 'run:application'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        base = f'http://127.0.0.1:{port}'
+        deadline = started + timeout
+        first = {}
+        for path in PATHS:
+            status = _wait_for(base + path, deadline)
+            first[path] = (time.monotonic() - started, status)
+        # Every worker serves both apps at least once before it is measured
+        for _ in range(warm_requests * workers):
+            for path in PATHS:
+                _get(base + path)
+        time.sleep(0.5)
+        memory = [_memory_kb(pid) for pid in _children(server.pid)]
+    except Exception:
+        server.kill()
+        print(server.stderr.read()[-3000:], file=sys.stderr)
+        raise
+    finally:
+        if server.poll() is None:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    return first, memory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure gunicorn start-up with and without preloading.')
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['lazy', 'preload'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--warm-requests', type=int, default=5, help='requests per worker before measuring memory')
+    parser.add_argument('--timeout', type=float, default=120, help='seconds to wait for the first responses')
+    args = parser.parse_args(argv)
+
+    rows = []
+    for mode in args.modes:
+        first, memory = measure(mode, args.workers, args.warm_requests, args.timeout)
+        n = len(memory) or 1
+        rows.append((mode, first, {key: sum(m[key] for m in memory) / n for key in ('rss', 'pss', 'uss')}, len(memory)))
+
+    header = f"{'mode':<8}" + ''.join(f'{"first " + path:>42}' for path in PATHS) + \
+             f"{'workers':>9}{'RSS MB':>9}{'PSS MB':>9}{'USS MB':>9}"
+    print(header)
+    for mode, first, memory, count in rows:
+        cells = ''.join(f'{f"{seconds:.2f} s ({status})":>42}' for seconds, status in first.values())
+        print(f'{mode:<8}{cells}{count:>9}' + ''.join(f'{memory[key] / 1024:>9.1f}' for key in ('rss', 'pss', 'uss')))
+    print('\nMemory columns are per-worker averages.')
+
+
+if __name__ == '__main__':
+    main()
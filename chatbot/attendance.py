@@ -4,6 +4,9 @@ Attendance calculation and eligibility prediction logic.
 import re
 import math
 
+from .entities import extract_entities
+from .json_loader import kb
+
 
 def parse_attendance_from_text(text):
     """
@@ -11,21 +14,8 @@ def parse_attendance_from_text(text):
     Supports formats: "45/60", "45 out of 60", "attended 45 from 60"
     Returns (attended, total) or (None, None).
     """
-    patterns = [
-        r'(?:attended|present)\s*(\d+)\s*(?:out\s*of|\/|from)\s*(\d+)',
-        r'(\d+)\s*(?:out\s*of|\/|from)\s*(\d+)\s*(?:class|lecture|period|total)',
-        r'(\d+)\s*\/\s*(\d+)',
-        r'attendance.*?(\d+)\s*(?:out\s*of|\/|from)\s*(\d+)',
-    ]
-    text_lower = text.lower()
-    for pattern in patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            attended = int(match.group(1))
-            total = int(match.group(2))
-            if 0 < attended <= total:
-                return attended, total
-    return None, None
+    entities = extract_entities(text)
+    return entities['attended'], entities['total']
 
 
 def calculate_attendance(attended, total):
@@ -103,48 +93,9 @@ def parse_future_attendance_from_text(text):
       "attendance 30/50 and 15 remaining, target 75%"
       "12 out 15 and next 20 lectures remaining"
     """
-    text_lower = text.lower()
-
-    # --- current attendance ---
-    attended, total = parse_attendance_from_text(text)
-    if attended is None:
-        # "out N" without "of"
-        m = re.search(r'(\d+)\s*out\s+(\d+)', text_lower)
-        if m:
-            a, t = int(m.group(1)), int(m.group(2))
-            if 0 < a <= t:
-                attended, total = a, t
-
-    # --- remaining / upcoming lectures ---
-    remaining = None
-    remaining_patterns = [
-        r'(?:next|upcoming|future|more)\s+(\d+)\s+(?:lectures?|classes?|periods?)',
-        r'(\d+)\s+(?:lectures?|classes?|periods?)\s+(?:remaining|left|more|upcoming|future|pending)',
-        r'(\d+)\s+(?:more\s+)?(?:lectures?|classes?)\s+(?:are\s+)?(?:left|remaining|pending)',
-        r'remaining\s+(?:lectures?|classes?)\s+(?:are\s+)?(\d+)',
-    ]
-    for pat in remaining_patterns:
-        m = re.search(pat, text_lower, re.IGNORECASE)
-        if m:
-            remaining = int(m.group(1))
-            break
-
-    # --- target percentage (default 80) ---
-    target_percent = 80
-    target_patterns = [
-        r'(?:for|to|reach|achieve|get|maintain|target|of)\s+(\d+)\s*%',
-        r'(\d+)\s*%\s*(?:attendance|target|eligibility|chahiye|required)',
-        r'(\d+)\s*percent(?:age)?',
-    ]
-    for pat in target_patterns:
-        m = re.search(pat, text_lower)
-        if m:
-            val = int(m.group(1))
-            if 40 <= val <= 100:
-                target_percent = val
-                break
-
-    return attended, total, remaining, target_percent
+    entities = extract_entities(text)
+    return (entities['attended'], entities['total'], entities['remaining'],
+            entities['target_percent'] or 80)
 
 
 def calculate_future_attendance(attended, total, remaining, target_percent=80):
@@ -263,3 +214,182 @@ def format_attendance_response(result):
         lines.append(f"\nYou can safely skip up to **{result['can_skip']} classes** while staying at or above 80%.")
 
     return '\n'.join(lines)
+
+
+# ----------------------------------------------------------------------
+# Semester planner: every subject x every number of skipped lectures
+# ----------------------------------------------------------------------
+
+# Used when the knowledge base has no planner thresholds
+_DEFAULT_THRESHOLDS = {
+    'mysy_scholarship': {'percent': 75, 'label': 'MYSY Scholarship'},
+    'exam_eligibility': {'percent': 80, 'label': 'Exam Eligibility'},
+    'safe_zone':        {'percent': 85, 'label': 'Safe Zone'},
+}
+
+MAX_PLANNER_SUBJECTS = 20
+MAX_PLANNER_REMAINING = 500
+
+
+def planner_bands(thresholds=None):
+    """
+    Eligibility bands as [{'key', 'percent', 'label'}, ...], lowest first.
+    Defaults to kb.get_planner_thresholds().
+    """
+    if thresholds is None:
+        thresholds = kb.get_planner_thresholds() or _DEFAULT_THRESHOLDS
+    bands = [
+        {'key': key, 'percent': float(band['percent']), 'label': band.get('label', key)}
+        for key, band in thresholds.items() if band.get('percent') is not None
+    ]
+    return sorted(bands, key=lambda band: band['percent'])
+
+
+def _validate_subjects(subjects):
+    if not isinstance(subjects, (list, tuple)) or not subjects:
+        raise ValueError('Provide at least one subject.')
+    if len(subjects) > MAX_PLANNER_SUBJECTS:
+        raise ValueError(f'At most {MAX_PLANNER_SUBJECTS} subjects can be planned at once.')
+    rows = []
+    for i, subject in enumerate(subjects, 1):
+        try:
+            attended = int(subject['attended'])
+            total = int(subject['total'])
+            remaining = int(subject['remaining'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'Subject {i}: attended, total and remaining must be whole numbers.')
+        if not 0 <= attended <= total:
+            raise ValueError(f'Subject {i}: attended must be between 0 and total.')
+        if not 0 <= remaining <= MAX_PLANNER_REMAINING:
+            raise ValueError(f'Subject {i}: remaining must be between 0 and {MAX_PLANNER_REMAINING}.')
+        if total + remaining == 0:
+            raise ValueError(f'Subject {i}: there are no lectures to plan.')
+        rows.append((str(subject.get('name') or f'Subject {i}'), attended, total, remaining))
+    return rows
+
+
+def plan_semester(subjects, thresholds=None):
+    """
+    What-if table for a whole semester in one call.
+
+    ``subjects`` is a list of {'name', 'attended', 'total', 'remaining'}.
+    For every subject and every number of skipped lectures k (0..remaining)
+    the result holds the final percentage and the highest band reached
+    (None = below every band), plus the most lectures that can be skipped
+    while staying in each band (None = band out of reach).  Raises
+    ValueError for invalid input.
+    """
+    import numpy as np    # only the planner needs it; keeps chatbot start-up light
+
+    rows = _validate_subjects(subjects)
+    bands = planner_bands(thresholds)
+    attended = np.array([row[1] for row in rows], dtype=np.int64)
+    total = np.array([row[2] for row in rows], dtype=np.int64)
+    remaining = np.array([row[3] for row in rows], dtype=np.int64)
+    total_final = total + remaining
+
+    # (subjects x skips) grid; each subject's row is cut at its own remaining count
+    skips = np.arange(int(remaining.max()) + 1)
+    percent = (attended + remaining)[:, None] - skips[None, :]
+    percent = percent * 100.0 / total_final[:, None]
+    cutoffs = np.array([band['percent'] for band in bands])
+    band_index = np.searchsorted(cutoffs, percent, side='right') - 1
+
+    # Lectures that must be attended in total for each band, per subject
+    required = np.ceil(cutoffs[:, None] * total_final[None, :] / 100 - 1e-9).astype(np.int64)
+    max_skips = np.minimum(attended + remaining - required, remaining)
+
+    keys = [band['key'] for band in bands]
+    percent = np.round(percent, 2)
+    result = []
+    for i, (name, a, t, r) in enumerate(rows):
+        n = r + 1
+        result.append({
+            'name':                name,
+            'attended':            a,
+            'total':               t,
+            'remaining':           r,
+            'current_percent':     round(a / t * 100, 2) if t else None,
+            'final_if_attend_all': float(percent[i, 0]),
+            'percent':             percent[i, :n].tolist(),
+            'band':                [keys[j] if j >= 0 else None for j in band_index[i, :n].tolist()],
+            'max_skips':           {key: (int(max_skips[b, i]) if max_skips[b, i] >= 0 else None)
+                                    for b, key in enumerate(keys)},
+        })
+    return {'thresholds': bands, 'subjects': result}
+
+
+_FRACTION_RE = re.compile(r'(\d+)\s*(?:/|out\s*of)\s*(\d+)')
+# Short forms used in lists: "next 20", "20 left"
+_REMAINING_RE = re.compile(r'(?:next|remaining|upcoming)\s+(\d+)|(\d+)\s+(?:more|left|remaining|upcoming)\b')
+
+
+def _segment_remaining(segment, entities):
+    remaining = entities['remaining']
+    if remaining is None:
+        m = _REMAINING_RE.search(_FRACTION_RE.sub(' ', segment.lower()))
+        if m:
+            remaining = int(m.group(1) or m.group(2))
+    return remaining
+
+
+def parse_semester_plan_from_text(text):
+    """
+    Parse several subjects out of one message, e.g.
+      "DBMS 30/40 next 20, OS 25/35 next 15; CN 18/20 next 20"
+    Returns [{'name', 'attended', 'total', 'remaining'}, ...].  A single
+    remaining count given for the whole message applies to every subject
+    without its own.
+    """
+    subjects, shared = [], set()
+    for segment in re.split(r'[;,\n]', text):
+        entities = extract_entities(segment)
+        attended, total = entities['attended'], entities['total']
+        if attended is None:
+            m = _FRACTION_RE.search(segment.lower())
+            if m and 0 <= int(m.group(1)) <= int(m.group(2)):
+                attended, total = int(m.group(1)), int(m.group(2))
+        remaining = _segment_remaining(segment, entities)
+        if attended is None:
+            if remaining is not None:
+                shared.add(remaining)
+            continue
+        if remaining is not None:
+            shared.add(remaining)
+        name = re.split(r'\d', segment, maxsplit=1)[0]
+        name = re.sub(r'\b(?:plan|my|the|whole|full|semester|sem|attendance|planner|table|for|subjects?|'
+                      r'in|is|and|attended|present|i|have)\b|[:\-]', ' ', name, flags=re.IGNORECASE)
+        subjects.append({
+            'name':      ' '.join(name.split()) or f'Subject {len(subjects) + 1}',
+            'attended':  attended,
+            'total':     total,
+            'remaining': remaining,
+        })
+    if len(shared) == 1:
+        remaining = shared.pop()
+        for subject in subjects:
+            if subject['remaining'] is None:
+                subject['remaining'] = remaining
+    return subjects
+
+
+def format_semester_plan_response(plan):
+    """Condense a plan_semester() result into a chat-sized table of skip budgets."""
+    bands = plan['thresholds']
+    header = '| Subject | Now | Attend all | ' + ' | '.join(
+        f"Skip for {band['percent']:g}%" for band in bands) + ' |'
+    lines = [
+        '**Semester Attendance Planner**\n',
+        header,
+        '|' + ' --- |' * (3 + len(bands)),
+    ]
+    for subject in plan['subjects']:
+        now = f"{subject['current_percent']}%" if subject['current_percent'] is not None else '—'
+        cells = []
+        for band in bands:
+            skip = subject['max_skips'][band['key']]
+            cells.append('❌' if skip is None else f"{skip} / {subject['remaining']}")
+        lines.append(f"| {subject['name']} | {now} | {subject['final_if_attend_all']}% | " + ' | '.join(cells) + ' |')
+    lines.append('\n"Skip" is how many of the remaining lectures you can miss and still reach that band; '
+                 '❌ means it is out of reach even attending all of them.')
+    return '\n'.join(lines)
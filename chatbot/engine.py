@@ -16,8 +16,9 @@ import time
 import logging
 from .intents import recognize_intent
 from .attendance import (
-    parse_attendance_from_text, calculate_attendance, format_attendance_response,
-    parse_future_attendance_from_text, calculate_future_attendance, format_future_attendance_response,
+    calculate_attendance, format_attendance_response,
+    calculate_future_attendance, format_future_attendance_response,
+    parse_semester_plan_from_text, plan_semester, format_semester_plan_response,
 )
 from .cgpa import format_sgpa_explanation, format_cgpa_explanation
 from .json_loader import kb
@@ -35,6 +36,7 @@ _ALWAYS_PATTERN = {
     'greeting', 'farewell', 'help',
     'attendance_calculate',      # needs arithmetic
     'attendance_future_plan',    # needs arithmetic
+    'attendance_semester_plan',  # needs arithmetic
     'cgpa_to_percentage',        # needs arithmetic
     'grade_for_marks',           # needs arithmetic
     'passing_marks',             # needs arithmetic + subject lookup
@@ -116,6 +118,7 @@ class ChatbotEngine:
             'fee_payment_method':     self._handle_fee_payment,
             'attendance_calculate':   self._handle_attendance_calc,
             'attendance_future_plan': self._handle_attendance_future,
+            'attendance_semester_plan': self._handle_attendance_semester_plan,
             'attendance_eligibility': self._handle_attendance_eligibility,
             'attendance_rule':        self._handle_attendance_rule,
             'mysy_scholarship':       self._handle_mysy,
@@ -220,7 +223,7 @@ class ChatbotEngine:
     # ----------------------------------------------------------------
 
     def _handle_attendance_calc(self, msg, ext):
-        attended, total = parse_attendance_from_text(msg)
+        attended, total = ext.get('attended'), ext.get('total')
         if attended is None:
             nums = ext.get('numbers', [])
             if len(nums) >= 2:
@@ -236,7 +239,8 @@ class ChatbotEngine:
 
     def _handle_attendance_future(self, msg, ext):
         """Future attendance planner: how many of N remaining lectures to attend/skip."""
-        attended, total, remaining, target_pct = parse_future_attendance_from_text(msg)
+        attended, total, remaining = ext.get('attended'), ext.get('total'), ext.get('remaining')
+        target_pct = ext.get('target_percent') or 80
 
         # If we got the current fraction from extracted numbers as fallback
         if attended is None:
@@ -262,8 +266,23 @@ class ChatbotEngine:
         result = calculate_future_attendance(attended, total, remaining, target_pct)
         return format_future_attendance_response(result)
 
+    def _handle_attendance_semester_plan(self, msg, ext):
+        """Skip budgets for every subject at once (see plan_semester)."""
+        subjects = parse_semester_plan_from_text(msg)
+        if not subjects or any(s['remaining'] is None for s in subjects):
+            return (
+                "I can plan attendance for all your subjects at once! Give each subject its "
+                "attendance and upcoming lectures, separated by commas:\n\n"
+                "**Example:** _'DBMS 30/40 next 20, OS 25/35 next 15, CN 18/20 next 20'_"
+            )
+        try:
+            plan = plan_semester(subjects)
+        except ValueError as e:
+            return f"Sorry, I couldn't plan that. {e}"
+        return format_semester_plan_response(plan)
+
     def _handle_attendance_eligibility(self, msg, ext):
-        attended, total = parse_attendance_from_text(msg)
+        attended, total = ext.get('attended'), ext.get('total')
         if attended is None:
             nums = ext.get('numbers', [])
             if len(nums) >= 2:
@@ -713,12 +732,7 @@ class ChatbotEngine:
     # ----------------------------------------------------------------
 
     def _handle_grade_for_marks(self, msg, ext):
-        nums = ext.get('numbers', [])
-        marks = None
-        for n in nums:
-            if 0 <= n <= 200:
-                marks = int(n)
-                break
+        marks = ext.get('marks')
         if marks is None:
             return "Please tell me the marks. Example: 'What grade for 75 marks?' or 'I scored 145 out of 200'"
 
@@ -733,7 +747,7 @@ class ChatbotEngine:
                 subject_name = subj_info.get('subject_name', keyword)
 
         if total is None:
-            total = 200 if marks > 100 else 100
+            total = ext.get('marks_total') or (200 if marks > 100 else 100)
 
         grade, points = kb.get_grade_for_marks(marks, total)
         percentage = round((marks / total) * 100, 1)
@@ -862,13 +876,7 @@ class ChatbotEngine:
         return format_cgpa_explanation()
 
     def _handle_cgpa_to_percent(self, msg, ext):
-        nums = ext.get('numbers', [])
-        cgpa_val = None
-        for n in nums:
-            if 0 < n <= 10:
-                cgpa_val = n
-                break
-
+        cgpa_val = ext.get('cgpa')
         if cgpa_val is not None:
             percentage = kb.cgpa_to_percentage(cgpa_val)
             return (
@@ -0,0 +1,109 @@
+"""
+Numeric entity extraction for chat messages.
+
+extract_entities() runs once per message (from recognize_intent) and fills
+every numeric slot a handler may need, so handlers read ``extracted`` instead
+of re-scanning the text with their own regexes:
+
+  numbers         every number in the message, in order (floats)
+  semester        "sem 5", "5th semester"
+  attended, total current attendance: "45/60", "attended 45 out of 60"
+  remaining       upcoming lectures: "next 20 lectures", "15 classes left"
+  target_percent  "for 75%", "85% attendance" (None when not given)
+  marks           first number that can be marks (0-200)
+  marks_total     100 or 200 when given as "145 out of 200"
+  cgpa            first number that can be a CGPA (0-10]
+
+All patterns are compiled at import and tried in priority order; a slot
+missing from the message is None.
+"""
+import re
+
+_FRACTION = r'(\d+)\s*(?:out\s*of|\/|from)\s*(\d+)'
+
+_NUMBER_RE = re.compile(r'\d+\.?\d*')
+
+_SEMESTER_PATTERNS = (
+    re.compile(r'(?:sem(?:ester)?)\s*(\d+)'),
+    re.compile(r'(\d+)(?:st|nd|rd|th)\s*sem'),
+)
+
+# (attended, total); the first pair with 0 < attended <= total wins
+_ATTENDANCE_PATTERNS = (
+    re.compile(r'(?:attended|present)\s*' + _FRACTION),
+    re.compile(_FRACTION + r'\s*(?:class|lecture|period|total)'),
+    re.compile(r'(\d+)\s*\/\s*(\d+)'),
+    re.compile(r'attendance.*?' + _FRACTION),
+    re.compile(r'(\d+)\s*out\s+(\d+)'),  # "12 out 15"
+)
+
+_REMAINING_PATTERNS = (
+    re.compile(r'(?:next|upcoming|future|more)\s+(\d+)\s+(?:lectures?|classes?|periods?)'),
+    re.compile(r'(\d+)\s+(?:lectures?|classes?|periods?)\s+(?:remaining|left|more|upcoming|future|pending)'),
+    re.compile(r'(\d+)\s+(?:more\s+)?(?:lectures?|classes?)\s+(?:are\s+)?(?:left|remaining|pending)'),
+    re.compile(r'remaining\s+(?:lectures?|classes?)\s+(?:are\s+)?(\d+)'),
+)
+
+# The first value in 40-100 wins
+_TARGET_PATTERNS = (
+    re.compile(r'(?:for|to|reach|achieve|get|maintain|target|of)\s+(\d+)\s*%'),
+    re.compile(r'(\d+)\s*%\s*(?:attendance|target|eligibility|chahiye|required)'),
+    re.compile(r'(\d+)\s*percent(?:age)?'),
+)
+
+_MARKS_TOTAL_RE = re.compile(r'\d+\s*(?:out\s*of|\/)\s*(100|200)\b')
+
+
+def _attendance(text):
+    for pattern in _ATTENDANCE_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            attended, total = int(m.group(1)), int(m.group(2))
+            if 0 < attended <= total:
+                return attended, total
+    return None, None
+
+
+def _remaining(text):
+    for pattern in _REMAINING_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            return int(m.group(1))
+    return None
+
+
+def _target_percent(text):
+    for pattern in _TARGET_PATTERNS:
+        m = pattern.search(text)
+        if m and 40 <= int(m.group(1)) <= 100:
+            return int(m.group(1))
+    return None
+
+
+def _semester(text):
+    for pattern in _SEMESTER_PATTERNS:
+        m = pattern.search(text)
+        if m:
+            return int(m.group(1))
+    return None
+
+
+def extract_entities(text):
+    """Every numeric slot of ``text`` (see the module docstring)."""
+    text_lower = text.lower().strip()
+    numbers = [float(n) for n in _NUMBER_RE.findall(text_lower)]
+    extracted = dict.fromkeys(('semester', 'attended', 'total', 'remaining', 'target_percent',
+                               'marks', 'marks_total', 'cgpa'))
+    extracted['numbers'] = numbers
+    if not numbers:
+        return extracted
+
+    extracted['semester'] = _semester(text_lower)
+    extracted['attended'], extracted['total'] = _attendance(text_lower)
+    extracted['remaining'] = _remaining(text_lower)
+    extracted['target_percent'] = _target_percent(text_lower)
+    extracted['marks'] = next((int(n) for n in numbers if 0 <= n <= 200), None)
+    m = _MARKS_TOTAL_RE.search(text_lower)
+    extracted['marks_total'] = int(m.group(1)) if m else None
+    extracted['cgpa'] = next((n for n in numbers if 0 < n <= 10), None)
+    return extracted
@@ -0,0 +1,234 @@
+"""
+Cohort SGPA / CGPA computation for the exam cell.
+
+Reads a grades CSV with one row per student, semester and subject::
+
+    enrollment_no,semester,subject_code,grade[,credits]
+
+Credits come from kb.subjects_list by subject code; the optional ``credits``
+column supplies them for electives, which have no fixed code.  Rows are
+streamed into flat NumPy arrays and every SGPA, CGPA, percentage
+(``(CGPA - 0.5) * 10``) and degree class is computed with bincount group-bys
+over (student, semester), using the same rules as chatbot.cgpa.
+
+From the command line (run in the project root)::
+
+    python -m chatbot.grading grades.csv -o results.csv
+"""
+import argparse
+import csv
+import io
+import sys
+import time
+
+import numpy as np
+
+from .cgpa import GRADE_MAP
+from .json_loader import kb
+
+SEMESTERS = 8
+MAX_REPORTED_ERRORS = 50
+
+# Lower FGPA bound of each class, ascending (see chatbot.cgpa.calculate_cgpa)
+CLASS_CUTOFFS = np.array([4.50, 5.50, 6.50, 7.50])
+CLASS_NAMES = np.array(['Fail', 'Pass Class', 'Second Class', 'First Class', 'First Class with Distinction'])
+
+FAIL_GRADES = {'F', 'AB'}
+
+RESULT_COLUMNS = (['enrollment_no'] + [f'sgpa_{s}' for s in range(1, SEMESTERS + 1)]
+                  + ['credits', 'cgpa', 'percentage', 'classification', 'backlogs'])
+
+
+class GradingError(ValueError):
+    """The CSV has rows that cannot be graded; ``errors`` lists them."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        shown = '; '.join(errors[:5]) + (f' (+{len(errors) - 5} more)' if len(errors) > 5 else '')
+        super().__init__(f'{len(errors)} invalid row(s): {shown}')
+
+
+def credit_table():
+    """``{SUBJECT_CODE: credits}`` from the subjects list."""
+    return {
+        subject['subject_code'].strip().upper(): int(subject['credits'])
+        for semester in kb.subjects_list.get('semesters', [])
+        for subject in semester.get('subjects', [])
+        if subject.get('subject_code') and subject.get('credits') is not None
+    }
+
+
+_SEMESTER_NUMBERS = {**{str(n): n for n in range(1, SEMESTERS + 1)},
+                     **{roman: n for n, roman in kb._ROMAN.items()}}
+
+
+class _Grades:
+    """Flat per-row arrays plus the enrollment number of every student index."""
+
+    def __init__(self):
+        self.enrollments = []
+        self._index = {}
+        self.student = []
+        self.semester = []
+        self.credits = []
+        self.points = []
+        self.failed = []
+
+    def add(self, enrollment, semester, credits, points, failed):
+        index = self._index.get(enrollment)
+        if index is None:
+            index = self._index[enrollment] = len(self.enrollments)
+            self.enrollments.append(enrollment)
+        self.student.append(index)
+        self.semester.append(semester)
+        self.credits.append(credits)
+        self.points.append(points)
+        self.failed.append(failed)
+
+
+def read_grades(lines, credits_by_code=None):
+    """
+    Parse grade rows from an iterable of CSV lines (an open text file or a
+    decoded upload stream).  Raises GradingError listing every bad row.
+    """
+    credits_by_code = credit_table() if credits_by_code is None else credits_by_code
+    reader = csv.DictReader(lines)
+    missing = {'enrollment_no', 'semester', 'subject_code', 'grade'} - set(reader.fieldnames or ())
+    if missing:
+        raise GradingError([f"missing column(s): {', '.join(sorted(missing))}"])
+    has_credits = 'credits' in reader.fieldnames
+    grades, errors = _Grades(), []
+    for line_no, row in enumerate(reader, 2):
+        enrollment = (row['enrollment_no'] or '').strip()
+        semester = _SEMESTER_NUMBERS.get((row['semester'] or '').strip().upper())
+        code = (row['subject_code'] or '').strip().upper()
+        grade = (row['grade'] or '').strip().upper()
+        points = GRADE_MAP.get(grade)
+        credits = credits_by_code.get(code)
+        if has_credits and (row['credits'] or '').strip():
+            try:
+                credits = int(row['credits'])
+            except ValueError:
+                credits = None
+        if not enrollment:
+            errors.append(f'line {line_no}: no enrollment number')
+        elif semester is None:
+            errors.append(f"line {line_no}: invalid semester {row['semester']!r}")
+        elif points is None:
+            errors.append(f"line {line_no}: invalid grade {row['grade']!r}")
+        elif credits is None or credits <= 0:
+            errors.append(f'line {line_no}: no credits for subject {code or "(blank)"}')
+        else:
+            grades.add(enrollment, semester, credits, points, grade in FAIL_GRADES)
+            continue
+        if len(errors) > MAX_REPORTED_ERRORS:
+            break
+    if errors:
+        raise GradingError(errors)
+    return grades
+
+
+def _round(values, digits):
+    """Python's round() over an array; np.round rounds some .xx5 values the other way."""
+    return np.array([round(v, digits) for v in values.ravel().tolist()]).reshape(values.shape)
+
+
+def compute(grades):
+    """
+    Results for every student in ``grades`` as a dict of NumPy columns
+    (``sgpa`` is students x SEMESTERS, NaN where a semester has no rows).
+    """
+    n = len(grades.enrollments)
+    student = np.asarray(grades.student, dtype=np.int64)
+    semester = np.asarray(grades.semester, dtype=np.int64) - 1
+    credits = np.asarray(grades.credits, dtype=np.float64)
+    points = np.asarray(grades.points, dtype=np.float64)
+
+    # Group by (student, semester) with one flat bincount
+    cell = student * SEMESTERS + semester
+    size = n * SEMESTERS
+    sem_credits = np.bincount(cell, weights=credits, minlength=size).reshape(n, SEMESTERS)
+    sem_weighted = np.bincount(cell, weights=credits * points, minlength=size).reshape(n, SEMESTERS)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Rounded like calculate_sgpa
+        sgpa = _round(sem_weighted / sem_credits, 2)
+
+    # CGPA from the rounded SGPAs, summed semester by semester in the same
+    # order as calculate_cgpa so both round .xx5 results identically
+    cgpa_weighted = np.zeros(n)
+    for s in range(SEMESTERS):
+        cgpa_weighted += np.where(sem_credits[:, s] > 0, sgpa[:, s] * sem_credits[:, s], 0.0)
+    total_credits = sem_credits.sum(axis=1)
+    cgpa = _round(cgpa_weighted / total_credits, 2)
+    percentage = _round((cgpa - 0.5) * 10, 1)
+    classification = CLASS_NAMES[np.searchsorted(CLASS_CUTOFFS, cgpa, side='right')]
+    backlogs = np.bincount(student, weights=np.asarray(grades.failed, dtype=np.float64), minlength=n)
+    return {
+        'enrollment_no': grades.enrollments,
+        'sgpa': sgpa,
+        'credits': total_credits.astype(np.int64),
+        'cgpa': cgpa,
+        'percentage': percentage,
+        'classification': classification,
+        'backlogs': backlogs.astype(np.int64),
+    }
+
+
+def iter_result_rows(results):
+    """CSV rows (header first) for compute() results."""
+    yield RESULT_COLUMNS
+    sgpa = results['sgpa']
+    for i, enrollment in enumerate(results['enrollment_no']):
+        yield ([enrollment] + ['' if np.isnan(v) else f'{v:.2f}' for v in sgpa[i]]
+               + [int(results['credits'][i]), f"{results['cgpa'][i]:.2f}", f"{results['percentage'][i]:.1f}",
+                  results['classification'][i], int(results['backlogs'][i])])
+
+
+def write_results(results, out):
+    csv.writer(out).writerows(iter_result_rows(results))
+
+
+def grade_cohort(lines):
+    """read_grades() + compute(), the whole pipeline for one CSV."""
+    return compute(read_grades(lines))
+
+
+def iter_results_csv(results, chunk_rows=1000):
+    """Result CSV as text chunks, for streaming a response."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for i, row in enumerate(iter_result_rows(results), 1):
+        writer.writerow(row)
+        if i % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute SGPA, CGPA and degree class for a cohort.')
+    parser.add_argument('grades', help='CSV of enrollment_no,semester,subject_code,grade[,credits]')
+    parser.add_argument('-o', '--output', help='results CSV (default: stdout)')
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    try:
+        with open(args.grades, newline='', encoding='utf-8-sig') as f:
+            results = grade_cohort(f)
+    except GradingError as e:
+        for error in e.errors:
+            print(error, file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as out:
+            write_results(results, out)
+    else:
+        write_results(results, sys.stdout)
+    print(f"Graded {len(results['enrollment_no'])} students in {time.monotonic() - started:.1f}s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
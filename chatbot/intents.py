@@ -4,6 +4,8 @@ Each intent has: name, patterns (regex list), keywords (set), priority.
 """
 import re
 
+from .entities import extract_entities
+
 INTENTS = [
 
     # ----------------------------------------------------------------
@@ -59,6 +61,19 @@ INTENTS = [
     # ----------------------------------------------------------------
     # Attendance
     # ----------------------------------------------------------------
+    {
+        'name': 'attendance_semester_plan',
+        'patterns': [
+            # "attendance plan for the whole semester / all subjects"
+            r'(?:attendance|skip|bunk)\s*(?:plan(?:ner)?|table)\s*(?:for\s*)?(?:the\s*|my\s*)?(?:whole\s*|full\s*|entire\s*)?(?:semester|all\s*subjects?)',
+            r'(?:semester|subject[-\s]*wise|all\s*subjects?)\s*(?:attendance|bunk|skip)\s*(?:plan(?:ner)?|table)',
+            # several "a/b" figures in one message, one per subject
+            r'\d+\s*(?:\/|out\s*of)\s*\d+[^;,\n]*[;,\n][^;,\n]*\d+\s*(?:\/|out\s*of)\s*\d+',
+        ],
+        'keywords': {'semester attendance plan', 'attendance planner table', 'subject wise attendance',
+                     'all subjects attendance'},
+        'priority': 12,   # above attendance_future_plan: one message, many subjects
+    },
     {
         'name': 'attendance_future_plan',
         'patterns': [
@@ -421,6 +436,9 @@ INTENTS = [
     },
 ]
 
+# Patterns compiled once, in INTENTS order
+_COMPILED_PATTERNS = [[re.compile(p) for p in intent['patterns']] for intent in INTENTS]
+
 
 def recognize_intent(text):
     """
@@ -431,12 +449,12 @@ def recognize_intent(text):
     best_match = None
     best_score = 0.0
 
-    for intent in INTENTS:
+    for intent, patterns in zip(INTENTS, _COMPILED_PATTERNS):
         score = 0.0
 
         # Pattern matching (higher weight)
-        for pattern in intent['patterns']:
-            if re.search(pattern, text_lower):
+        for pattern in patterns:
+            if pattern.search(text_lower):
                 score = max(score, 0.7 + (intent['priority'] * 0.03))
                 break
 
@@ -450,16 +468,8 @@ def recognize_intent(text):
             best_score = score
             best_match = intent['name']
 
-    # Extract numbers from text
-    numbers = re.findall(r'\d+\.?\d*', text_lower)
-    extracted = {'numbers': [float(n) for n in numbers]}
-
-    # Extract semester number
-    sem_match = re.search(r'(?:sem(?:ester)?)\s*(\d+)', text_lower)
-    if not sem_match:
-        sem_match = re.search(r'(\d+)(?:st|nd|rd|th)\s*sem', text_lower)
-    if sem_match:
-        extracted['semester'] = int(sem_match.group(1))
+    # Numeric slots (attendance, remaining lectures, marks, CGPA...) shared by every handler
+    extracted = extract_entities(text)
 
     if best_match is None:
         return 'unknown', 0.0, extracted
@@ -0,0 +1,55 @@
+"""
+Gunicorn settings for run:application (both Flask apps).
+
+    gunicorn -c gunicorn.conf.py run:application
+
+With GUNICORN_PRELOAD=1 (the default) the master imports the apps and runs
+run.warm_up() before forking: the knowledge base, compiled intent patterns,
+the career app and its scoring matrices are built once and shared by the
+workers copy-on-write.  The garbage collector is off while the master loads
+and everything it built is frozen with gc.freeze() before the fork, so
+collections in the workers do not write to (and un-share) those pages.
+
+Nothing that holds a thread or a connection may be started in the master:
+the scheduler's leader election is started in each worker by post_fork
+(SCHEDULER_START=post_fork), and warm_up() builds the autocomplete index in
+the master's own thread instead of the career app's background thread.
+
+Set GUNICORN_PRELOAD=0 to load the apps in every worker instead (each worker
+then starts the scheduler election when the career app is imported).
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '2'))
+timeout = 120
+accesslog = '-'
+errorlog = '-'
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+if preload_app:
+    os.environ.setdefault('SCHEDULER_START', 'post_fork')
+    # Objects created while loading stay where they are allocated
+    gc.disable()
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import run
+
+    run.warm_up()
+    gc.freeze()
+    server.log.info('Preloaded apps; %d objects frozen for the workers', gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    gc.enable()
+    import run
+
+    run.start_worker()
@@ -1,7 +1,10 @@
 """
-Admin panel routes: manage subjects, rules, notices, materials, view analytics.
+Admin panel routes: manage subjects, rules, notices, materials, cohort grading, view analytics.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+import io
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response
+from werkzeug.utils import secure_filename
 from database import query_db, execute_db
 from routes.auth import admin_required
 
@@ -342,3 +345,40 @@ def analytics():
         avg_confidence=avg_conf['avg_conf'] if avg_conf else 0,
         unique_users=unique_users['cnt'] if unique_users else 0,
     )
+
+
+# ----------------------------------------------------------------
+# Cohort grading
+# ----------------------------------------------------------------
+
+@admin_bp.route('/grading', methods=['GET', 'POST'])
+@admin_required
+def grading_upload():
+    """Upload a cohort's grades CSV and download SGPA / CGPA results for every student."""
+    from chatbot import grading    # pulls in NumPy; load it with the first grading request
+
+    if request.method == 'GET':
+        return render_template('admin/grading.html', columns=grading.RESULT_COLUMNS)
+
+    upload = request.files.get('grades')
+    if not upload or not upload.filename:
+        flash('Choose a grades CSV to upload.', 'danger')
+        return redirect(url_for('admin.grading_upload'))
+    try:
+        results = grading.grade_cohort(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+    except UnicodeDecodeError:
+        flash('The file is not a UTF-8 CSV.', 'danger')
+        return redirect(url_for('admin.grading_upload'))
+    except grading.GradingError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('admin.grading_upload'))
+    if not results['enrollment_no']:
+        flash('The CSV has no grade rows.', 'danger')
+        return redirect(url_for('admin.grading_upload'))
+
+    name = secure_filename(upload.filename).rsplit('.', 1)[0] or 'cohort'
+    return Response(
+        grading.iter_results_csv(results),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{name}_results.csv"'},
+    )
@@ -4,6 +4,7 @@ Main application routes: dashboard, chatbot, chat API.
 from flask import Blueprint, render_template, request, jsonify, session
 from database import query_db, execute_db
 from chatbot.engine import ChatbotEngine
+from chatbot.attendance import plan_semester
 from routes.auth import login_required
 import uuid
 
@@ -182,6 +183,20 @@ def send_message():
     })
 
 
+@main_bp.route('/api/attendance/planner', methods=['POST'])
+@login_required
+def attendance_planner():
+    """
+    Whole-semester what-if grid.  Body: {"subjects": [{"name", "attended",
+    "total", "remaining"}, ...]}; see chatbot.attendance.plan_semester.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(plan_semester(data.get('subjects') or []))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
 @main_bp.route('/api/chat/<chat_id>/delete', methods=['POST'])
 @login_required
 def delete_chat(chat_id):
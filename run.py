@@ -2,12 +2,25 @@
 Entry point: run both Flask applications on a single port.
 
 Main app      → http://127.0.0.1:5000/
-Career app    → http://127.0.0.1:5000/career/
+Career app    → http://127.0.0.1:5000/Career_Guidance_SubProject/
+
+The career app is mounted lazily: it is imported on the first request under
+/Career_Guidance_SubProject (or by career_app.load()), so a cold start only
+pays for the main app.  Its embedded job scheduler starts when it loads; call
+career_app.load() at start-up, or use SCHEDULER_MODE=external, to run jobs
+from boot.
+
+Under gunicorn with preloading (gunicorn.conf.py) the master calls warm_up()
+before forking, so workers start with both apps, the knowledge base and the
+career scoring matrices already built, and start_worker() in each worker.
 
 Usage: python run.py
 """
 import os
 import sys
+import logging
+import threading
+import importlib
 import importlib.util
 
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
@@ -20,7 +33,7 @@ main_app = create_app()
 main_app.config['SESSION_COOKIE_NAME'] = 'main_session'
 
 # ── Career-guidance sub-app ──────────────────────────────────
-# Load it via importlib so its `from config import *` and
+# Loaded via importlib so its `from config import *` and
 # `from resume_parser.parser import ...` resolve against its
 # own directory, not the main project's identically-named modules.
 
@@ -28,32 +41,94 @@ OLD_APP_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), 'Career_Guidance_SubProject')
 )
 
-_prev_cwd = os.getcwd()
-_prev_path = sys.path[:]
+# Top-level module names both projects use for different modules
+_SHARED_MODULE_NAMES = ('config', 'resume_parser', 'resume_parser.parser')
 
-# Temporarily adjust sys.path and cwd so the old app's internal
-# imports (config, resume_parser, etc.) resolve correctly.
-sys.path.insert(0, OLD_APP_DIR)
-os.chdir(OLD_APP_DIR)
 
-spec = importlib.util.spec_from_file_location(
-    'career_old_app',
-    os.path.join(OLD_APP_DIR, 'app.py'),
-)
-career_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(career_module)
-
-# Restore original cwd and sys.path
-os.chdir(_prev_cwd)
-sys.path[:] = _prev_path
-
-career_app = career_module.app
-career_app.secret_key = main_app.secret_key          # share the same session
-career_app.config['SESSION_COOKIE_NAME'] = 'main_session'
-career_app.config['SESSION_COOKIE_PATH'] = '/'       # read cookie set at root
-career_app.config['UPLOAD_FOLDER'] = os.path.join(OLD_APP_DIR, 'uploads')
-career_app.config['APPLICATION_ROOT'] = '/Career_Guidance_SubProject'
-career_app.config['TEMPLATES_AUTO_RELOAD'] = True    # reload templates on every request
+def _import_career_app():
+    # Hide the main project's copies while the career app imports its own,
+    # then put them back; the career modules keep references to theirs.
+    main_modules = {name: sys.modules.pop(name) for name in _SHARED_MODULE_NAMES if name in sys.modules}
+    prev_path = sys.path[:]
+    sys.path.insert(0, OLD_APP_DIR)
+    try:
+        spec = importlib.util.spec_from_file_location(
+            'career_old_app',
+            os.path.join(OLD_APP_DIR, 'app.py'),
+        )
+        career_module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = career_module    # Flask finds its root_path through it
+        spec.loader.exec_module(career_module)
+    finally:
+        sys.path[:] = prev_path
+        for name in _SHARED_MODULE_NAMES:
+            sys.modules.pop(name, None)
+        sys.modules.update(main_modules)
+
+    app = career_module.app
+    app.secret_key = main_app.secret_key                 # share the same session
+    app.config['SESSION_COOKIE_NAME'] = 'main_session'
+    app.config['SESSION_COOKIE_PATH'] = '/'              # read cookie set at root
+    app.config['UPLOAD_FOLDER'] = os.path.join(OLD_APP_DIR, 'uploads')
+    app.config['APPLICATION_ROOT'] = '/Career_Guidance_SubProject'
+    app.config['TEMPLATES_AUTO_RELOAD'] = True           # reload templates on every request
+    return app
+
+
+class LazyApp:
+    """WSGI app that builds the real one on its first request."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._app = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = self._factory()
+        return self._app
+
+    def __call__(self, environ, start_response):
+        return self.load()(environ, start_response)
+
+
+career_app = LazyApp(_import_career_app)
+
+log = logging.getLogger(__name__)
+
+
+def warm_up():
+    """
+    Build, once, what every worker would otherwise build for itself: the
+    career app, its scoring matrices, autocomplete index and PDF styles, and
+    the modules deferred to first use.  Meant for the master of a pre-forking
+    server; everything runs in this thread, so no lock is held at the fork.
+    """
+    from chatbot.json_loader import kb
+
+    importlib.import_module('chatbot.grading')      # NumPy, for the planner and cohort grading
+    kb.load()
+    career_app.load()
+    sys.modules['career_guidance_ai.reports'].styles()
+    try:
+        sys.modules['career_guidance_ai.scoring'].get_scorer()
+    except Exception:
+        # Workers load the catalogue on first use instead
+        log.exception('Could not preload the career scoring matrices')
+    try:
+        sys.modules['career_guidance_ai.autocomplete'].get_index()
+    except Exception:
+        log.exception('Could not preload the autocomplete index')
+
+
+def start_worker():
+    """Start, in a freshly forked worker, what must not run in the master."""
+    scheduler = sys.modules.get('career_guidance_ai.scheduler')
+    if scheduler is not None:
+        scheduler.start_embedded(after_fork=True)
+
 
 # ── Combine with DispatcherMiddleware ───────────────────────
 application = DispatcherMiddleware(main_app, {'/Career_Guidance_SubProject': career_app})